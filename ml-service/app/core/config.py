@@ -13,13 +13,64 @@ class Settings(BaseSettings):
     MODEL_CACHE_DIR: str = "./models"
     HUGGINGFACE_API_KEY: str = ""
     
+    # Startup: models load in the background in priority order (sentiment first, topics last)
+    STARTUP_MODE: str = "background"  # background, blocking (old behaviour: wait for every model)
+    WARMUP_ENABLED: bool = True  # run warm-up batches before a model is marked ready
+    READINESS_MODELS: List[str] = ["sentiment_analyzer"]  # /ready waits for these to settle
+    LOADING_FALLBACK: bool = True  # serve fallbacks while a model loads; False = 503
+    LOADING_RETRY_AFTER_SECONDS: int = 5
+    
     # Sentiment Analysis Models
     SENTIMENT_MODEL: str = "cardiffnlp/twitter-roberta-base-sentiment-latest"
     EMOTION_MODEL: str = "j-hartmann/emotion-english-distilroberta-base"
     
+    # Inference backend: pytorch, onnx or onnx-int8 (ONNX exports cached under MODEL_CACHE_DIR)
+    INFERENCE_BACKEND: str = "pytorch"
+    PARITY_MIN_AGREEMENT: float = 0.95
+    PARITY_SAMPLE_PATH: str = ""
+    
+    # Safetensors bundles written by `python -m app.services.model_bundles`, loaded memory-mapped
+    MODEL_BUNDLES_ENABLED: bool = True
+    MODEL_BUNDLE_DIR: str = ""  # default: MODEL_CACHE_DIR/bundles
+    
+    # Classifier version rollout (/retrain): validate a candidate on a holdout set, then hot-swap it
+    ROLLOUT_HOLDOUT_DIR: str = ""  # {model}.jsonl of {"text", "label"} lines; default MODEL_CACHE_DIR/holdout
+    ROLLOUT_MIN_ACCURACY: float = 0.0
+    ROLLOUT_MAX_ACCURACY_DROP: float = 0.02  # allowed drop below the active version's holdout accuracy
+    ROLLOUT_MAX_LATENCY_RATIO: float = 1.5  # allowed candidate / active p95 batch latency
+    ROLLOUT_SYNC_INTERVAL: float = 10.0  # seconds between checks for versions another worker activated (0 = off)
+    MODEL_VERSIONS_KEEP: int = 5  # replaced versions remembered for rollback
+    
     # Topic Modeling Configuration
     MIN_TOPIC_SIZE: int = 10
     MAX_TOPICS: int = 50
+    TOPIC_ENGINE: str = "bertopic"  # bertopic, hashing (CPU-only, no embedding model)
+    TOPIC_EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    TOPIC_MODEL_KEEP_VERSIONS: int = 3  # fitted models kept under MODEL_CACHE_DIR/topics
+    
+    # Topic extraction jobs (corpora above the threshold run in a process pool)
+    TOPIC_JOB_THRESHOLD: int = 200
+    TOPIC_JOB_WORKERS: int = 1
+    TOPIC_JOB_MAX_TEXTS: int = 100000
+    TOPIC_JOB_RETENTION_HOURS: int = 72
+    TOPIC_EXECUTOR_WORKERS: int = 1  # threads for in-process topic fits, separate from the inference executor
+    
+    # Hashing + mini-batch NMF topic engine (fallback and TOPIC_ENGINE=hashing)
+    HASHING_TOPICS_FEATURES: int = 65536
+    HASHING_TOPICS_CHUNK_SIZE: int = 2048
+    HASHING_TOPICS_EPOCHS: int = 1
+    
+    # Online topic modeling from pushed mini-batches
+    ONLINE_TOPICS_BATCH_SIZE: int = 256
+    ONLINE_TOPICS_MAX_BUFFERED: int = 4096  # pushes beyond this many waiting texts get 429
+    ONLINE_TOPICS_CLUSTERS: int = 20
+    ONLINE_TOPICS_COMPONENTS: int = 5
+    ONLINE_TOPICS_DECAY: float = 0.01  # per-batch decay of the online vocabulary counts
+    ONLINE_TOPICS_DELETE_MIN_DF: float = 0.5  # drop decayed terms below this count
+    
+    # Sentence embeddings cached on disk (memory-mapped) under MODEL_CACHE_DIR/embeddings
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_ROWS: int = 2000000
     
     # Database Configuration (optional for caching)
     MONGODB_URI: str = "mongodb://localhost:27017/sentiment-tracker"
@@ -29,10 +80,64 @@ class Settings(BaseSettings):
     BATCH_SIZE: int = 32
     MAX_LENGTH: int = 512
     NUM_WORKERS: int = 4
+    MAX_TOKENS_PER_BATCH: int = 8192  # padded tokens (rows x longest row) per forward pass
     
-    # API Rate Limiting
+    # Long documents are scored over overlapping token windows
+    LONG_TEXT_ENABLED: bool = True
+    LONG_TEXT_WINDOW_OVERLAP: int = 128
+    LONG_TEXT_MAX_WINDOWS: int = 16
+    LONG_TEXT_REDUCER: str = "mean"  # mean, length_weighted, max_negative
+    
+    # Pre-fork server (python -m app.server): the master loads models once and forks workers
+    SERVER_WORKERS: int = 0  # worker processes; 0 = NUM_WORKERS
+    SERVER_PRELOAD: bool = True  # load in the master so workers share weights copy-on-write
+    SERVER_MAX_REQUESTS: int = 0  # recycle a worker after this many requests (0 = never)
+    SERVER_MAX_REQUESTS_JITTER: int = 0  # random extra requests, so workers don't recycle together
+    SERVER_MAX_WORKER_MEMORY_MB: int = 0  # recycle a worker whose unshared memory exceeds this (0 = never)
+    SERVER_MONITOR_INTERVAL: float = 5.0
+    SERVER_GRACEFUL_TIMEOUT: int = 30  # seconds a stopping worker gets to finish in-flight requests
+    
+    # Inference executor (0 = use NUM_WORKERS / split cores evenly; per worker under app.server)
+    INFERENCE_WORKERS: int = 0
+    INFERENCE_TORCH_THREADS: int = 0  # torch.set_num_threads for the process, set once when the pool starts
+    
+    # Micro-batching of concurrent single-text requests
+    MICRO_BATCH_ENABLED: bool = True
+    MICRO_BATCH_MAX_SIZE: int = 32
+    MICRO_BATCH_MAX_WAIT_MS: float = 5.0
+    
+    # Streaming NDJSON analysis (0 = use BATCH_SIZE)
+    STREAM_CHUNK_SIZE: int = 0
+    STREAM_MAX_LINE_BYTES: int = 65536
+    
+    # Result cache (in-process LRU + optional shared Redis tier)
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ITEMS: int = 50000
+    CACHE_TTL_SECONDS: int = 86400
+    CACHE_REDIS_ENABLED: bool = False
+    CACHE_KEY_PREFIX: str = "ml-cache"
+    
+    # VADER fallback / lexicon-only mode (0 workers = one per core)
+    SENTIMENT_MODE: str = "model"  # model, lexicon
+    EMOTION_LEXICON_PATH: str = ""  # JSON {"emotion": ["keyword", ...]}; empty = built-in
+    VADER_WORKERS: int = 0
+    VADER_CHUNK_SIZE: int = 500
+    VADER_INLINE_THRESHOLD: int = 64
+    
+    # API Rate Limiting: a token bucket per client (0 requests = off; per worker process under app.server)
     RATE_LIMIT_REQUESTS: int = 100
     RATE_LIMIT_WINDOW: int = 60  # seconds
+    RATE_LIMIT_BURST: int = 0  # bucket size; 0 = RATE_LIMIT_REQUESTS
+    RATE_LIMIT_KEY_HEADER: str = ""  # e.g. X-API-Key; empty = client address
+    RATE_LIMIT_MAX_CLIENTS: int = 10000  # least recently seen buckets are dropped past this
+    RATE_LIMIT_EXEMPT_PATHS: List[str] = ["/", "/health", "/live", "/ready", "/metrics"]
+    
+    # Admission control: bound queued model work and shed load when queueing breaks the latency budget
+    ADMISSION_MAX_QUEUE: int = 256  # texts admitted to the models and not finished (~ throughput x budget); 0 = unbounded
+    ADMISSION_QUEUE_WAIT_BUDGET_MS: float = 500.0  # shed while inference queue wait is above this; 0 = off
+    ADMISSION_WAIT_WINDOW_SECONDS: float = 2.0  # recent forward passes the queue wait is measured over
+    ADMISSION_SHED_MODE: str = "degrade"  # degrade (VADER/keyword fallbacks), reject (429)
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
     
     # CORS Settings
     ALLOWED_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:3001"]
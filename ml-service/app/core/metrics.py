@@ -0,0 +1,197 @@
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logging import logger
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        REGISTRY,
+        Counter,
+        Histogram,
+        generate_latest,
+        start_http_server
+    )
+    from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+except ImportError:  # Metrics are optional
+    REGISTRY = None
+    Counter = Histogram = None
+    CONTENT_TYPE_LATEST = "text/plain; charset=utf-8"
+
+METRICS_ENABLED = settings.ENABLE_METRICS and REGISTRY is not None
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+TOKEN_BUCKETS = (64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+class _NoopMetric:
+    """Stands in for a metric when metrics are disabled, so call sites need no checks"""
+
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def observe(self, value: float):
+        pass
+
+    def inc(self, amount: float = 1):
+        pass
+
+def _metric(factory, *args, **kwargs):
+    return factory(*args, **kwargs) if METRICS_ENABLED else _NoopMetric()
+
+REQUEST_COUNT = _metric(
+    Counter, "ml_http_requests_total", "HTTP requests by endpoint and status",
+    ["method", "endpoint", "status"]
+)
+REQUEST_LATENCY = _metric(
+    Histogram, "ml_http_request_duration_seconds", "HTTP request latency by endpoint",
+    ["method", "endpoint"], buckets=LATENCY_BUCKETS
+)
+STAGE_LATENCY = _metric(
+    Histogram, "ml_stage_duration_seconds", "Time per inference stage (preprocess, tokenize, forward, postprocess)",
+    ["model", "stage"], buckets=LATENCY_BUCKETS
+)
+BATCH_SIZE = _metric(
+    Histogram, "ml_batch_size", "Texts per request, micro-batch or forward pass",
+    ["model", "kind"], buckets=BATCH_SIZE_BUCKETS
+)
+BATCH_TOKENS = _metric(
+    Histogram, "ml_batch_padded_tokens", "Padded tokens (rows x longest row) per forward pass",
+    ["model"], buckets=TOKEN_BUCKETS
+)
+FALLBACKS = _metric(
+    Counter, "ml_fallback_total", "Requests served by a fallback path",
+    ["component", "reason"]
+)
+QUEUE_WAIT = _metric(
+    Histogram, "ml_inference_queue_wait_seconds", "Time a call waits for an executor thread",
+    ["executor"], buckets=LATENCY_BUCKETS
+)
+ADMISSION = _metric(
+    Counter, "ml_admission_total", "Admission decisions (admitted, degraded, rejected, rate_limited) in texts or requests",
+    ["component", "decision", "reason"]
+)
+
+def observe_stage(model: str, stage: str, seconds: float):
+    STAGE_LATENCY.labels(model, stage).observe(seconds)
+
+@contextmanager
+def stage_timer(model: str, stage: str):
+    """Time a block as one inference stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(model, stage).observe(time.perf_counter() - start)
+
+def observe_batch(model: str, kind: str, size: int):
+    BATCH_SIZE.labels(model, kind).observe(size)
+
+def observe_padded_tokens(model: str, tokens: int):
+    BATCH_TOKENS.labels(model).observe(tokens)
+
+def record_fallback(component: str, reason: str, count: int = 1):
+    FALLBACKS.labels(component, reason).inc(count)
+
+def observe_queue_wait(seconds: float, executor: str = "inference"):
+    QUEUE_WAIT.labels(executor).observe(seconds)
+
+def record_admission(component: str, decision: str, reason: str = "", count: int = 1):
+    ADMISSION.labels(component, decision, reason).inc(count)
+
+class _CallbackCollector:
+    """Builds metric families from service stats at scrape time, costing nothing per request"""
+
+    def __init__(self, collect: Callable[[], Iterable]):
+        self._collect = collect
+
+    def collect(self):
+        try:
+            yield from self._collect()
+        except Exception as e:
+            logger.error(f"Metrics collection failed: {e}")
+
+def metric_family(
+    kind: str,
+    name: str,
+    documentation: str,
+    samples: Iterable[Tuple[Sequence[str], float]],
+    labels: Sequence[str] = ()
+):
+    """Build a gauge or counter family for a scrape-time collector"""
+    factory = CounterMetricFamily if kind == "counter" else GaugeMetricFamily
+    family = factory(name, documentation, labels=list(labels))
+    for label_values, value in samples:
+        family.add_metric(list(label_values), value)
+    return family
+
+def register_collector(collect: Callable[[], Iterable]):
+    """Register a function yielding metric families on every scrape"""
+    if METRICS_ENABLED:
+        REGISTRY.register(_CallbackCollector(collect))
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Current metrics in the Prometheus text format"""
+    if not METRICS_ENABLED:
+        return b"", CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+def start_metrics_server():
+    """Serve metrics on METRICS_PORT, separate from the API port"""
+    if not METRICS_ENABLED:
+        return
+    try:
+        start_http_server(settings.METRICS_PORT)
+        logger.info(f"Metrics server listening on port {settings.METRICS_PORT}")
+    except OSError as e:
+        # Another worker already owns the port; /metrics on the API port still works
+        logger.warning(f"Metrics server not started on port {settings.METRICS_PORT}: {e}")
+
+class MetricsMiddleware:
+    """Counts requests and records latency per route, labelled by path template"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._paths = {}
+
+    def _endpoint_path(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+
+        path = self._paths.get(endpoint)
+        if path is None:
+            # Templates like /topics/jobs/{job_id} keep label cardinality bounded
+            routes = getattr(scope.get("app"), "routes", [])
+            path = next(
+                (route.path for route in routes if getattr(route, "endpoint", None) is endpoint),
+                getattr(endpoint, "__name__", "unknown")
+            )
+            self._paths[endpoint] = path
+        return path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Streaming responses are timed until their last chunk is sent
+            endpoint = self._endpoint_path(scope)
+            REQUEST_COUNT.labels(scope["method"], endpoint, str(status)).inc()
+            REQUEST_LATENCY.labels(scope["method"], endpoint).observe(time.perf_counter() - start)
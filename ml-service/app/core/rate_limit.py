@@ -0,0 +1,89 @@
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import record_admission
+
+class TokenBucketLimiter:
+    """Per-client token buckets refilled at `requests` per `window` seconds, holding up to `burst`
+
+    Buckets live in process memory, least recently seen first out past
+    `max_clients`, so each pre-forked worker enforces the limit on its own.
+    """
+
+    def __init__(self, requests: int, window: float, burst: int = 0, max_clients: int = 10000):
+        self.rate = requests / window
+        self.capacity = float(burst or requests)
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated)
+
+    def acquire(self, key: str, now: Optional[float] = None) -> Tuple[float, float]:
+        """Take a token for a client: (tokens left, seconds until one is available if none was)"""
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.pop(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+
+        wait = 0.0
+        if tokens >= 1.0:
+            tokens -= 1.0
+        else:
+            wait = (1.0 - tokens) / self.rate
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return tokens, wait
+
+class RateLimitMiddleware:
+    """Enforces RATE_LIMIT_REQUESTS per RATE_LIMIT_WINDOW per client, answering 429 with Retry-After"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.enabled = settings.RATE_LIMIT_REQUESTS > 0 and settings.RATE_LIMIT_WINDOW > 0
+        self.limiter = TokenBucketLimiter(
+            settings.RATE_LIMIT_REQUESTS,
+            settings.RATE_LIMIT_WINDOW,
+            settings.RATE_LIMIT_BURST,
+            settings.RATE_LIMIT_MAX_CLIENTS
+        ) if self.enabled else None
+        self.exempt = set(settings.RATE_LIMIT_EXEMPT_PATHS)
+        self.key_header = settings.RATE_LIMIT_KEY_HEADER.lower().encode("latin-1")
+
+    def _client_key(self, scope: Scope) -> str:
+        if self.key_header:
+            for name, value in scope.get("headers", []):
+                if name == self.key_header:
+                    return "key:" + value.decode("latin-1")
+        client = scope.get("client")
+        return "addr:" + (client[0] if client else "unknown")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.enabled or scope["path"] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+
+        remaining, wait = self.limiter.acquire(self._client_key(scope))
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+
+        record_admission("http", "rate_limited")
+        retry_after = max(1, math.ceil(wait))
+        body = json.dumps({"detail": "Rate limit exceeded", "retry_after": retry_after}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(retry_after).encode("latin-1")),
+                (b"x-ratelimit-limit", str(settings.RATE_LIMIT_REQUESTS).encode("latin-1")),
+                (b"x-ratelimit-remaining", str(int(remaining)).encode("latin-1"))
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
+from app.core.config import settings
+
 class SentimentRequest(BaseModel):
     text: str = Field(..., min_length=1, max_length=10000, description="Text to analyze")
     include_emotions: bool = Field(default=False, description="Include emotion analysis")
@@ -43,6 +45,20 @@ class EmotionAnalysisRequest(BaseModel):
             }
         }
 
+class BatchEmotionAnalysisRequest(BaseModel):
+    texts: List[str] = Field(..., min_items=1, max_items=100, description="List of texts to analyze for emotions")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "texts": [
+                    "I'm so excited about this new feature!",
+                    "The delivery was late and nobody answered my emails.",
+                    "I was worried it would break, but it works."
+                ]
+            }
+        }
+
 class TopicModelingRequest(BaseModel):
     texts: List[str] = Field(..., min_items=5, max_items=1000, description="List of texts for topic modeling")
     num_topics: Optional[int] = Field(default=10, ge=2, le=50, description="Number of topics to extract")
@@ -62,3 +78,67 @@ class TopicModelingRequest(BaseModel):
                 "min_topic_size": 10
             }
         }
+
+class TopicFitRequest(BaseModel):
+    texts: List[str] = Field(..., min_items=10, max_items=10000, description="Corpus to fit the topic model on")
+    min_topic_size: Optional[int] = Field(default=None, ge=5, le=100, description="Minimum topic size")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "texts": [
+                    "The battery life is excellent",
+                    "Great camera quality",
+                    "Fast shipping and delivery"
+                ],
+                "min_topic_size": 10
+            }
+        }
+
+class TopicAssignRequest(BaseModel):
+    texts: List[str] = Field(..., min_items=1, max_items=1000, description="Texts to assign to existing topics")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "texts": [
+                    "The battery died after a day",
+                    "Delivery took two weeks"
+                ]
+            }
+        }
+
+class OnlineTopicsRequest(BaseModel):
+    texts: List[str] = Field(..., min_items=1, max_items=1000, description="Newly arrived texts")
+    flush: bool = Field(default=False, description="Fit buffered texts now instead of waiting for a full mini-batch")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "texts": [
+                    "The new update drains the battery",
+                    "Checkout keeps failing on mobile"
+                ],
+                "flush": False
+            }
+        }
+
+class TopicJobRequest(BaseModel):
+    texts: List[str] = Field(..., min_items=5, max_items=settings.TOPIC_JOB_MAX_TEXTS, description="Corpus for topic extraction")
+    num_topics: Optional[int] = Field(default=10, ge=2, le=50, description="Number of topics to extract")
+    min_topic_size: Optional[int] = Field(default=10, ge=5, le=100, description="Minimum topic size")
+
+class RetrainRequest(BaseModel):
+    model: Optional[str] = Field(default=None, description="sentiment_analyzer or emotion_analyzer; both if omitted")
+    source: Optional[str] = Field(default=None, description="Model id, path or bundle to load; the active version's if omitted")
+    version: Optional[str] = Field(default=None, max_length=64, description="Version name; generated if omitted")
+    force: bool = Field(default=False, description="Activate even if validation fails")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "model": "sentiment_analyzer",
+                "source": "/models/sentiment-2024-06",
+                "version": "2024-06"
+            }
+        }
@@ -18,6 +18,7 @@ class SentimentResponse(BaseModel):
     topics: Optional[List[str]] = Field(None, description="Extracted topics if requested")
     processing_time: float = Field(..., description="Processing time in seconds")
     model_version: str = Field(..., description="Model version used")
+    degraded: bool = Field(False, description="Served by a fallback instead of the model (overload or outage)")
     timestamp: datetime = Field(default_factory=datetime.utcnow, description="Analysis timestamp")
     
     class Config:
@@ -37,6 +38,7 @@ class SentimentResponse(BaseModel):
                 "topics": ["product", "quality"],
                 "processing_time": 0.15,
                 "model_version": "1.0.0",
+                "degraded": False,
                 "timestamp": "2024-01-10T15:30:00Z"
             }
         }
@@ -72,14 +74,20 @@ class EmotionAnalysisResponse(BaseModel):
     dominant_emotion: str = Field(..., description="Most prominent emotion")
     processing_time: float = Field(..., description="Processing time in seconds")
     model_version: str = Field(..., description="Model version used")
+    degraded: bool = Field(False, description="Served by a fallback instead of the model (overload or outage)")
     timestamp: datetime = Field(default_factory=datetime.utcnow, description="Analysis timestamp")
 
+class BatchEmotionAnalysisResponse(BaseModel):
+    results: List[EmotionAnalysisResponse] = Field(..., description="List of emotion analysis results")
+    total_processed: int = Field(..., description="Total number of texts processed")
+    processing_time: float = Field(..., description="Total processing time in seconds")
+
 class Topic(BaseModel):
     id: int = Field(..., description="Topic ID")
     name: str = Field(..., description="Topic name/label")
     keywords: List[str] = Field(..., description="Top keywords for this topic")
     size: int = Field(..., description="Number of documents in this topic")
-    coherence_score: float = Field(..., description="Topic coherence score")
+    coherence_score: float = Field(..., ge=-1, le=1, description="Topic coherence score (mean keyword NPMI)")
 
 class TopicModelingResponse(BaseModel):
     topics: List[Topic] = Field(..., description="Extracted topics")
@@ -89,6 +97,48 @@ class TopicModelingResponse(BaseModel):
     model_version: str = Field(..., description="Model version used")
     timestamp: datetime = Field(default_factory=datetime.utcnow, description="Analysis timestamp")
 
+class TopicModelInfoResponse(BaseModel):
+    version: str = Field(..., description="Fitted topic model version")
+    topics: List[Topic] = Field(..., description="Topics of the fitted model")
+    num_topics: int = Field(..., description="Number of topics found")
+    total_documents: int = Field(..., description="Documents the model was fitted on")
+    fitted_at: datetime = Field(..., description="When the model was fitted")
+    processing_time: Optional[float] = Field(None, description="Fit time in seconds")
+
+class TopicAssignment(BaseModel):
+    text: str = Field(..., description="Original text")
+    topic_id: int = Field(..., description="Assigned topic ID (-1 for outliers)")
+    topic_name: str = Field(..., description="Assigned topic name/label")
+    probability: float = Field(..., ge=0, le=1, description="Assignment probability")
+
+class TopicAssignResponse(BaseModel):
+    assignments: List[TopicAssignment] = Field(..., description="Topic assignment per text")
+    model_version: str = Field(..., description="Fitted topic model version used")
+    processing_time: float = Field(..., description="Processing time in seconds")
+    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Assignment timestamp")
+
+class OnlineTopicsResponse(BaseModel):
+    topics: List[Topic] = Field(..., description="Current online topics")
+    num_topics: int = Field(..., description="Number of topics")
+    documents_seen: int = Field(..., description="Documents fitted so far")
+    batches_fitted: int = Field(..., description="Mini-batch updates so far")
+    buffered: int = Field(..., description="Documents waiting for the next mini-batch")
+    updated_at: Optional[datetime] = Field(None, description="Time of the last update")
+    accepted: Optional[int] = Field(None, description="Documents accepted from this request")
+
+class TopicJobResponse(BaseModel):
+    id: str = Field(..., description="Job ID")
+    status: str = Field(..., description="Job status (queued, running, completed, failed)")
+    stage: str = Field(..., description="Current processing stage")
+    progress: float = Field(..., ge=0, le=1, description="Approximate progress")
+    num_texts: int = Field(..., description="Texts in the corpus")
+    num_topics: int = Field(..., description="Requested number of topics")
+    min_topic_size: int = Field(..., description="Minimum topic size")
+    created_at: datetime = Field(..., description="Submission time")
+    started_at: Optional[datetime] = Field(None, description="Start time")
+    finished_at: Optional[datetime] = Field(None, description="Completion time")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+
 class HealthResponse(BaseModel):
     status: str = Field(..., description="Service health status")
     models_loaded: int = Field(..., description="Number of models loaded")
@@ -112,3 +162,21 @@ class HealthResponse(BaseModel):
                 "timestamp": "2024-01-10T15:30:00Z"
             }
         }
+
+class LivenessResponse(BaseModel):
+    status: str = Field(..., description="Always 'alive' while the process serves requests")
+    uptime: float = Field(..., description="Service uptime in seconds")
+
+class ModelReadiness(BaseModel):
+    state: str = Field(..., description="pending, loading, warming, loaded, failed or unloaded")
+    ready: bool = Field(..., description="Whether the model itself serves requests")
+    load_time: Optional[float] = Field(None, description="Seconds spent loading")
+    warmup_time: Optional[float] = Field(None, description="Seconds spent on warm-up batches")
+    error: Optional[str] = Field(None, description="Load error, if the model failed")
+
+class ReadinessResponse(BaseModel):
+    ready: bool = Field(..., description="Whether the service should receive traffic")
+    loading: bool = Field(..., description="Whether any model is still loading")
+    required: List[str] = Field(..., description="Models that must settle before the service is ready")
+    models: Dict[str, ModelReadiness] = Field(..., description="Readiness per model")
+    uptime: float = Field(..., description="Service uptime in seconds")
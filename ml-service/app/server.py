@@ -0,0 +1,258 @@
+"""Pre-fork multi-worker server
+
+    python -m app.server
+
+The master process loads every model once, then forks SERVER_WORKERS
+workers that accept connections from one shared listening socket. Workers
+inherit the loaded weights copy-on-write (and bundle weights through the
+page cache), so N workers cost far less than N times the model memory.
+Each worker gets an equal share of the cores for its torch threads, and
+is recycled after SERVER_MAX_REQUESTS requests or once its unshared
+memory passes SERVER_MAX_WORKER_MEMORY_MB.
+"""
+import asyncio
+import gc
+import os
+import random
+import signal
+import socket
+import time
+from typing import Dict, Optional, Tuple
+
+import psutil
+
+from app.core.config import settings
+from app.core.logging import logger
+
+# A worker that dies sooner than this after starting is restarted with a delay
+CRASH_WINDOW_SECONDS = 5.0
+
+class Worker:
+    """A forked worker process, identified by a stable slot index"""
+
+    def __init__(self, index: int, pid: int):
+        self.index = index
+        self.pid = pid
+        self.started_at = time.time()
+        self.stop_deadline: Optional[float] = None
+
+class PreforkServer:
+    """Loads models in the master, forks workers and keeps SERVER_WORKERS of them running"""
+
+    def __init__(self, workers: Optional[int] = None, host: Optional[str] = None, port: Optional[int] = None):
+        self.num_workers = max(1, workers or settings.SERVER_WORKERS or settings.NUM_WORKERS)
+        self.host = host or settings.HOST
+        self.port = port or settings.PORT
+        self.workers: Dict[int, Worker] = {}
+        self.restart_at: Dict[int, float] = {}
+        self.stopping = False
+        self.socket: Optional[socket.socket] = None
+
+    def thread_budget(self) -> Tuple[int, int]:
+        """Inference threads per worker and torch threads per inference thread
+
+        Topic fits run on their own TOPIC_EXECUTOR_WORKERS threads, so a single
+        inference thread is never held by a fit.
+        """
+        cores = os.cpu_count() or 1
+        executor_threads = settings.INFERENCE_WORKERS or 1
+        torch_threads = settings.INFERENCE_TORCH_THREADS or max(1, cores // (self.num_workers * executor_threads))
+        return executor_threads, torch_threads
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _preload(self):
+        import main
+
+        if not settings.SERVER_PRELOAD:
+            logger.info("SERVER_PRELOAD is off, each worker loads its own models")
+            return
+
+        import torch
+        if torch.cuda.is_available():
+            # A CUDA context does not survive fork
+            logger.warning("CUDA is available, so models are loaded in each worker instead of the master")
+            return
+
+        # Tokenizers used before the fork would otherwise warn in every worker
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+        asyncio.run(main.model_manager.preload())
+
+        # The collector never scans objects frozen here, so it doesn't write to
+        # (and un-share) their pages in every worker
+        gc.collect()
+        gc.freeze()
+
+    def _run_worker(self, index: int):
+        """Body of a forked worker: serve the app on the inherited socket until told to stop"""
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        random.seed()
+
+        import uvicorn
+        import main
+        from app.services.inference_executor import inference_executor, topic_executor
+        from app.services.vader_engine import vader_engine
+
+        executor_threads, torch_threads = self.thread_budget()
+        inference_executor.reset(executor_threads, torch_threads)
+        topic_executor.reset()
+        if not settings.VADER_WORKERS:
+            vader_engine.max_workers = max(1, (os.cpu_count() or 1) // self.num_workers)
+
+        # One metrics port per worker slot; /metrics on the API port answers for whichever worker serves it
+        settings.METRICS_PORT += index
+
+        max_requests = settings.SERVER_MAX_REQUESTS
+        if max_requests and settings.SERVER_MAX_REQUESTS_JITTER:
+            max_requests += random.randint(0, settings.SERVER_MAX_REQUESTS_JITTER)
+
+        config = uvicorn.Config(
+            main.app,
+            log_level=settings.LOG_LEVEL.lower(),
+            limit_max_requests=max_requests or None
+        )
+        uvicorn.Server(config).run(sockets=[self.socket])
+
+    def _spawn(self, index: int):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = Worker(index, pid)
+            logger.info(f"Started worker {index} (pid {pid})")
+            return
+
+        code = 1
+        try:
+            self._run_worker(index)
+            code = 0
+        except BaseException as e:
+            logger.error(f"Worker {index} failed: {e}")
+        finally:
+            os._exit(code)
+
+    def _signal(self, pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self):
+        """Collect exited workers and schedule their replacements"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            worker = self.workers.pop(pid, None)
+            if worker is None or self.stopping:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            uptime = time.time() - worker.started_at
+            delay = 0.0
+            if code == 0 or worker.stop_deadline is not None:
+                logger.info(f"Worker {worker.index} (pid {pid}) recycled after {uptime:.0f}s")
+            else:
+                logger.warning(f"Worker {worker.index} (pid {pid}) exited with code {code} after {uptime:.0f}s")
+                if uptime < CRASH_WINDOW_SECONDS:
+                    delay = CRASH_WINDOW_SECONDS
+            self.restart_at[worker.index] = time.time() + delay
+
+    def _restart(self):
+        now = time.time()
+        for index, at in list(self.restart_at.items()):
+            if at <= now:
+                del self.restart_at[index]
+                self._spawn(index)
+
+    def _check_workers(self):
+        """Recycle workers over the memory limit and kill ones that overran their graceful stop"""
+        limit = settings.SERVER_MAX_WORKER_MEMORY_MB * 1024**2
+        now = time.time()
+
+        for worker in list(self.workers.values()):
+            if worker.stop_deadline is not None:
+                if now > worker.stop_deadline:
+                    logger.warning(f"Worker {worker.index} (pid {worker.pid}) did not stop in time, killing it")
+                    self._signal(worker.pid, signal.SIGKILL)
+                continue
+            if not limit:
+                continue
+
+            try:
+                # USS counts only pages this worker alone maps; inherited and mapped weights are excluded
+                unshared = psutil.Process(worker.pid).memory_full_info().uss
+            except psutil.Error:
+                continue
+            if unshared > limit:
+                logger.warning(
+                    f"Worker {worker.index} (pid {worker.pid}) holds {unshared / 1024**2:.0f}MB "
+                    f"of unshared memory, recycling it"
+                )
+                worker.stop_deadline = now + settings.SERVER_GRACEFUL_TIMEOUT
+                self._signal(worker.pid, signal.SIGTERM)
+
+    def _stop(self, signum, _frame):
+        self.stopping = True
+
+    def _shutdown(self):
+        logger.info(f"Stopping {len(self.workers)} workers...")
+        for pid in self.workers:
+            self._signal(pid, signal.SIGTERM)
+
+        deadline = time.time() + settings.SERVER_GRACEFUL_TIMEOUT
+        while self.workers and time.time() < deadline:
+            self._reap()
+            time.sleep(0.1)
+
+        for pid in self.workers:
+            logger.warning(f"Killing worker pid {pid} after the graceful timeout")
+            self._signal(pid, signal.SIGKILL)
+        while self.workers:
+            self._reap()
+            time.sleep(0.1)
+
+        self.socket.close()
+        logger.info("Server stopped")
+
+    def run(self):
+        self._preload()
+        self.socket = self._bind()
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        executor_threads, torch_threads = self.thread_budget()
+        logger.info(
+            f"Serving on {self.host}:{self.port} with {self.num_workers} workers, "
+            f"{executor_threads} inference threads x {torch_threads} torch threads each"
+        )
+        for index in range(self.num_workers):
+            self._spawn(index)
+
+        next_check = 0.0
+        while not self.stopping:
+            self._reap()
+            self._restart()
+            if time.time() >= next_check:
+                self._check_workers()
+                next_check = time.time() + settings.SERVER_MONITOR_INTERVAL
+            time.sleep(0.5)
+
+        self._shutdown()
+
+def main():
+    PreforkServer().run()
+
+if __name__ == "__main__":
+    main()
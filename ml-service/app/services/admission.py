@@ -0,0 +1,89 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import record_admission
+from app.services.inference_executor import inference_executor
+
+class OverloadedError(RuntimeError):
+    """Raised when a request is shed under overload and ADMISSION_SHED_MODE is reject"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Service overloaded ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Bounds the model work in flight and sheds new requests once queueing breaks the latency budget
+
+    Shed requests are served by the VADER/keyword fallbacks and marked
+    degraded, or rejected with 429 when ADMISSION_SHED_MODE is reject.
+    Requests already admitted always run to completion on the model.
+    """
+
+    def __init__(self):
+        self.in_flight = 0  # texts admitted to a model and not finished
+        self.shedding: Optional[str] = None  # reason of the last shed decision while overloaded
+
+    def overload_reason(self, count: int = 1) -> Optional[str]:
+        """Why a request of `count` texts should be shed now, or None to admit it"""
+        # One request always gets in, however large, so a big batch is never starved
+        if settings.ADMISSION_MAX_QUEUE and self.in_flight and self.in_flight + count > settings.ADMISSION_MAX_QUEUE:
+            return "queue_full"
+        budget = settings.ADMISSION_QUEUE_WAIT_BUDGET_MS / 1000.0
+        if budget and inference_executor.queue_wait() > budget:
+            return "queue_wait"
+        return None
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, settings.ADMISSION_RETRY_AFTER_SECONDS)
+
+    @contextmanager
+    def slot(self, component: str, count: int = 1) -> Iterator[bool]:
+        """Hold `count` texts' place on the model for a request; yields False if it should degrade
+
+        Raises OverloadedError instead of degrading when ADMISSION_SHED_MODE is reject.
+        """
+        reason = self.overload_reason(count)
+        if reason is not None:
+            self._shed(component, reason, count)
+            yield False
+            return
+
+        if self.shedding is not None:
+            logger.info(f"Admission control stopped shedding ({self.shedding})")
+            self.shedding = None
+        record_admission(component, "admitted", count=count)
+        self.in_flight += count
+        try:
+            yield True
+        finally:
+            self.in_flight -= count
+
+    def _shed(self, component: str, reason: str, count: int):
+        if self.shedding is None:
+            logger.warning(
+                f"Admission control shedding load ({reason}): {self.in_flight} texts in flight, "
+                f"queue wait {inference_executor.queue_wait() * 1000:.0f}ms"
+            )
+        self.shedding = reason
+
+        if settings.ADMISSION_SHED_MODE == "reject":
+            record_admission(component, "rejected", reason, count)
+            raise OverloadedError(reason, self.retry_after)
+        record_admission(component, "degraded", reason, count)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_queue": settings.ADMISSION_MAX_QUEUE,
+            "queue_wait_ms": inference_executor.queue_wait() * 1000,
+            "queue_wait_budget_ms": settings.ADMISSION_QUEUE_WAIT_BUDGET_MS,
+            "shed_mode": settings.ADMISSION_SHED_MODE,
+            "shedding": self.shedding
+        }
+
+# Shared by the classifier services
+admission = AdmissionController()
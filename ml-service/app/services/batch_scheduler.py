@@ -0,0 +1,157 @@
+import asyncio
+import time
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import observe_batch
+
+BatchFunction = Callable[[List[Any]], Awaitable[List[Any]]]
+
+class MicroBatchScheduler:
+    """Coalesce concurrent single-item requests into batched model calls"""
+
+    def __init__(
+        self,
+        name: str,
+        process_batch: BatchFunction,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        self.name = name
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size or settings.MICRO_BATCH_MAX_SIZE
+        self.max_wait = (
+            max_wait_ms if max_wait_ms is not None else settings.MICRO_BATCH_MAX_WAIT_MS
+        ) / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Statistics
+        self.batches_flushed = 0
+        self.items_processed = 0
+        self.batch_size_counts: Counter = Counter()
+        self.recent_batch_sizes: deque = deque(maxlen=100)
+        self.last_flush_time: Optional[float] = None
+
+    def _ensure_worker(self):
+        """Start the flush loop on the running event loop if needed"""
+        if self._worker is None or self._worker.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """Queue a single item and wait for its result"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[Any, asyncio.Future]]:
+        """Wait for the first item, then gather more until size or time limit is hit"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # Drain whatever is already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        """Flush loop: one batch in flight at a time, the next one fills meanwhile"""
+        while True:
+            batch = await self._collect_batch()
+
+            # Drop requests whose callers have gone away
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Run one batched call and resolve each caller's future"""
+        items = [item for item, _ in batch]
+        size = len(items)
+
+        self.batches_flushed += 1
+        self.items_processed += size
+        self.batch_size_counts[size] += 1
+        self.recent_batch_sizes.append(size)
+        self.last_flush_time = time.time()
+        observe_batch(self.name, "micro", size)
+
+        try:
+            results = await self.process_batch(items)
+            if len(results) != size:
+                raise RuntimeError(
+                    f"{self.name} batch returned {len(results)} results for {size} items"
+                )
+        except asyncio.CancelledError:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError(f"{self.name} scheduler is shut down"))
+            raise
+        except Exception as e:
+            logger.error(f"Micro-batch flush failed for {self.name}: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for the next flush"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and flushed batch size statistics"""
+        recent = list(self.recent_batch_sizes)
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self.queue_depth,
+            "batches_flushed": self.batches_flushed,
+            "items_processed": self.items_processed,
+            "average_batch_size": (
+                self.items_processed / self.batches_flushed if self.batches_flushed else 0.0
+            ),
+            "recent_average_batch_size": sum(recent) / len(recent) if recent else 0.0,
+            "batch_size_distribution": dict(sorted(self.batch_size_counts.items())),
+            "last_flush_time": self.last_flush_time
+        }
+
+    async def close(self):
+        """Stop the flush loop and fail any requests still queued"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError(f"{self.name} scheduler is shut down"))
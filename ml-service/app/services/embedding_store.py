@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import logger
+
+try:
+    import fcntl
+except ImportError:  # No cross-process locking on Windows
+    fcntl = None
+
+KEY_BYTES = 16
+
+def text_key(text: str) -> bytes:
+    """Fixed-size digest identifying the exact text that was embedded"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+class EmbeddingStore:
+    """Append-only on-disk cache of sentence embeddings keyed by text hash
+
+    Rows live in a raw float32 file that is memory-mapped for reads, and
+    `index.bin` holds one digest per row in the same order. A row only counts
+    once its digest is in the index, so workers sharing the directory see
+    each other's appends without any deserialization.
+    """
+
+    def __init__(self, directory: Path, model_name: str, max_rows: Optional[int] = None):
+        self.directory = Path(directory)
+        self.model_name = model_name
+        self.max_rows = max_rows or settings.EMBEDDING_CACHE_MAX_ROWS
+        self.dimension: Optional[int] = None
+
+        self._data_path = self.directory / "embeddings.f32"
+        self._index_path = self.directory / "index.bin"
+        self._meta_path = self.directory / "meta.json"
+        self._lock_path = self.directory / ".lock"
+
+        self._rows: Dict[bytes, int] = {}
+        self._matrix: Optional[np.memmap] = None
+        self._thread_lock = threading.Lock()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text())
+            if meta.get("model") == model_name:
+                self.dimension = meta["dimension"]
+                self._refresh()
+            else:
+                logger.warning(f"Embedding store at {self.directory} belongs to another model, resetting")
+                self._reset()
+
+    @classmethod
+    def for_model(cls, model_name: str) -> "EmbeddingStore":
+        """Store for one embedding model under MODEL_CACHE_DIR/embeddings"""
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name).strip("-")
+        return cls(Path(settings.MODEL_CACHE_DIR) / "embeddings" / safe_name, model_name)
+
+    @contextmanager
+    def _file_lock(self):
+        with self._thread_lock, open(self._lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _reset(self):
+        for path in (self._data_path, self._index_path, self._meta_path):
+            if path.exists():
+                path.unlink()
+        self.dimension = None
+        self._rows = {}
+        self._matrix = None
+
+    def _load_dimension(self) -> Optional[int]:
+        """Dimension from meta.json, written by whichever process stored the first rows"""
+        if self.dimension is None and self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text())
+            if meta.get("model") == self.model_name:
+                self.dimension = meta["dimension"]
+        return self.dimension
+
+    def _refresh(self):
+        """Pick up rows committed by this or another process since the last read"""
+        if not self._index_path.exists():
+            return
+        # Opened before any rows existed: another process has since created the store
+        if self._load_dimension() is None:
+            return
+
+        committed = self._index_path.stat().st_size // KEY_BYTES
+        known = len(self._rows)
+        if committed > known:
+            with open(self._index_path, "rb") as f:
+                f.seek(known * KEY_BYTES)
+                keys = f.read((committed - known) * KEY_BYTES)
+            for i in range(committed - known):
+                self._rows[keys[i * KEY_BYTES:(i + 1) * KEY_BYTES]] = known + i
+
+        if committed and (self._matrix is None or self._matrix.shape[0] < committed):
+            self._matrix = np.memmap(
+                self._data_path, dtype=np.float32, mode="r", shape=(committed, self.dimension)
+            )
+
+    def _append(self, keys: List[bytes], embeddings: np.ndarray):
+        with self._file_lock():
+            if self._load_dimension() is None:
+                self.dimension = int(embeddings.shape[1])
+                self._meta_path.write_text(json.dumps({"model": self.model_name, "dimension": self.dimension}))
+            self._refresh()
+
+            # Another worker may have stored some of these meanwhile
+            new = [i for i, key in enumerate(keys) if key not in self._rows]
+            new = new[:max(0, self.max_rows - len(self._rows))]
+            if not new:
+                return
+
+            committed = len(self._rows)
+            row_bytes = self.dimension * 4
+            with open(self._data_path, "ab") as f:
+                # Drop rows left behind by a write that never reached the index
+                f.truncate(committed * row_bytes)
+                f.write(np.ascontiguousarray(embeddings[new], dtype=np.float32).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._index_path, "ab") as f:
+                f.write(b"".join(keys[i] for i in new))
+
+            self._refresh()
+
+    def embed(self, texts: Sequence[str], encoder) -> np.ndarray:
+        """Embeddings for texts, encoding and storing only those not seen before (blocking)"""
+        keys = [text_key(text) for text in texts]
+
+        with self._thread_lock:
+            missing = [i for i, key in enumerate(keys) if key not in self._rows]
+            if missing:
+                self._refresh()
+                missing = [i for i, key in enumerate(keys) if key not in self._rows]
+
+        # Encode each distinct missing text once
+        pending: Dict[bytes, int] = {}
+        for i in missing:
+            pending.setdefault(keys[i], i)
+
+        encoded: Dict[bytes, np.ndarray] = {}
+        if pending:
+            vectors = np.asarray(
+                encoder.encode([texts[i] for i in pending.values()], show_progress_bar=False),
+                dtype=np.float32
+            )
+            encoded = dict(zip(pending.keys(), vectors))
+            if len(self._rows) < self.max_rows:
+                self._append(list(pending.keys()), vectors)
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        dimension = self.dimension or (next(iter(encoded.values())).shape[0] if encoded else 0)
+        embeddings = np.empty((len(texts), dimension), dtype=np.float32)
+        with self._thread_lock:
+            for i, key in enumerate(keys):
+                vector = encoded.get(key)
+                embeddings[i] = vector if vector is not None else self._matrix[self._rows[key]]
+        return embeddings
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "rows": len(self._rows),
+            "max_rows": self.max_rows,
+            "dimension": self.dimension,
+            "size_mb": len(self._rows) * (self.dimension or 0) * 4 / (1024**2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
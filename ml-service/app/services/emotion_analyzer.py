@@ -1,50 +1,85 @@
+import asyncio
 import time
-from typing import Dict, Any
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-import torch
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.metrics import observe_batch, record_fallback, stage_timer
+from app.services.admission import OverloadedError
+from app.services.batch_scheduler import MicroBatchScheduler
+from app.services.inference_executor import inference_executor
+from app.services.model_versions import ModelVersion, VersionedModel
+from app.services.result_cache import result_cache, normalize_text
+from app.services.keyword_emotions import KeywordEmotionMatcher
 
-class EmotionAnalyzer:
+EMOTIONS = ('joy', 'anger', 'sadness', 'surprise', 'fear', 'disgust')
+NEGATIVE_EMOTIONS = ('anger', 'sadness', 'fear', 'disgust')
+
+class EmotionAnalyzer(VersionedModel):
+    name = "emotion_analyzer"
+    component = "emotion"
+    
     def __init__(self):
-        self.model = None
-        self.tokenizer = None
-        self.pipeline = None
-        self.model_version = "1.0.0"
+        super().__init__()
+        self.batcher = MicroBatchScheduler("emotion", self._predict_items)
+        # Compiled once; serves all emotion traffic while the model is unavailable
+        self.keyword_matcher = KeywordEmotionMatcher.from_settings(EMOTIONS)
         
     async def load_model(self):
-        """Load the emotion analysis model"""
+        """Load the emotion analysis model off the event loop"""
         try:
-            logger.info(f"Loading emotion model: {settings.EMOTION_MODEL}")
-            
-            # Load tokenizer and model
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                settings.EMOTION_MODEL,
-                cache_dir=settings.MODEL_CACHE_DIR
-            )
-            
-            self.model = AutoModelForSequenceClassification.from_pretrained(
-                settings.EMOTION_MODEL,
-                cache_dir=settings.MODEL_CACHE_DIR
-            )
-            
-            # Create pipeline
-            self.pipeline = pipeline(
-                "text-classification",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=0 if torch.cuda.is_available() else -1,
-                return_all_scores=True
-            )
-            
+            source, version = self.startup_version()
+            logger.info(f"Loading emotion model: {source} (version {version})")
+            # Published in one assignment: requests switch from the fallback once it is set
+            self.swap(await asyncio.to_thread(self.build_version, source, version))
             logger.info("Emotion model loaded successfully")
             
         except Exception as e:
             logger.error(f"Failed to load emotion model: {e}")
             raise
     
+    @property
+    def configured_source(self) -> str:
+        return settings.EMOTION_MODEL
+    
+    def build_version(self, source: str, version: str) -> ModelVersion:
+        """Load a model into a new, not yet active version (blocking)"""
+        # Heavy imports are deferred until a model is actually loaded
+        import torch
+        from transformers import AutoTokenizer
+        from app.services.inference_backend import load_backend
+        from app.services.model_bundles import model_source
+        
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        tokenizer = AutoTokenizer.from_pretrained(
+            model_source(source),
+            cache_dir=settings.MODEL_CACHE_DIR
+        )
+        
+        # PyTorch or ONNX Runtime, per INFERENCE_BACKEND
+        backend = load_backend(source, tokenizer, device)
+        
+        # Resolve class index -> emotion category once: a (num_labels x 6) projection
+        id2label = backend.config.id2label
+        label_emotions = [
+            self._normalize_emotions([{'label': id2label[label_id], 'score': 1.0}])
+            for label_id in range(backend.num_labels)
+        ]
+        emotion_projection = torch.tensor([
+            [emotions[emotion] for emotion in EMOTIONS] for emotions in label_emotions
+        ])
+        
+        # Marks negative emotions for the max-negative long-text reducer
+        negative_columns = [EMOTIONS.index(emotion) for emotion in NEGATIVE_EMOTIONS]
+        negative_weights = emotion_projection[:, negative_columns].sum(dim=1)
+        
+        return ModelVersion(version, source, backend, tokenizer, emotion_projection, negative_weights)
+    
+    async def warm_up(self, texts: List[str]):
+        """Run a few forward passes so the first real requests do not pay for lazy initialisation"""
+        await self._predict_batch(texts)
+    
     def _normalize_emotions(self, results) -> Dict[str, float]:
         """Normalize emotion scores"""
         emotion_mapping = {
@@ -87,6 +122,82 @@ class EmotionAnalyzer:
         
         return emotions
     
+    def _predict_batch_sync(self, version: ModelVersion, texts: List[str]) -> List[Dict[str, float]]:
+        """Score texts in length-sorted, token-budgeted batches (blocking)"""
+        from app.services.long_text import predict_documents
+        
+        probabilities = predict_documents(
+            version.backend, version.tokenizer, texts, version.negative_weights, model_name="emotion"
+        )
+        
+        with stage_timer("emotion", "postprocess"):
+            vectors = (probabilities @ version.labels).tolist()
+            return [dict(zip(EMOTIONS, vector)) for vector in vectors]
+    
+    async def _predict_batch(
+        self, texts: List[str], version: Optional[ModelVersion] = None
+    ) -> List[Dict[str, float]]:
+        """Run one forward pass on the inference executor"""
+        return await inference_executor.run(self._predict_batch_sync, version or self.active, texts)
+    
+    def predict_labels(self, version: ModelVersion, texts: List[str]) -> List[str]:
+        """Dominant emotion per text, for validating a candidate version (blocking)"""
+        return [self._get_dominant_emotion(emotions) for emotions in self._predict_batch_sync(version, texts)]
+    
+    def _cache_namespace(self, version: Optional[ModelVersion]) -> str:
+        backend_name = version.backend.name if version is not None else settings.INFERENCE_BACKEND
+        return f"emotion:{settings.EMOTION_MODEL}:{backend_name}"
+    
+    @property
+    def cache_namespace(self) -> str:
+        return self._cache_namespace(self.active)
+    
+    async def _score(self, texts: List[str], version: ModelVersion) -> List[Dict[str, float]]:
+        """Score texts on a leased version in token-budgeted batches, serving repeats from the cache"""
+        observe_batch("emotion", "request", len(texts))
+        namespace = self._cache_namespace(version)
+        predictions = await result_cache.get_many(namespace, version.version, texts)
+        
+        # Group misses by normalized text so duplicates run through the model once
+        pending: Dict[str, List[int]] = {}
+        with stage_timer("emotion", "preprocess"):
+            for i, prediction in enumerate(predictions):
+                if prediction is None:
+                    pending.setdefault(normalize_text(texts[i]), []).append(i)
+        
+        if pending:
+            miss_texts = [texts[indices[0]] for indices in pending.values()]
+            if len(miss_texts) == 1 and settings.MICRO_BATCH_ENABLED:
+                # Coalesce single texts with concurrent requests into one forward pass
+                miss_results = [await self.batcher.submit((version, miss_texts[0]))]
+            else:
+                # The batching stage splits these under the token budget
+                miss_results = await self._predict_batch(miss_texts, version)
+            
+            await result_cache.set_many(
+                namespace, version.version, miss_texts, miss_results
+            )
+            for indices, result in zip(pending.values(), miss_results):
+                for i in indices:
+                    predictions[i] = result
+        
+        return predictions
+    
+    async def get_emotions(self, texts: List[str]) -> tuple[List[Dict[str, float]], str, bool]:
+        """Emotion scores for a list of texts, the model version that produced them and whether it was a fallback"""
+        try:
+            with self.serving(len(texts)) as (version, reason):
+                if version is not None:
+                    return await self._score(texts, version), version.version, False
+        except OverloadedError:
+            raise
+        except Exception as e:
+            logger.error(f"Batch emotion analysis failed: {e}")
+            reason = "error"
+        
+        record_fallback("emotion", reason, len(texts))
+        return self.keyword_matcher.match_batch(texts), f"{self.model_version}-fallback", True
+    
     def _get_dominant_emotion(self, emotions: Dict[str, float]) -> str:
         """Get the dominant emotion"""
         return max(emotions.items(), key=lambda x: x[1])[0]
@@ -96,13 +207,17 @@ class EmotionAnalyzer:
         start_time = time.time()
         
         try:
-            if self.pipeline:
-                # Use transformer model
-                results = self.pipeline(text)[0]  # Get first (and only) result
-                emotions = self._normalize_emotions(results)
-            else:
+            # Use transformer model, on the version active when the request arrived
+            with self.serving() as (version, reason):
+                if version is not None:
+                    emotions = (await self._score([text], version))[0]
+                    model_version = version.version
+            
+            if version is None:
                 # Fallback: simple rule-based emotion detection
+                record_fallback("emotion", reason)
                 emotions = self._simple_emotion_detection(text)
+                model_version = self.model_version
             
             dominant_emotion = self._get_dominant_emotion(emotions)
             
@@ -111,12 +226,16 @@ class EmotionAnalyzer:
                 "emotions": emotions,
                 "dominant_emotion": dominant_emotion,
                 "processing_time": time.time() - start_time,
-                "model_version": self.model_version,
+                "model_version": model_version,
+                "degraded": version is None,
                 "timestamp": datetime.utcnow()
             }
-            
+        
+        except OverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Emotion analysis failed: {e}")
+            record_fallback("emotion", "error")
             # Fallback to simple detection
             emotions = self._simple_emotion_detection(text)
             dominant_emotion = self._get_dominant_emotion(emotions)
@@ -127,32 +246,30 @@ class EmotionAnalyzer:
                 "dominant_emotion": dominant_emotion,
                 "processing_time": time.time() - start_time,
                 "model_version": f"{self.model_version}-fallback",
+                "degraded": True,
                 "timestamp": datetime.utcnow()
             }
     
-    def _simple_emotion_detection(self, text: str) -> Dict[str, float]:
-        """Simple rule-based emotion detection as fallback"""
-        text_lower = text.lower()
-        
-        # Emotion keywords
-        joy_words = ['happy', 'joy', 'excited', 'love', 'amazing', 'great', 'wonderful', 'fantastic']
-        anger_words = ['angry', 'mad', 'furious', 'hate', 'terrible', 'awful', 'worst']
-        sadness_words = ['sad', 'depressed', 'disappointed', 'unhappy', 'crying', 'heartbroken']
-        surprise_words = ['surprised', 'shocked', 'amazed', 'unexpected', 'wow', 'incredible']
-        fear_words = ['scared', 'afraid', 'terrified', 'worried', 'anxious', 'nervous']
-        disgust_words = ['disgusting', 'gross', 'revolting', 'sick', 'nasty', 'repulsive']
-        
-        emotions = {
-            'joy': sum(1 for word in joy_words if word in text_lower) / len(joy_words),
-            'anger': sum(1 for word in anger_words if word in text_lower) / len(anger_words),
-            'sadness': sum(1 for word in sadness_words if word in text_lower) / len(sadness_words),
-            'surprise': sum(1 for word in surprise_words if word in text_lower) / len(surprise_words),
-            'fear': sum(1 for word in fear_words if word in text_lower) / len(fear_words),
-            'disgust': sum(1 for word in disgust_words if word in text_lower) / len(disgust_words)
-        }
+    async def analyze_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Analyze emotions in multiple texts"""
+        start_time = time.time()
         
-        # Normalize scores
-        max_score = max(emotions.values()) if max(emotions.values()) > 0 else 1
-        emotions = {k: v / max_score for k, v in emotions.items()}
+        emotion_scores, model_version, degraded = await self.get_emotions(texts)
+        processing_time = (time.time() - start_time) / len(texts) if texts else 0.0
         
-        return emotions
+        return [
+            {
+                "text": text,
+                "emotions": emotions,
+                "dominant_emotion": self._get_dominant_emotion(emotions),
+                "processing_time": processing_time,
+                "model_version": model_version,
+                "degraded": degraded,
+                "timestamp": datetime.utcnow()
+            }
+            for text, emotions in zip(texts, emotion_scores)
+        ]
+    
+    def _simple_emotion_detection(self, text: str) -> Dict[str, float]:
+        """Simple rule-based emotion detection as fallback"""
+        return self.keyword_matcher.match(text)
@@ -0,0 +1,131 @@
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from sklearn.decomposition import MiniBatchNMF
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from sklearn.utils import murmurhash3_32
+
+from app.core.config import settings
+
+class HashingTopicEngine:
+    """CPU-only topic extraction in fixed memory: hashed TF-IDF features + mini-batch NMF
+
+    Texts are vectorized and fitted chunk by chunk, so no vocabulary is kept
+    and memory does not grow with corpus size. Keywords are recovered from a
+    bounded map holding the dominant term of each hash bucket.
+    """
+
+    def __init__(
+        self,
+        num_topics: int,
+        n_features: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        epochs: Optional[int] = None
+    ):
+        self.num_topics = num_topics
+        self.n_features = n_features or settings.HASHING_TOPICS_FEATURES
+        self.chunk_size = chunk_size or settings.HASHING_TOPICS_CHUNK_SIZE
+        self.epochs = epochs or settings.HASHING_TOPICS_EPOCHS
+
+        self.vectorizer = HashingVectorizer(
+            n_features=self.n_features,
+            stop_words='english',
+            alternate_sign=False,
+            norm=None
+        )
+        self._analyzer = self.vectorizer.build_analyzer()
+        self.nmf: Optional[MiniBatchNMF] = None
+
+        # Document frequency per hash bucket, for an IDF estimate that improves as chunks arrive
+        self._document_frequency = np.zeros(self.n_features)
+        self._documents_seen = 0
+
+        # Hash bucket -> dominant term and its remaining weight (Misra-Gries per bucket)
+        self._terms: Dict[int, str] = {}
+        self._term_weights = np.zeros(self.n_features)
+
+    def _column(self, term: str) -> int:
+        """Hash bucket of a term, matching HashingVectorizer"""
+        h = murmurhash3_32(term, seed=0)
+        if h == -2147483648:
+            return (2147483647 - (self.n_features - 1)) % self.n_features
+        return abs(h) % self.n_features
+
+    def _track_terms(self, texts: Sequence[str]):
+        counts = Counter(term for text in texts for term in self._analyzer(text))
+        for term, count in counts.items():
+            column = self._column(term)
+            current = self._terms.get(column)
+            if current is None or current == term:
+                self._terms[column] = term
+                self._term_weights[column] += count
+            elif count > self._term_weights[column]:
+                self._terms[column] = term
+                self._term_weights[column] = count - self._term_weights[column]
+            else:
+                self._term_weights[column] -= count
+
+    def _features(self, texts: Sequence[str], update: bool = False):
+        """TF-IDF rows for a chunk, weighted by the document frequencies seen so far"""
+        counts = self.vectorizer.transform(texts)
+        if update:
+            self._document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+            self._documents_seen += counts.shape[0]
+
+        idf = np.log((1 + self._documents_seen) / (1 + self._document_frequency)) + 1
+        return normalize(counts.multiply(idf).tocsr())
+
+    def _chunks(self, texts: Sequence[str]) -> Iterator[Sequence[str]]:
+        for start in range(0, len(texts), self.chunk_size):
+            yield texts[start:start + self.chunk_size]
+
+    def fit(self, texts: Sequence[str]) -> "HashingTopicEngine":
+        """Fit topics over the corpus in chunks (blocking)"""
+        self.nmf = MiniBatchNMF(
+            n_components=max(1, min(self.num_topics, len(texts))),
+            init='nndsvda',
+            batch_size=self.chunk_size,
+            random_state=0
+        )
+
+        for epoch in range(self.epochs):
+            for chunk in self._chunks(texts):
+                features = self._features(chunk, update=epoch == 0)
+                if epoch == 0:
+                    self._track_terms(chunk)
+                self.nmf.partial_fit(features)
+
+        return self
+
+    def topics(self, texts: Sequence[str], top_n: int = 10) -> List[Dict[str, Any]]:
+        """Topics with keywords and document counts, largest first (blocking)"""
+        components = self.nmf.components_
+        sizes = np.zeros(components.shape[0], dtype=np.int64)
+
+        # Each document counts towards its strongest topic
+        for chunk in self._chunks(texts):
+            weights = self.nmf.transform(self._features(chunk))
+            assigned = weights.argmax(axis=1)[weights.max(axis=1) > 0]
+            sizes += np.bincount(assigned, minlength=components.shape[0])
+
+        topics = []
+        for topic_id, component in enumerate(components):
+            candidates = np.argsort(component)[::-1][:top_n * 3]
+            keywords = [
+                self._terms[column] for column in candidates
+                if component[column] > 0 and column in self._terms
+            ][:top_n]
+            if not keywords or not sizes[topic_id]:
+                continue
+
+            topics.append({
+                "id": topic_id,
+                "name": f"Topic {topic_id}: {keywords[0]}",
+                "keywords": keywords,
+                "size": int(sizes[topic_id])
+            })
+
+        topics.sort(key=lambda topic: topic["size"], reverse=True)
+        return topics
@@ -0,0 +1,300 @@
+import hashlib
+import inspect
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import torch
+from transformers import AutoConfig, AutoModelForSequenceClassification
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import record_fallback
+from app.services.inference_executor import inference_executor
+from app.services.model_bundles import (
+    MANIFEST_FILE, WEIGHTS_FILE, find_bundle, load_bundle_model, model_source, safe_model_name
+)
+from app.services.token_batching import tokenize, pad_batch
+
+try:
+    import onnxruntime as ort
+except ImportError:  # ONNX Runtime backends are optional
+    ort = None
+
+BACKENDS = ("pytorch", "onnx", "onnx-int8")
+
+# Used for the parity check when PARITY_SAMPLE_PATH is not set
+PARITY_SAMPLE_TEXTS = [
+    "I love this product! It's amazing and works perfectly.",
+    "This is terrible quality, it broke after two days.",
+    "It's okay, nothing special.",
+    "Fast shipping and the packaging was great.",
+    "Customer service never answered my emails.",
+    "The battery life is excellent but the screen scratches easily.",
+    "Worst purchase I have made this year.",
+    "Arrived on time. Does what it says.",
+    "I'm so happy with how this turned out, highly recommend!",
+    "Not sure how I feel about the new update.",
+    "The app keeps crashing whenever I open the camera.",
+    "Great value for the price.",
+    "I was worried it would be too small, but it fits well.",
+    "Absolutely disgusting, the food was cold and stale.",
+    "Meh. Expected more after all the hype.",
+    "Thank you for the quick refund, much appreciated."
+]
+
+class TorchBackend:
+    """Eager PyTorch forward pass"""
+
+    name = "pytorch"
+
+    def __init__(self, model, device: Optional[torch.device] = None):
+        self.model = model
+        self.config = model.config
+        self.device = device
+        # Weights still backed by a bundle's file mapping (shared across worker processes)
+        self.memory_mapped = getattr(model, "memory_mapped", False) and (device is None or device.type == "cpu")
+
+    @property
+    def num_labels(self) -> int:
+        return self.config.num_labels
+
+    def __call__(self, batch: Dict[str, torch.Tensor]) -> torch.Tensor:
+        if self.device is not None:
+            batch = {name: tensor.to(self.device) for name, tensor in batch.items()}
+        with torch.inference_mode():
+            return self.model(**batch).logits.float().cpu()
+
+    def weight_bytes(self) -> int:
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+class OnnxBackend:
+    """ONNX Runtime CPU forward pass over an exported (optionally quantized) model"""
+
+    def __init__(self, model_path: Path, config, quantized: bool = False):
+        self.name = "onnx-int8" if quantized else "onnx"
+        self.model = None
+        self.model_path = Path(model_path)
+        self.config = config
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = inference_executor.torch_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(self.model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+
+    @property
+    def num_labels(self) -> int:
+        return self.config.num_labels
+
+    def __call__(self, batch: Dict[str, torch.Tensor]) -> torch.Tensor:
+        logits = self.session.run(
+            ["logits"],
+            {
+                "input_ids": batch["input_ids"].numpy(),
+                "attention_mask": batch["attention_mask"].numpy()
+            }
+        )[0]
+        return torch.from_numpy(logits).float()
+
+    def weight_bytes(self) -> int:
+        return self.model_path.stat().st_size
+
+def _weight_files(model_name: str) -> List[Path]:
+    """The files holding the weights an export would be made from"""
+    bundle = find_bundle(model_name)
+    if bundle is not None:
+        return [bundle / MANIFEST_FILE, bundle / WEIGHTS_FILE]
+
+    local = Path(model_name)
+    if not local.is_dir():
+        # Hub id: the snapshot the cache currently points at
+        hub_dir = Path(settings.MODEL_CACHE_DIR) / ("models--" + model_name.replace("/", "--"))
+        local = hub_dir / "refs" / "main"
+        return [local] if local.exists() else []
+    return sorted(path for path in local.iterdir() if path.suffix in (".safetensors", ".bin", ".json"))
+
+def weights_fingerprint(model_name: str) -> str:
+    """Short hash identifying the weights an export was made from
+
+    Rewriting a bundle or pulling a new hub revision changes it, so the
+    model is exported and parity-checked again instead of serving a stale file.
+    """
+    digest = hashlib.sha256(model_name.encode("utf-8"))
+    for path in _weight_files(model_name):
+        stat = path.stat()
+        if stat.st_size < 1 << 20:
+            # Manifests, configs and refs are small enough to hash outright
+            digest.update(path.name.encode("utf-8") + path.read_bytes())
+        else:
+            digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+def _model_dir(model_name: str) -> Path:
+    return Path(settings.MODEL_CACHE_DIR) / "onnx" / safe_model_name(model_name) / weights_fingerprint(model_name)
+
+def _prune_exports(model_dir: Path):
+    """Remove exports made from weights that have since been replaced"""
+    for stale in model_dir.parent.iterdir():
+        if stale.is_dir() and stale != model_dir:
+            shutil.rmtree(stale, ignore_errors=True)
+
+def onnx_model_path(model_name: str, quantized: bool = False) -> Path:
+    """Location of the exported model under MODEL_CACHE_DIR"""
+    return _model_dir(model_name) / ("model-int8.onnx" if quantized else "model.onnx")
+
+def export_onnx(model, path: Path):
+    """Export a sequence classifier with dynamic batch and sequence axes"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    model.eval()
+
+    dummy = {
+        "input_ids": torch.ones((2, 8), dtype=torch.long),
+        "attention_mask": torch.ones((2, 8), dtype=torch.long)
+    }
+    kwargs: Dict[str, Any] = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False
+
+    torch.onnx.export(
+        model,
+        (dummy["input_ids"], dummy["attention_mask"]),
+        str(path),
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"}
+        },
+        opset_version=14,
+        **kwargs
+    )
+
+def quantize_onnx(source: Path, target: Path):
+    """Dynamic int8 quantization of the exported weights"""
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(str(source), str(target), weight_type=QuantType.QInt8)
+
+def _parity_texts() -> List[str]:
+    if settings.PARITY_SAMPLE_PATH:
+        with open(settings.PARITY_SAMPLE_PATH, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+        if texts:
+            return texts
+    return PARITY_SAMPLE_TEXTS
+
+def check_parity(reference, candidate, tokenizer, texts: List[str]) -> Dict[str, Any]:
+    """Compare predicted labels of a candidate backend against the PyTorch model"""
+    input_ids = tokenize(tokenizer, texts)
+    agree = 0
+    max_difference = 0.0
+
+    for start in range(0, len(input_ids), settings.BATCH_SIZE):
+        batch = pad_batch(input_ids[start:start + settings.BATCH_SIZE], tokenizer.pad_token_id)
+        expected = torch.softmax(reference(batch), dim=-1)
+        actual = torch.softmax(candidate(batch), dim=-1)
+        agree += int((expected.argmax(dim=-1) == actual.argmax(dim=-1)).sum())
+        max_difference = max(max_difference, float((expected - actual).abs().max()))
+
+    return {
+        "backend": candidate.name,
+        "samples": len(texts),
+        "label_agreement": agree / len(texts) if texts else 1.0,
+        "max_probability_difference": max_difference,
+        "checked_at": time.time()
+    }
+
+def _load_torch_model(model_name: str):
+    bundle = find_bundle(model_name)
+    if bundle is not None:
+        try:
+            return load_bundle_model(bundle)
+        except Exception as e:
+            logger.error(f"Failed to map bundle {bundle} for {model_name}, loading from the hub cache: {e}")
+            record_fallback("model_bundle", "load_failed")
+
+    return AutoModelForSequenceClassification.from_pretrained(
+        model_name,
+        cache_dir=settings.MODEL_CACHE_DIR
+    )
+
+def _load_onnx_backend(model_name: str, tokenizer, quantized: bool):
+    """Load a cached ONNX export, exporting and parity-checking it on first use
+
+    Exports are kept per weights fingerprint, so a rewritten bundle or new
+    hub revision is exported again. Returns None if the export failed its parity check.
+    """
+    path = onnx_model_path(model_name, quantized)
+    parity_path = path.with_suffix(".parity.json")
+    texts = _parity_texts()
+    sample = hashlib.sha256("\n".join(texts).encode("utf-8")).hexdigest()[:16]
+
+    parity = json.loads(parity_path.read_text()) if parity_path.exists() else {}
+    # Check again whenever the export or the parity sample changed
+    if not path.exists() or parity.get("sample") != sample:
+        model = _load_torch_model(model_name)
+        # On a cold hub cache the load just downloaded the weights, which changes their fingerprint
+        path = onnx_model_path(model_name, quantized)
+        parity_path = path.with_suffix(".parity.json")
+
+        fp32_path = onnx_model_path(model_name, quantized=False)
+        if not fp32_path.exists():
+            logger.info(f"Exporting {model_name} to ONNX at {fp32_path}")
+            export_onnx(model, fp32_path)
+        if quantized and not path.exists():
+            quantize_onnx(fp32_path, path)
+
+        candidate = OnnxBackend(path, model.config, quantized=quantized)
+        parity = check_parity(TorchBackend(model), candidate, tokenizer, texts)
+        parity["passed"] = parity["label_agreement"] >= settings.PARITY_MIN_AGREEMENT
+        parity["sample"] = sample
+        parity_path.write_text(json.dumps(parity, indent=2))
+        _prune_exports(path.parent)
+
+        logger.info(
+            f"ONNX parity for {model_name} ({candidate.name}): "
+            f"{parity['label_agreement']:.1%} label agreement on {parity['samples']} samples"
+        )
+
+    if not parity.get("passed"):
+        logger.warning(
+            f"ONNX export of {model_name} failed its parity check "
+            f"({parity.get('label_agreement', 0):.1%} agreement), using PyTorch"
+        )
+        return None
+
+    # The torch weights are not needed once the export has been validated
+    config = AutoConfig.from_pretrained(model_source(model_name), cache_dir=settings.MODEL_CACHE_DIR)
+    return OnnxBackend(path, config, quantized=quantized)
+
+def load_backend(model_name: str, tokenizer, device: Optional[torch.device] = None):
+    """Load a model with the configured INFERENCE_BACKEND, falling back to PyTorch"""
+    backend_name = settings.INFERENCE_BACKEND
+
+    if backend_name not in BACKENDS:
+        logger.warning(f"Unknown inference backend {backend_name}, using pytorch")
+    elif backend_name != "pytorch":
+        if ort is None:
+            logger.warning("onnxruntime is not installed, using the pytorch backend")
+        elif device is not None and device.type != "cpu":
+            logger.info("ONNX Runtime backends are CPU-only, using pytorch on GPU")
+        else:
+            try:
+                backend = _load_onnx_backend(model_name, tokenizer, backend_name == "onnx-int8")
+                if backend is not None:
+                    return backend
+            except Exception as e:
+                logger.error(f"Failed to load ONNX backend for {model_name}, using pytorch: {e}")
+                record_fallback("onnx_backend", "load_failed")
+
+    model = _load_torch_model(model_name)
+    model.to(device or torch.device("cpu"))
+    model.eval()
+    return TorchBackend(model, device)
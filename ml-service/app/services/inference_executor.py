@@ -0,0 +1,168 @@
+import asyncio
+import functools
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import observe_queue_wait
+
+class InferenceExecutor:
+    """Dedicated thread pool that keeps blocking model calls off the event loop"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        torch_threads: Optional[int] = None,
+        name: str = "inference",
+        owns_torch: bool = True
+    ):
+        self.name = name
+        self.owns_torch = owns_torch  # only one executor sizes torch's process-wide thread pool
+        self.max_workers = max(1, max_workers or settings.INFERENCE_WORKERS or settings.NUM_WORKERS)
+        self.torch_threads = torch_threads or settings.INFERENCE_TORCH_THREADS or max(
+            1, (os.cpu_count() or 1) // self.max_workers
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self.pending = 0
+        self.completed = 0
+        # Submit times of calls still waiting for a thread, and recent (start time, wait) samples
+        self._waiting: Dict[int, float] = {}
+        self._recent_waits: deque = deque(maxlen=1000)
+        self._ids = itertools.count()
+        self._waits_lock = threading.Lock()
+
+    def _configure_torch(self):
+        """Size torch's intra-op parallelism for the whole process, once, before the pool runs
+
+        torch.set_num_threads is process-wide rather than per thread, so it is
+        set here to each executor thread's share of the cores (torch_threads)
+        instead of from every pool thread's initializer.
+        """
+        if not self.owns_torch:
+            return
+        try:
+            import torch
+            torch.set_num_threads(self.torch_threads)
+        except ImportError:
+            pass
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the pool on first use"""
+        if self._closed:
+            raise RuntimeError(f"{self.name.capitalize()} executor is shut down")
+
+        with self._lock:
+            if self._executor is None:
+                logger.info(
+                    f"Starting {self.name} executor: {self.max_workers} workers, "
+                    f"{self.torch_threads} torch threads each"
+                )
+                self._configure_torch()
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.name
+                )
+            return self._executor
+
+    def _on_done(self, _future: asyncio.Future):
+        self.pending -= 1
+        self.completed += 1
+
+    def _started(self, call_id: int, fn: Callable[[], Any]) -> Any:
+        """Runs on the pool thread: record how long the call queued, then make it"""
+        started = time.perf_counter()
+        with self._waits_lock:
+            submitted = self._waiting.pop(call_id, started)
+            self._recent_waits.append((started, started - submitted))
+        observe_queue_wait(started - submitted, self.name)
+        return fn()
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable on the pool and await its result"""
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+
+        call_id = next(self._ids)
+        with self._waits_lock:
+            self._waiting[call_id] = time.perf_counter()
+        future = loop.run_in_executor(
+            executor, self._started, call_id, functools.partial(fn, *args, **kwargs)
+        )
+        self.pending += 1
+        future.add_done_callback(self._on_done)
+        try:
+            return await future
+        finally:
+            # Cancelled before a thread picked it up
+            with self._waits_lock:
+                self._waiting.pop(call_id, None)
+
+    def queue_wait(self, window: Optional[float] = None) -> float:
+        """Current queueing delay in seconds, the signal admission control sheds load on
+
+        The larger of how long the oldest waiting call has queued so far and
+        the 90th percentile wait of calls started within the last `window`
+        seconds (ADMISSION_WAIT_WINDOW_SECONDS).
+        """
+        window = settings.ADMISSION_WAIT_WINDOW_SECONDS if window is None else window
+        now = time.perf_counter()
+        with self._waits_lock:
+            oldest = min(self._waiting.values(), default=now)
+            recent = sorted(wait for started, wait in self._recent_waits if now - started <= window)
+        recent_p90 = recent[min(len(recent) - 1, int(0.9 * len(recent)))] if recent else 0.0
+        return max(now - oldest, recent_p90)
+
+    def reset(self, max_workers: Optional[int] = None, torch_threads: Optional[int] = None):
+        """Start afresh in a forked worker process, optionally resized
+
+        The parent's pool threads do not exist in the child, so its executor
+        (and any lock a parent thread held at fork time) is discarded.
+        """
+        self.max_workers = max(1, max_workers or self.max_workers)
+        self.torch_threads = torch_threads or self.torch_threads
+        self._executor = None
+        self._lock = threading.Lock()
+        self._waits_lock = threading.Lock()
+        self._closed = False
+        self.pending = 0
+        self.completed = 0
+        self._waiting = {}
+        self._recent_waits.clear()
+        self._configure_torch()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool size and queue statistics"""
+        return {
+            "max_workers": self.max_workers,
+            "torch_threads": self.torch_threads,
+            "pending": self.pending,
+            "queue_depth": max(0, self.pending - self.max_workers),
+            "completed": self.completed,
+            "queue_wait_ms": self.queue_wait() * 1000,
+            "running": self._executor is not None and not self._closed
+        }
+
+    async def shutdown(self):
+        """Cancel queued work and wait for in-flight forward passes to finish"""
+        self._closed = True
+        with self._lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+            logger.info(f"{self.name.capitalize()} executor shut down")
+
+# Shared executor used by all model services
+inference_executor = InferenceExecutor()
+
+# Topic fits, embedding and assignment, which can hold a thread for minutes,
+# run here so they never queue sentiment and emotion passes behind them
+topic_executor = InferenceExecutor(settings.TOPIC_EXECUTOR_WORKERS, name="topics", owns_torch=False)
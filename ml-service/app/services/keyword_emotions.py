@@ -0,0 +1,90 @@
+import json
+import re
+from typing import Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.core.logging import logger
+
+# Default keyword lexicon for the rule-based emotion fallback
+DEFAULT_LEXICON: Dict[str, List[str]] = {
+    'joy': ['happy', 'joy', 'excited', 'love', 'amazing', 'great', 'wonderful', 'fantastic'],
+    'anger': ['angry', 'mad', 'furious', 'hate', 'terrible', 'awful', 'worst'],
+    'sadness': ['sad', 'depressed', 'disappointed', 'unhappy', 'crying', 'heartbroken'],
+    'surprise': ['surprised', 'shocked', 'amazed', 'unexpected', 'wow', 'incredible'],
+    'fear': ['scared', 'afraid', 'terrified', 'worried', 'anxious', 'nervous'],
+    'disgust': ['disgusting', 'gross', 'revolting', 'sick', 'nasty', 'repulsive']
+}
+
+def load_lexicon(path: str) -> Dict[str, List[str]]:
+    """Load a lexicon from a JSON file of {"emotion": ["keyword", ...]}"""
+    with open(path, encoding="utf-8") as f:
+        lexicon = json.load(f)
+
+    if not isinstance(lexicon, dict) or not all(
+        isinstance(words, list) and all(isinstance(word, str) for word in words)
+        for words in lexicon.values()
+    ):
+        raise ValueError(f"Emotion lexicon {path} must map emotion names to lists of keywords")
+    return lexicon
+
+class KeywordEmotionMatcher:
+    """Scores texts against an emotion keyword lexicon in a single regex pass
+
+    All keywords are compiled into one word-boundary alternation, so each text
+    is scanned once and keywords no longer match inside other words.
+    """
+
+    def __init__(self, lexicon: Dict[str, List[str]], emotions: Optional[Sequence[str]] = None):
+        self.emotions = list(emotions or lexicon.keys())
+        self._index = {emotion: i for i, emotion in enumerate(self.emotions)}
+
+        # keyword -> indices of the emotions it counts towards
+        self._keywords: Dict[str, List[int]] = {}
+        self._sizes = [0] * len(self.emotions)
+        for emotion, words in lexicon.items():
+            if emotion not in self._index:
+                logger.warning(f"Ignoring keywords for unknown emotion: {emotion}")
+                continue
+            keywords = {word.strip().lower() for word in words if word.strip()}
+            self._sizes[self._index[emotion]] = len(keywords)
+            for keyword in keywords:
+                self._keywords.setdefault(keyword, []).append(self._index[emotion])
+
+        # Longest first so multi-word phrases win over their prefixes
+        alternation = "|".join(
+            re.escape(keyword) for keyword in sorted(self._keywords, key=len, reverse=True)
+        )
+        self._pattern = re.compile(rf"\b(?:{alternation})\b") if alternation else None
+
+    @classmethod
+    def from_settings(cls, emotions: Optional[Sequence[str]] = None) -> "KeywordEmotionMatcher":
+        """Build from EMOTION_LEXICON_PATH, falling back to the default lexicon"""
+        lexicon = DEFAULT_LEXICON
+        if settings.EMOTION_LEXICON_PATH:
+            try:
+                lexicon = load_lexicon(settings.EMOTION_LEXICON_PATH)
+                logger.info(f"Loaded emotion lexicon from {settings.EMOTION_LEXICON_PATH}")
+            except Exception as e:
+                logger.error(f"Failed to load emotion lexicon, using the default: {e}")
+        return cls(lexicon, emotions)
+
+    def match(self, text: str) -> Dict[str, float]:
+        """Score one text; each emotion is the share of its keywords present, scaled to the top emotion"""
+        counts = [0] * len(self.emotions)
+        if self._pattern is not None:
+            for keyword in set(self._pattern.findall(text.lower())):
+                for i in self._keywords[keyword]:
+                    counts[i] += 1
+
+        scores = [count / size if size else 0.0 for count, size in zip(counts, self._sizes)]
+        max_score = max(scores, default=0.0) or 1.0
+        return {emotion: score / max_score for emotion, score in zip(self.emotions, scores)}
+
+    def match_batch(self, texts: Sequence[str]) -> List[Dict[str, float]]:
+        """Score a list of texts"""
+        match = self.match
+        return [match(text) for text in texts]
+
+    @property
+    def keyword_count(self) -> int:
+        return len(self._keywords)
@@ -0,0 +1,99 @@
+from typing import List, Optional, Sequence, Tuple
+
+import torch
+
+from app.core.config import settings
+from app.core.metrics import stage_timer
+from app.services.token_batching import tokenize, predict_probabilities
+
+REDUCERS = ("mean", "length_weighted", "max_negative")
+
+def build_windows(tokenizer, texts: Sequence[str]) -> Tuple[List[List[int]], List[int]]:
+    """Split each text into overlapping token windows that fit the model
+
+    Returns the windows (with special tokens) and, for each window, the index
+    of the text it came from. Texts that fit produce exactly one window.
+    """
+    max_length = min(settings.MAX_LENGTH, tokenizer.model_max_length)
+    window_size = max_length - tokenizer.num_special_tokens_to_add()
+    step = max(1, window_size - settings.LONG_TEXT_WINDOW_OVERLAP)
+
+    encoded = tokenizer(list(texts), add_special_tokens=False, truncation=False, verbose=False)
+
+    windows: List[List[int]] = []
+    owners: List[int] = []
+    for owner, ids in enumerate(encoded["input_ids"]):
+        starts = range(0, max(1, len(ids) - settings.LONG_TEXT_WINDOW_OVERLAP), step)
+        for start in list(starts)[:settings.LONG_TEXT_MAX_WINDOWS]:
+            window = ids[start:start + window_size]
+            windows.append(tokenizer.build_inputs_with_special_tokens(window))
+            owners.append(owner)
+
+    return windows, owners
+
+def reduce_windows(
+    probabilities: torch.Tensor,
+    owners: Sequence[int],
+    lengths: Sequence[int],
+    num_documents: int,
+    reducer: str = "mean",
+    negative_weights: Optional[torch.Tensor] = None
+) -> torch.Tensor:
+    """Combine per-window class probabilities into one row per document"""
+    owner_index = torch.tensor(owners, dtype=torch.long)
+
+    if reducer == "max_negative" and negative_weights is not None:
+        # Take the window with the most negative signal for each document
+        negative = probabilities @ negative_weights
+        best = torch.full((num_documents,), float("-inf")).scatter_reduce(
+            0, owner_index, negative, reduce="amax"
+        )
+        candidates = torch.nonzero(negative == best[owner_index]).squeeze(1)
+        chosen = torch.empty(num_documents, dtype=torch.long)
+        chosen[owner_index[candidates]] = candidates
+        return probabilities[chosen]
+
+    if reducer == "length_weighted":
+        weights = torch.tensor(lengths, dtype=torch.float32)
+    else:
+        weights = torch.ones(len(owners), dtype=torch.float32)
+
+    sums = torch.zeros((num_documents, probabilities.shape[1])).index_add_(
+        0, owner_index, probabilities * weights.unsqueeze(1)
+    )
+    totals = torch.zeros(num_documents).index_add_(0, owner_index, weights)
+    return sums / totals.unsqueeze(1)
+
+def predict_documents(
+    backend,
+    tokenizer,
+    texts: Sequence[str],
+    negative_weights: Optional[torch.Tensor] = None,
+    reducer: Optional[str] = None,
+    model_name: str = "model"
+) -> torch.Tensor:
+    """Class probabilities per text, scoring long texts over sliding windows
+
+    Windows from all texts are packed into the same token-budgeted batches,
+    so several long documents share forward passes.
+    """
+    with stage_timer(model_name, "tokenize"):
+        if settings.LONG_TEXT_ENABLED:
+            windows, owners = build_windows(tokenizer, texts)
+        else:
+            windows = tokenize(tokenizer, texts)
+
+    probabilities = predict_probabilities(backend, tokenizer, windows, model_name=model_name)
+
+    # Every text fit in a single window
+    if len(windows) == len(texts):
+        return probabilities
+
+    return reduce_windows(
+        probabilities,
+        owners,
+        [len(window) for window in windows],
+        len(texts),
+        reducer=reducer or settings.LONG_TEXT_REDUCER,
+        negative_weights=negative_weights
+    )
@@ -0,0 +1,183 @@
+"""Self-contained local model bundles, loaded memory-mapped
+
+    python -m app.services.model_bundles            # bundle SENTIMENT_MODEL and EMOTION_MODEL
+    python -m app.services.model_bundles --models some/model other/model
+
+A bundle is a directory holding the config, tokenizer and safetensors
+weights of one model. Loading it maps the weights file into memory instead
+of reading it, so every worker process on a host shares the same page-cache
+pages rather than holding its own private copy.
+"""
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import logger
+
+WEIGHTS_FILE = "model.safetensors"
+MANIFEST_FILE = "bundle.json"
+
+def safe_model_name(model_name: str) -> str:
+    """Model id usable as a directory name"""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name).strip("-")
+
+def bundle_path(model_name: str) -> Path:
+    root = Path(settings.MODEL_BUNDLE_DIR or Path(settings.MODEL_CACHE_DIR) / "bundles")
+    return root / safe_model_name(model_name)
+
+def find_bundle(model_name: str) -> Optional[Path]:
+    """The bundle directory for a model, if one has been written and bundles are enabled"""
+    if not settings.MODEL_BUNDLES_ENABLED:
+        return None
+    path = bundle_path(model_name)
+    return path if (path / MANIFEST_FILE).exists() else None
+
+def model_source(model_name: str) -> str:
+    """Where to load a model's config and tokenizer from: its bundle if present, else the hub id"""
+    path = find_bundle(model_name)
+    return str(path) if path is not None else model_name
+
+def write_bundle(model_name: str) -> Path:
+    """Download (or read from MODEL_CACHE_DIR) a classifier and write it as a bundle"""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    target = bundle_path(model_name)
+    staging = target.with_name(target.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=settings.MODEL_CACHE_DIR)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, cache_dir=settings.MODEL_CACHE_DIR)
+
+    # Contiguous fp32 tensors in one file, so loading is a single mapping with no conversion
+    model = model.float().eval()
+    model.save_pretrained(staging, safe_serialization=True, max_shard_size="100GB")
+    tokenizer.save_pretrained(staging)
+
+    (staging / MANIFEST_FILE).write_text(json.dumps({
+        "model_name": model_name,
+        "weights": WEIGHTS_FILE,
+        "weights_bytes": (staging / WEIGHTS_FILE).stat().st_size,
+        "created_at": datetime.utcnow().isoformat()
+    }, indent=2))
+
+    # Swap in the finished bundle; a reader never sees a partial directory
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(staging, target)
+
+    logger.info(f"Wrote model bundle for {model_name} to {target}")
+    return target
+
+def _torch_dtypes() -> Dict[str, Any]:
+    import torch
+
+    return {
+        "F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+        "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8,
+        "U8": torch.uint8, "BOOL": torch.bool
+    }
+
+def map_safetensors(path: Path) -> Dict[str, Any]:
+    """Tensors of a safetensors file as views into a memory mapping of it
+
+    The mapping is copy-on-write: pages are shared through the page cache
+    until written, and inference never writes to the weights.
+    """
+    import torch
+
+    dtypes = _torch_dtypes()
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    data_start = 8 + header_size
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = dtypes[info["dtype"]]
+        start, end = info["data_offsets"]
+        count = (end - start) // dtype.itemsize
+        if count == 0:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        tensor = torch.frombuffer(mapping, dtype=dtype, count=count, offset=data_start + start)
+        tensors[name] = tensor.view(info["shape"])
+    return tensors
+
+def _materialize_buffers(model):
+    """Rebuild the non-persistent buffers a checkpoint does not hold, left on meta by construction
+
+    These are index tensors (position and token type ids) derived from their
+    shape; any other buffer raises, and the caller falls back to a hub load.
+    """
+    import torch
+
+    for module_name, module in model.named_modules():
+        for name, buffer in list(module._buffers.items()):
+            if buffer is None or not buffer.is_meta:
+                continue
+            if name == "position_ids":
+                value = torch.arange(buffer.shape[-1], dtype=buffer.dtype).expand(buffer.shape)
+            elif name == "token_type_ids":
+                value = torch.zeros(buffer.shape, dtype=buffer.dtype)
+            else:
+                raise ValueError(f"Cannot rebuild buffer {module_name}.{name} outside the checkpoint")
+            module._buffers[name] = value
+
+def load_bundle_model(path: Path):
+    """Sequence classifier whose parameters are the memory-mapped bundle tensors"""
+    import torch
+    from transformers import AutoConfig, AutoModelForSequenceClassification
+    from transformers.modeling_utils import no_init_weights
+
+    config = AutoConfig.from_pretrained(path)
+    # Built without allocating or initializing anything; the device context is
+    # thread-local, so models built concurrently elsewhere are unaffected
+    with no_init_weights(), torch.device("meta"):
+        model = AutoModelForSequenceClassification.from_config(config)
+
+    # assign=True adopts the mapped tensors instead of copying them into fresh memory
+    state = map_safetensors(path / WEIGHTS_FILE)
+    model.load_state_dict(state, strict=False, assign=True)
+    model.tie_weights()
+    _materialize_buffers(model)
+
+    missing = [name for name, parameter in model.named_parameters() if parameter.is_meta]
+    if missing:
+        raise ValueError(f"Bundle {path} has no weights for {', '.join(missing[:5])}")
+
+    for parameter in model.parameters():
+        parameter.requires_grad_(False)
+    model.memory_mapped = True
+    return model.eval()
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m app.services.model_bundles",
+        description="Write configured models as local, memory-mappable safetensors bundles"
+    )
+    parser.add_argument(
+        "--models",
+        nargs="*",
+        default=[settings.SENTIMENT_MODEL, settings.EMOTION_MODEL],
+        help="Model ids or paths (default: SENTIMENT_MODEL and EMOTION_MODEL)"
+    )
+    args = parser.parse_args(argv)
+
+    for model_name in args.models:
+        path = write_bundle(model_name)
+        print(f"{model_name} -> {path}")
+
+if __name__ == "__main__":
+    main()
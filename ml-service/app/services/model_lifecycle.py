@@ -0,0 +1,330 @@
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.inference_executor import inference_executor
+from app.services.model_registry import ModelRegistry, model_registry, warmup_texts
+from app.services.model_versions import ModelVersion, VersionedModel, version_store
+from app.services.result_cache import result_cache
+
+class RolloutConflictError(RuntimeError):
+    """Raised when a model already has a rollout in progress"""
+
+def _holdout_path(name: str) -> Path:
+    root = Path(settings.ROLLOUT_HOLDOUT_DIR or Path(settings.MODEL_CACHE_DIR) / "holdout")
+    return root / f"{name}.jsonl"
+
+def load_holdout(name: str) -> Tuple[List[str], Optional[List[str]]]:
+    """Holdout texts and labels for a model; unlabeled warm-up texts if it has no holdout file"""
+    path = _holdout_path(name)
+    if not path.exists():
+        return warmup_texts(), None
+
+    texts, labels = [], []
+    for line in path.read_text().splitlines():
+        if line.strip():
+            row = json.loads(line)
+            texts.append(row["text"])
+            labels.append(row.get("label"))
+    return texts, labels if all(label is not None for label in labels) else None
+
+def _timed(fn, *args) -> Tuple[Any, float]:
+    """Call fn on the executor thread and time it there, so queueing is not counted"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def _p95(values: List[float]) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+class Rollout:
+    """One candidate version on its way from loading through validation to activation"""
+
+    def __init__(self, model: str, version: str, source: str, force: bool = False):
+        self.model = model
+        self.version = version
+        self.source = source
+        self.force = force
+        self.state = "loading"  # loading, validating, activated, rejected, failed
+        self.started_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.validation: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+    @property
+    def in_progress(self) -> bool:
+        return self.state in ("loading", "validating")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "version": self.version,
+            "source": self.source,
+            "force": self.force,
+            "state": self.state,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "validation": self.validation,
+            "error": self.error
+        }
+
+class ModelLifecycle:
+    """Loads candidate classifier versions in the background, validates them and swaps them in
+
+    The swap is a single reference assignment on the analyzer: requests that
+    already hold the old version finish on it, and it is freed when the last
+    of them releases it.
+    """
+
+    def __init__(self, registry: ModelRegistry):
+        self.registry = registry
+        self.rollouts: Dict[str, Rollout] = {}  # latest per model
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._synced: Dict[str, Optional[float]] = {}
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def _lock(self, name: str) -> asyncio.Lock:
+        return self._locks.setdefault(name, asyncio.Lock())
+
+    def _service(self, name: str) -> VersionedModel:
+        """A classifier that can take new versions; raises KeyError or ValueError otherwise"""
+        service = self.registry.get(name)
+        if not isinstance(service, VersionedModel):
+            raise ValueError(f"{name} has no versioned rollout; fit topic models with /topics/fit")
+        if getattr(service, "lexicon_only", False):
+            raise ValueError(f"{name} is in lexicon-only mode")
+        self.registry.require(name)
+        return service
+
+    def start_rollout(
+        self,
+        name: str,
+        source: Optional[str] = None,
+        version: Optional[str] = None,
+        force: bool = False
+    ) -> Rollout:
+        """Load, validate and activate a new version in the background
+
+        `source` defaults to the active version's, so weights re-written in
+        place by an offline training run are picked up.
+        """
+        service = self._service(name)
+        current = self.rollouts.get(name)
+        if current is not None and current.in_progress:
+            raise RolloutConflictError(f"Version {current.version} of {name} is already rolling out")
+
+        active = service.active
+        source = source or (active.source if active is not None else service.configured_source)
+        version = version or f"{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        if active is not None and version == active.version:
+            raise ValueError(f"Version {version} of {name} is already active")
+
+        rollout = Rollout(name, version, source, force)
+        self.rollouts[name] = rollout
+        task = asyncio.create_task(self._run(service, rollout))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        logger.info(f"Rolling out {name} version {version} from {source}")
+        return rollout
+
+    async def _run(self, service: VersionedModel, rollout: Rollout):
+        candidate: Optional[ModelVersion] = None
+        try:
+            async with self._lock(service.name):
+                candidate = await asyncio.to_thread(service.build_version, rollout.source, rollout.version)
+
+                rollout.state = "validating"
+                rollout.validation = await self._validate(service, candidate)
+                if not rollout.validation["passed"] and not rollout.force:
+                    rollout.state = "rejected"
+                    candidate.retire()
+                    logger.warning(
+                        f"Rejected {service.name} version {rollout.version}: "
+                        f"{'; '.join(rollout.validation['reasons'])}"
+                    )
+                    return
+
+                await self._activate(service, candidate, rollout.validation)
+                rollout.state = "activated"
+
+        except Exception as e:
+            rollout.state = "failed"
+            rollout.error = str(e)
+            if candidate is not None and candidate is not service.active:
+                candidate.retire()
+            logger.error(f"Rollout of {service.name} version {rollout.version} failed: {e}")
+        finally:
+            rollout.finished_at = datetime.utcnow()
+
+    async def _evaluate(self, service: VersionedModel, version: ModelVersion, texts: List[str]) -> Dict[str, Any]:
+        """Predicted labels and per-batch latency of one version on the holdout texts"""
+        chunks = [texts[i:i + settings.BATCH_SIZE] for i in range(0, len(texts), settings.BATCH_SIZE)]
+        # One untimed pass, so a cold candidate is not penalised for lazy initialisation
+        await inference_executor.run(service.predict_labels, version, chunks[0])
+
+        labels: List[str] = []
+        latencies: List[float] = []
+        # Chunk by chunk, so live traffic keeps getting executor time during validation
+        for chunk in chunks:
+            chunk_labels, elapsed = await inference_executor.run(_timed, service.predict_labels, version, chunk)
+            labels.extend(chunk_labels)
+            latencies.append(elapsed)
+        return {"labels": labels, "p95_latency_ms": _p95(latencies) * 1000}
+
+    async def _validate(self, service: VersionedModel, candidate: ModelVersion) -> Dict[str, Any]:
+        """Compare a candidate with the active version on the holdout set for accuracy and latency"""
+        texts, expected = load_holdout(service.name)
+        result: Dict[str, Any] = {"samples": len(texts), "labeled": expected is not None}
+        reasons = []
+
+        evaluated = await self._evaluate(service, candidate, texts)
+        result["p95_latency_ms"] = evaluated["p95_latency_ms"]
+        if expected is not None:
+            accuracy = sum(a == b for a, b in zip(evaluated["labels"], expected)) / len(texts)
+            result["accuracy"] = accuracy
+            if accuracy < settings.ROLLOUT_MIN_ACCURACY:
+                reasons.append(f"accuracy {accuracy:.1%} is below {settings.ROLLOUT_MIN_ACCURACY:.1%}")
+
+        active = service.active
+        if active is not None:
+            with active.lease():
+                baseline = await self._evaluate(service, active, texts)
+            result["active_version"] = active.version
+            result["active_p95_latency_ms"] = baseline["p95_latency_ms"]
+            result["agreement"] = sum(
+                a == b for a, b in zip(evaluated["labels"], baseline["labels"])
+            ) / len(texts)
+
+            if evaluated["p95_latency_ms"] > baseline["p95_latency_ms"] * settings.ROLLOUT_MAX_LATENCY_RATIO:
+                reasons.append(
+                    f"p95 latency {evaluated['p95_latency_ms']:.1f}ms is over "
+                    f"{settings.ROLLOUT_MAX_LATENCY_RATIO}x the active {baseline['p95_latency_ms']:.1f}ms"
+                )
+            if expected is not None:
+                active_accuracy = sum(a == b for a, b in zip(baseline["labels"], expected)) / len(texts)
+                result["active_accuracy"] = active_accuracy
+                if result["accuracy"] < active_accuracy - settings.ROLLOUT_MAX_ACCURACY_DROP:
+                    reasons.append(
+                        f"accuracy {result['accuracy']:.1%} is more than "
+                        f"{settings.ROLLOUT_MAX_ACCURACY_DROP:.1%} below the active {active_accuracy:.1%}"
+                    )
+
+        result["passed"] = not reasons
+        result["reasons"] = reasons
+        return result
+
+    async def _activate(
+        self,
+        service: VersionedModel,
+        candidate: ModelVersion,
+        validation: Optional[Dict[str, Any]] = None,
+        rollback: bool = False
+    ):
+        """Persist the new active version, then swap it in"""
+        previous = service.active
+        if rollback:
+            version_store.rollback(service.name)
+        else:
+            version_store.activate(
+                service.name,
+                {"version": candidate.version, "source": candidate.source, "validation": validation},
+                replaced={"version": previous.version, "source": previous.source} if previous else None
+            )
+        self._synced[service.name] = version_store.mtime(service.name)
+
+        service.swap(candidate)
+        self.registry.mark_loaded(service.name)
+        await result_cache.invalidate(service.cache_namespace, keep_version=candidate.version)
+
+        replaced = f", replacing {previous.version}" if previous else ""
+        logger.info(f"Activated {service.name} version {candidate.version}{replaced}")
+
+    async def rollback(self, name: str) -> Dict[str, Any]:
+        """Reload the previously active version and swap it back in, without validation"""
+        service = self._service(name)
+        async with self._lock(name):
+            target = version_store.previous(name)
+            if target is None:
+                raise ValueError(f"No previous version of {name} to roll back to")
+
+            logger.info(f"Rolling {name} back to version {target['version']}")
+            candidate = await asyncio.to_thread(service.build_version, target["source"], target["version"])
+            await self._activate(service, candidate, rollback=True)
+        return self.describe(name)
+
+    async def sync(self):
+        """Swap in versions another worker process activated since the last check"""
+        for name in self.registry.names:
+            service = self.registry.get(name)
+            if not isinstance(service, VersionedModel) or service.active is None:
+                continue
+
+            mtime = version_store.mtime(name)
+            if mtime is None or mtime == self._synced.get(name):
+                continue
+
+            record = version_store.active(name)
+            if record is not None and record["version"] != service.model_version:
+                try:
+                    async with self._lock(name):
+                        logger.info(f"Loading {name} version {record['version']}, activated by another worker")
+                        candidate = await asyncio.to_thread(service.build_version, record["source"], record["version"])
+                        service.swap(candidate)
+                        await result_cache.invalidate(service.cache_namespace, keep_version=candidate.version)
+                except Exception as e:
+                    # Other models still sync this round
+                    logger.error(f"Failed to load {name} version {record['version']}, retrying next check: {e}")
+                    continue
+
+            # Recorded only once swapped in, so a version that failed to build is retried next check
+            self._synced[name] = mtime
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(settings.ROLLOUT_SYNC_INTERVAL)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Model version sync failed: {e}")
+
+    def start(self):
+        """Follow versions activated by other workers (see ROLLOUT_SYNC_INTERVAL)"""
+        if settings.ROLLOUT_SYNC_INTERVAL > 0 and self._sync_task is None:
+            self._sync_task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        tasks = list(self._tasks)
+        if self._sync_task is not None:
+            tasks.append(self._sync_task)
+            self._sync_task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def describe(self, name: str) -> Dict[str, Any]:
+        """Active and draining versions, rollout history and the latest rollout of a model"""
+        service = self.registry.get(name)
+        if not isinstance(service, VersionedModel):
+            raise ValueError(f"{name} has no versioned rollout; fit topic models with /topics/fit")
+
+        stored = version_store.read(name)
+        rollout = self.rollouts.get(name)
+        return {
+            "model": name,
+            "active": service.active.to_dict() if service.active is not None else None,
+            "draining": [version.to_dict() for version in service.draining],
+            "history": stored["history"],
+            "rollout": rollout.to_dict() if rollout is not None else None
+        }
+
+# Shared lifecycle manager for the registry's classifiers
+model_lifecycle = ModelLifecycle(model_registry)
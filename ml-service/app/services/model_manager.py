@@ -1,43 +1,47 @@
 import asyncio
 import time
 import psutil
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional
 from datetime import datetime
 
-from app.services.sentiment_analyzer import SentimentAnalyzer
-from app.services.emotion_analyzer import EmotionAnalyzer
-from app.services.topic_modeler import TopicModeler
+from app.services.admission import admission
+from app.services.inference_executor import inference_executor, topic_executor
+from app.services.model_lifecycle import Rollout, model_lifecycle
+from app.services.model_registry import model_registry
+from app.services.result_cache import result_cache
+from app.services.vader_engine import vader_engine
+from app.services.topic_jobs import topic_job_manager
+from app.core.config import settings
 from app.core.logging import logger
+from app.core.metrics import metric_family, register_collector
 
 class ModelManager:
     def __init__(self):
-        self.sentiment_analyzer = SentimentAnalyzer()
-        self.emotion_analyzer = EmotionAnalyzer()
-        self.topic_modeler = TopicModeler()
+        # Use the shared registry instances so route handlers serve the loaded models
+        self.registry = model_registry
+        self.sentiment_analyzer = model_registry.sentiment_analyzer
+        self.emotion_analyzer = model_registry.emotion_analyzer
+        self.topic_modeler = model_registry.topic_modeler
         self.start_time = time.time()
-        self.models_loaded = 0
-        self.total_models = 3
+        self.total_models = len(model_registry.names)
+        self._loading: Optional[asyncio.Task] = None
+        
+        # Gauges read from the services' own counters on each scrape
+        register_collector(self._collect_metrics)
+    
+    @property
+    def models_loaded(self) -> int:
+        return self.registry.loaded_count
         
     async def load_models(self):
         """Load all ML models"""
         try:
             logger.info("Starting model loading process...")
             
-            # Load models concurrently for faster startup
-            tasks = [
-                self.sentiment_analyzer.load_model(),
-                self.emotion_analyzer.load_model(),
-                self.topic_modeler.load_model()
-            ]
+            await self.registry.load_all()
             
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Check results and count successful loads
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    logger.error(f"Failed to load model {i}: {result}")
-                else:
-                    self.models_loaded += 1
+            # Jobs interrupted by the last shutdown pick up where they left off
+            topic_job_manager.recover()
             
             logger.info(f"Model loading complete: {self.models_loaded}/{self.total_models} models loaded")
             
@@ -45,6 +49,44 @@ class ModelManager:
             logger.error(f"Model loading failed: {e}")
             raise
     
+    async def preload(self):
+        """Load every model in a pre-fork master, leaving nothing running that a fork would break
+
+        Pool threads and the Redis connection are closed again afterwards;
+        each forked worker starts its own.
+        """
+        logger.info("Preloading models before forking workers...")
+        await self.registry.load_all()
+        await inference_executor.shutdown()
+        await topic_executor.shutdown()
+        await result_cache.close()
+        logger.info(f"Preloaded {self.models_loaded}/{self.total_models} models")
+    
+    async def start(self):
+        """Load models per STARTUP_MODE: in the background, or before the server accepts traffic"""
+        # Picks up versions rolled out through another worker
+        model_lifecycle.start()
+        
+        if self.registry.settled:
+            # Forked from a master that already loaded them
+            topic_job_manager.recover()
+            return
+        
+        if settings.STARTUP_MODE == "blocking":
+            await self.load_models()
+            return
+        
+        # Requests are served (by fallbacks where needed) while models load
+        self._loading = asyncio.create_task(self.load_models())
+        self._loading.add_done_callback(self._on_loading_done)
+    
+    def _on_loading_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background model loading failed: {task.exception()}")
+    
+    def readiness(self) -> Dict[str, Any]:
+        return {**self.registry.readiness(), "uptime": time.time() - self.start_time}
+    
     async def get_model_status(self) -> Dict[str, Any]:
         """Get status of all models and system resources"""
         try:
@@ -60,11 +102,24 @@ class ModelManager:
                     "percent": memory.percent
                 },
                 "uptime": time.time() - self.start_time,
-                "models": {
-                    "sentiment_analyzer": self.sentiment_analyzer.pipeline is not None,
-                    "emotion_analyzer": self.emotion_analyzer.pipeline is not None,
-                    "topic_modeler": self.topic_modeler.model is not None
-                }
+                "process_rss_mb": psutil.Process().memory_info().rss / (1024**2),
+                # File-backed resident pages, e.g. memory-mapped bundle weights shared with other workers
+                "process_shared_mb": psutil.Process().memory_info().shared / (1024**2),
+                "executor": inference_executor.get_stats(),
+                "topic_executor": topic_executor.get_stats(),
+                "admission": admission.get_stats(),
+                "cache": result_cache.get_stats(),
+                "vader": vader_engine.get_stats(),
+                "topic_jobs": topic_job_manager.get_stats(),
+                "embedding_cache": (
+                    self.topic_modeler.embedding_store.get_stats()
+                    if self.topic_modeler.embedding_store is not None else None
+                ),
+                "batching": {
+                    "sentiment": self.sentiment_analyzer.batcher.get_stats(),
+                    "emotion": self.emotion_analyzer.batcher.get_stats()
+                },
+                "models": self.registry.status()
             }
             
         except Exception as e:
@@ -77,44 +132,113 @@ class ModelManager:
                 "models": {}
             }
     
-    async def retrain_models(self):
-        """Retrain models with new data (placeholder for future implementation)"""
-        try:
-            logger.info("Starting model retraining process...")
-            
-            # Placeholder for retraining logic
-            # In production, this would:
-            # 1. Fetch new training data
-            # 2. Retrain models
-            # 3. Validate performance
-            # 4. Replace old models if performance is better
-            
-            await asyncio.sleep(5)  # Simulate training time
-            
-            logger.info("Model retraining completed successfully")
-            
-        except Exception as e:
-            logger.error(f"Model retraining failed: {e}")
-            raise
+    def _collect_metrics(self) -> Iterator:
+        """Executor, batching, cache and model memory metrics for Prometheus"""
+        executor = inference_executor.get_stats()
+        yield metric_family("gauge", "ml_executor_pending", "Forward passes submitted and not finished",
+                            [((), executor["pending"])])
+        yield metric_family("gauge", "ml_executor_queue_depth", "Forward passes waiting for an inference thread",
+                            [((), executor["queue_depth"])])
+        yield metric_family("gauge", "ml_executor_queue_wait_seconds", "Queue wait admission control sheds load on",
+                            [((), executor["queue_wait_ms"] / 1000)])
+        yield metric_family("gauge", "ml_admission_in_flight", "Texts admitted to a model and not finished",
+                            [((), admission.in_flight)])
+        
+        yield metric_family(
+            "gauge", "ml_micro_batch_queue_depth", "Single-text requests waiting to be coalesced",
+            [
+                ((name,), analyzer.batcher.queue_depth)
+                for name, analyzer in (("sentiment", self.sentiment_analyzer), ("emotion", self.emotion_analyzer))
+            ],
+            labels=["model"]
+        )
+        
+        cache = result_cache.get_stats()
+        yield metric_family(
+            "counter", "ml_cache_lookups", "Result cache lookups by outcome",
+            [
+                (("local_hit",), cache["local_hits"]),
+                (("redis_hit",), cache["redis_hits"]),
+                (("miss",), cache["misses"])
+            ],
+            labels=["result"]
+        )
+        yield metric_family("gauge", "ml_cache_items", "Entries in the in-process result cache",
+                            [((), cache["local_items"])])
+        yield metric_family("counter", "ml_cache_evictions", "Result cache entries evicted for space",
+                            [((), cache["evictions"])])
+        
+        embedding_store = self.topic_modeler.embedding_store
+        if embedding_store is not None:
+            embeddings = embedding_store.get_stats()
+            yield metric_family(
+                "counter", "ml_embedding_cache_lookups", "Topic embedding cache lookups by outcome",
+                [(("hit",), embeddings["hits"]), (("miss",), embeddings["misses"])],
+                labels=["result"]
+            )
+        
+        # Process memory comes from prometheus_client's default process collector
+        models = self.registry.status().items()
+        yield metric_family(
+            "gauge", "ml_model_loaded", "Whether each model is loaded",
+            [((name,), float(status["loaded"])) for name, status in models],
+            labels=["model"]
+        )
+        yield metric_family(
+            "gauge", "ml_model_parameter_bytes", "Size of the weights held by each model",
+            [((name,), status["parameter_memory_mb"] * 1024**2) for name, status in models],
+            labels=["model"]
+        )
+    
+    def retrain_models(
+        self,
+        model: Optional[str] = None,
+        source: Optional[str] = None,
+        version: Optional[str] = None,
+        force: bool = False
+    ) -> List[Rollout]:
+        """Roll out new versions of one or all classifiers in the background
+        
+        Training happens offline; this loads the result (by default from the
+        active version's source), validates it and hot-swaps it in.
+        """
+        names = [model] if model else [self.sentiment_analyzer.name, self.emotion_analyzer.name]
+        if not model and self.sentiment_analyzer.lexicon_only:
+            names.remove(self.sentiment_analyzer.name)
+        return [
+            model_lifecycle.start_rollout(name, source=source, version=version, force=force)
+            for name in names
+        ]
     
     async def cleanup(self):
         """Cleanup resources on shutdown"""
         try:
             logger.info("Cleaning up model resources...")
             
-            # Clear model references to free memory
-            if hasattr(self.sentiment_analyzer, 'model'):
-                del self.sentiment_analyzer.model
-                del self.sentiment_analyzer.tokenizer
-                del self.sentiment_analyzer.pipeline
+            await model_lifecycle.stop()
             
-            if hasattr(self.emotion_analyzer, 'model'):
-                del self.emotion_analyzer.model
-                del self.emotion_analyzer.tokenizer
-                del self.emotion_analyzer.pipeline
+            # A load still running in a worker thread finishes there; stop waiting for it
+            if self._loading is not None and not self._loading.done():
+                self._loading.cancel()
+                await asyncio.gather(self._loading, return_exceptions=True)
+            
+            # Fail queued requests, then let in-flight passes finish
+            await self.sentiment_analyzer.batcher.close()
+            await self.emotion_analyzer.batcher.close()
+            await inference_executor.shutdown()
+            await topic_executor.shutdown()
+            await vader_engine.shutdown()
+            await topic_job_manager.shutdown()
+            await result_cache.close()
+            
+            # Clear model references to free memory
+            self.sentiment_analyzer.unload()
+            self.emotion_analyzer.unload()
             
-            if hasattr(self.topic_modeler, 'model'):
-                del self.topic_modeler.model
+            self.topic_modeler.embedding_model = None
+            self.topic_modeler.current = None
+            self.topic_modeler.online = None
+            self.registry.mark_unloaded()
             
             logger.info("Model cleanup completed")
             
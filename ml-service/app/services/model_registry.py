@@ -0,0 +1,222 @@
+import time
+import psutil
+from typing import Dict, Any, List, Optional
+
+from app.services.sentiment_analyzer import SentimentAnalyzer
+from app.services.emotion_analyzer import EmotionAnalyzer
+from app.services.topic_modeler import TopicModeler
+from app.services.result_cache import result_cache
+from app.core.config import settings
+from app.core.logging import logger
+
+# States a model passes through before it can serve requests
+LOADING_STATES = ("pending", "loading", "warming")
+
+class ModelNotReadyError(RuntimeError):
+    """Raised when a request needs a model that is still loading"""
+
+    def __init__(self, name: str, state: str):
+        super().__init__(f"Model {name} is not ready ({state})")
+        self.name = name
+        self.state = state
+
+def warmup_texts() -> List[str]:
+    """Short, medium and multi-window texts, so warm-up covers the shapes real traffic hits"""
+    sentence = "The product arrived on time and works well, but support was slow to answer my questions. "
+    return [
+        "Great product!",
+        "Terrible experience, would not recommend.",
+        sentence * 4,
+        sentence * 40
+    ]
+
+class ModelEntry:
+    """Load state of a single registered model service"""
+
+    def __init__(self, name: str, service: Any, priority: int):
+        self.name = name
+        self.service = service
+        self.priority = priority  # lower loads first
+        self.state = "pending"  # pending, loading, warming, loaded, failed, unloaded
+        self.load_time: Optional[float] = None
+        self.warmup_time: Optional[float] = None
+        self.loaded_at: Optional[float] = None
+        self.rss_delta_bytes: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def parameter_bytes(self) -> int:
+        """Size of the model weights held by the service"""
+        backend = getattr(self.service, "backend", None)
+        if backend is not None:
+            return backend.weight_bytes()
+        return 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "loaded": self.state == "loaded",
+            "priority": self.priority,
+            "load_time": self.load_time,
+            "warmup_time": self.warmup_time,
+            "loaded_at": self.loaded_at,
+            "parameter_memory_mb": self.parameter_bytes() / (1024**2),
+            "rss_delta_mb": (
+                self.rss_delta_bytes / (1024**2) if self.rss_delta_bytes is not None else None
+            ),
+            "model_version": getattr(self.service, "model_version", None),
+            "backend": getattr(getattr(self.service, "backend", None), "name", None),
+            "memory_mapped": getattr(getattr(self.service, "backend", None), "memory_mapped", False),
+            "error": self.error
+        }
+
+class ModelRegistry:
+    """Process-wide owner of the single instance of each model service"""
+
+    def __init__(self):
+        self.emotion_analyzer = EmotionAnalyzer()
+        self.sentiment_analyzer = SentimentAnalyzer(emotion_analyzer=self.emotion_analyzer)
+        self.topic_modeler = TopicModeler()
+
+        self._entries: Dict[str, ModelEntry] = {
+            "sentiment_analyzer": ModelEntry("sentiment_analyzer", self.sentiment_analyzer, priority=0),
+            "emotion_analyzer": ModelEntry("emotion_analyzer", self.emotion_analyzer, priority=1),
+            "topic_modeler": ModelEntry("topic_modeler", self.topic_modeler, priority=2)
+        }
+
+    def get(self, name: str) -> Any:
+        """Get a registered model service by name"""
+        if name not in self._entries:
+            raise KeyError(f"Unknown model: {name}")
+        return self._entries[name].service
+
+    @property
+    def names(self):
+        return list(self._entries.keys())
+
+    @property
+    def settled(self) -> bool:
+        """Every model has finished loading, successfully or not"""
+        return all(entry.state in ("loaded", "failed") for entry in self._entries.values())
+
+    @property
+    def loaded_count(self) -> int:
+        return sum(1 for entry in self._entries.values() if entry.state == "loaded")
+
+    async def load(self, name: str) -> bool:
+        """Load one model, recording load time and memory footprint"""
+        entry = self._entries[name]
+        process = psutil.Process()
+
+        entry.state = "loading"
+        entry.error = None
+        rss_before = process.memory_info().rss
+        start_time = time.time()
+
+        try:
+            await entry.service.load_model()
+        except Exception as e:
+            entry.state = "failed"
+            entry.error = str(e)
+            logger.error(f"Failed to load model {name}: {e}")
+            return False
+
+        entry.load_time = time.time() - start_time
+        entry.rss_delta_bytes = process.memory_info().rss - rss_before
+        
+        if settings.WARMUP_ENABLED and hasattr(entry.service, "warm_up"):
+            entry.state = "warming"
+            warmup_start = time.time()
+            try:
+                await entry.service.warm_up(warmup_texts())
+                entry.warmup_time = time.time() - warmup_start
+            except Exception as e:
+                # A cold model still serves; the first requests are just slower
+                logger.warning(f"Warm-up failed for model {name}: {e}")
+        
+        entry.loaded_at = time.time()
+        entry.state = "loaded"
+
+        # Results cached for any other version of this model are now stale
+        if hasattr(entry.service, "cache_namespace"):
+            await result_cache.invalidate(
+                entry.service.cache_namespace,
+                keep_version=entry.service.model_version
+            )
+
+        logger.info(f"Loaded model {name} in {entry.load_time:.2f}s")
+        return True
+
+    async def load_all(self) -> int:
+        """Load every registered model in priority order; returns the number loaded"""
+        # Sequential loads keep the per-model RSS deltas meaningful
+        for entry in sorted(self._entries.values(), key=lambda entry: entry.priority):
+            await self.load(entry.name)
+        return self.loaded_count
+    
+    def require(self, name: str):
+        """Raise ModelNotReadyError while a model is still loading"""
+        state = self._entries[name].state
+        if state in LOADING_STATES:
+            raise ModelNotReadyError(name, state)
+    
+    def readiness(self) -> Dict[str, Any]:
+        """Per-model readiness; ready once every READINESS_MODELS model has loaded or failed
+
+        A failed model does not hold readiness back: its fallback serves instead.
+        """
+        models = {
+            name: {
+                "state": entry.state,
+                "ready": entry.state == "loaded",
+                "load_time": entry.load_time,
+                "warmup_time": entry.warmup_time,
+                "error": entry.error
+            }
+            for name, entry in self._entries.items()
+        }
+        required = [name for name in settings.READINESS_MODELS if name in self._entries]
+        return {
+            "ready": all(self._entries[name].state in ("loaded", "failed") for name in required),
+            "loading": any(entry.state in LOADING_STATES for entry in self._entries.values()),
+            "required": required,
+            "models": models
+        }
+
+    def mark_loaded(self, name: str):
+        """Record that a model is serving, e.g. after a new version was swapped in"""
+        entry = self._entries[name]
+        entry.state = "loaded"
+        entry.error = None
+        entry.loaded_at = time.time()
+
+    def mark_unloaded(self):
+        """Record that model weights have been released"""
+        for entry in self._entries.values():
+            entry.state = "unloaded"
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-model load state, load time and memory footprint"""
+        return {name: entry.to_dict() for name, entry in self._entries.items()}
+
+# Single registry shared by the model manager and the route handlers
+model_registry = ModelRegistry()
+
+def get_sentiment_analyzer() -> SentimentAnalyzer:
+    if not settings.LOADING_FALLBACK:
+        model_registry.require("sentiment_analyzer")
+    return model_registry.sentiment_analyzer
+
+def get_emotion_analyzer() -> EmotionAnalyzer:
+    if not settings.LOADING_FALLBACK:
+        model_registry.require("emotion_analyzer")
+    return model_registry.emotion_analyzer
+
+def get_topic_modeler() -> TopicModeler:
+    if not settings.LOADING_FALLBACK:
+        model_registry.require("topic_modeler")
+    return model_registry.topic_modeler
+
+def get_loaded_topic_modeler() -> TopicModeler:
+    """Topic modeler for endpoints with no fallback (fit, assign, online), once loading has settled"""
+    model_registry.require("topic_modeler")
+    return model_registry.topic_modeler
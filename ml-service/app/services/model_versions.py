@@ -0,0 +1,258 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.services.admission import admission
+
+# Version name of the model loaded from settings before any rollout
+INITIAL_VERSION = "1.0.0"
+
+class ModelVersion:
+    """One loaded version of a classifier, reference-counted while requests use it
+
+    Everything a forward pass needs lives here, so swapping the analyzer's
+    active version is a single reference assignment. A retired version is
+    freed once the last request holding it finishes.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        source: str,
+        backend,
+        tokenizer,
+        labels: Any,
+        negative_weights: Any
+    ):
+        self.version = version
+        self.source = source
+        self.backend = backend
+        self.tokenizer = tokenizer
+        self.labels = labels  # sentiment label names, or the label -> emotion projection
+        self.negative_weights = negative_weights
+        self.loaded_at = datetime.utcnow()
+        self.refs = 0
+        self.retired = False
+        self.freed = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> "ModelVersion":
+        with self._lock:
+            if self.freed:
+                raise RuntimeError(f"Model version {self.version} has been freed")
+            self.refs += 1
+        return self
+
+    def release(self):
+        with self._lock:
+            self.refs -= 1
+            free = self.retired and self.refs == 0
+        if free:
+            self._free()
+
+    @contextmanager
+    def lease(self) -> Iterator["ModelVersion"]:
+        """Hold the version for the duration of a request"""
+        self.acquire()
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def retire(self):
+        """Mark the version as replaced; it is freed now or when its last lease ends"""
+        with self._lock:
+            self.retired = True
+            free = self.refs == 0
+        if free:
+            self._free()
+
+    def _free(self):
+        with self._lock:
+            if self.freed:
+                return
+            self.freed = True
+        self.backend = None
+        self.tokenizer = None
+        self.labels = None
+        self.negative_weights = None
+        logger.info(f"Freed model version {self.version}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "backend": self.backend.name if self.backend is not None else None,
+            "loaded_at": self.loaded_at.isoformat(),
+            "in_flight": self.refs,
+            "retired": self.retired
+        }
+
+class VersionedModel:
+    """Base for classifier services: owns the active ModelVersion and swaps it atomically"""
+
+    # Registry name, also the key of the service's persisted version history
+    name = ""
+    # Metrics and admission label
+    component = ""
+
+    def __init__(self):
+        self.active: Optional[ModelVersion] = None
+        self.retired: List[ModelVersion] = []
+
+    @property
+    def backend(self):
+        return self.active.backend if self.active is not None else None
+
+    @property
+    def tokenizer(self):
+        return self.active.tokenizer if self.active is not None else None
+
+    @property
+    def model_version(self) -> str:
+        return self.active.version if self.active is not None else INITIAL_VERSION
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.active is not None
+
+    @property
+    def configured_source(self) -> str:
+        """Model id or path from settings"""
+        raise NotImplementedError
+
+    def startup_version(self) -> Tuple[str, str]:
+        """Source and version to load at startup: the last one activated, else the configured model"""
+        record = version_store.active(self.name)
+        if record is not None:
+            return record["source"], record["version"]
+        return self.configured_source, INITIAL_VERSION
+
+    def swap(self, version: ModelVersion) -> Optional[ModelVersion]:
+        """Make a version active; the one it replaces keeps serving its in-flight requests"""
+        previous, self.active = self.active, version
+        if previous is not None:
+            previous.retire()
+            self.retired.append(previous)
+        self.retired = [retired for retired in self.retired if not retired.freed]
+        return previous
+
+    def unload(self):
+        previous, self.active = self.active, None
+        if previous is not None:
+            previous.retire()
+
+    @property
+    def draining(self) -> List[ModelVersion]:
+        """Replaced versions still finishing requests"""
+        self.retired = [retired for retired in self.retired if not retired.freed]
+        return list(self.retired)
+
+    @contextmanager
+    def serving(self, count: int = 1) -> Iterator[Tuple[Optional[ModelVersion], Optional[str]]]:
+        """Lease the active version for a request of `count` texts once admission control lets it in
+
+        Yields the version and None, or None and the reason the request has
+        to use the fallback instead (model_unavailable or overload).
+        """
+        version = self.active
+        if version is None:
+            yield None, "model_unavailable"
+            return
+
+        with admission.slot(self.component, count) as admitted:
+            if not admitted:
+                yield None, "overload"
+                return
+            with version.lease():
+                yield version, None
+
+    async def _predict_batch(self, texts: List[str], version: Optional[ModelVersion] = None) -> List[Any]:
+        raise NotImplementedError
+
+    async def _predict_items(self, items: List[Tuple[ModelVersion, str]]) -> List[Any]:
+        """Micro-batch flush: each text runs on the version its request holds"""
+        results: List[Any] = [None] * len(items)
+        for version, indices in group_by_version(items):
+            predictions = await self._predict_batch([items[i][1] for i in indices], version)
+            for i, prediction in zip(indices, predictions):
+                results[i] = prediction
+        return results
+
+def group_by_version(items: Sequence[Tuple[ModelVersion, Any]]) -> List[Tuple[ModelVersion, List[int]]]:
+    """Indices of micro-batched items per version, so each runs on the version it was admitted on"""
+    groups: "OrderedDict[int, Tuple[ModelVersion, List[int]]]" = OrderedDict()
+    for i, (version, _) in enumerate(items):
+        groups.setdefault(id(version), (version, []))[1].append(i)
+    return list(groups.values())
+
+def _versions_dir() -> Path:
+    return Path(settings.MODEL_CACHE_DIR) / "versions"
+
+class VersionStore:
+    """Persisted rollout history per model: the active version and the ones it replaced
+
+    Shared through MODEL_CACHE_DIR, so restarts and other worker processes
+    serve the version that was last activated.
+    """
+
+    def _path(self, name: str) -> Path:
+        return _versions_dir() / f"{name}.json"
+
+    def read(self, name: str) -> Dict[str, Any]:
+        path = self._path(name)
+        if not path.exists():
+            return {"active": None, "history": []}
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable version history for {name}, ignoring it: {e}")
+            return {"active": None, "history": []}
+
+    def active(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.read(name)["active"]
+
+    def previous(self, name: str) -> Optional[Dict[str, Any]]:
+        """The most recent version that was active before the current one"""
+        history = self.read(name)["history"]
+        return history[-1] if history else None
+
+    def _write(self, name: str, active: Dict[str, Any], history: List[Dict[str, Any]]):
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps({"active": active, "history": history}, indent=2))
+        os.replace(temporary, path)
+
+    def activate(self, name: str, record: Dict[str, Any], replaced: Optional[Dict[str, Any]] = None):
+        """Record a newly active version, keeping the one it replaced for rollback"""
+        history = self.read(name)["history"]
+        if replaced is not None:
+            history.append(replaced)
+        del history[:-settings.MODEL_VERSIONS_KEEP]
+        self._write(name, {**record, "activated_at": datetime.utcnow().isoformat()}, history)
+
+    def rollback(self, name: str) -> Dict[str, Any]:
+        """Make the previous version active again, dropping the current one from the history"""
+        history = self.read(name)["history"]
+        if not history:
+            raise ValueError(f"No previous version of {name} to roll back to")
+        record = history.pop()
+        self._write(name, {**record, "activated_at": datetime.utcnow().isoformat(), "rolled_back": True}, history)
+        return record
+
+    def mtime(self, name: str) -> Optional[float]:
+        try:
+            return self._path(name).stat().st_mtime
+        except OSError:
+            return None
+
+# Shared store
+version_store = VersionStore()
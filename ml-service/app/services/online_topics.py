@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from bertopic import BERTopic
+from bertopic.vectorizers import OnlineCountVectorizer
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import IncrementalPCA
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.metrics import record_admission
+from app.services.admission import OverloadedError
+from app.services.inference_executor import topic_executor
+
+class OnlineTopicModel:
+    """Topic model updated from mini-batches of arriving documents
+
+    Incremental PCA, mini-batch k-means and a decaying online vectorizer keep
+    memory and the cost per document fixed; nothing is ever refit over the
+    full history. Documents are buffered until a full mini-batch is ready;
+    pushes are rejected with OverloadedError once ONLINE_TOPICS_MAX_BUFFERED
+    are waiting. The model lives in process memory, so each pre-forked
+    worker keeps its own, fitted from the pushes that worker receives.
+    """
+
+    def __init__(
+        self,
+        embedding_model,
+        embed: Callable[[List[str]], Any],
+        describe: Callable[[BERTopic, int, List[str]], List[Dict[str, Any]]]
+    ):
+        self.embed = embed
+        self.describe = describe
+        # Both k-means and incremental PCA need at least this many rows per update
+        self.min_batch_size = max(settings.ONLINE_TOPICS_CLUSTERS, settings.ONLINE_TOPICS_COMPONENTS)
+        self.batch_size = max(settings.ONLINE_TOPICS_BATCH_SIZE, self.min_batch_size)
+        self.max_buffered = max(settings.ONLINE_TOPICS_MAX_BUFFERED, self.batch_size)
+
+        self.model = BERTopic(
+            embedding_model=embedding_model,
+            umap_model=IncrementalPCA(n_components=settings.ONLINE_TOPICS_COMPONENTS),
+            hdbscan_model=MiniBatchKMeans(
+                n_clusters=settings.ONLINE_TOPICS_CLUSTERS,
+                random_state=0,
+                n_init=3
+            ),
+            vectorizer_model=OnlineCountVectorizer(
+                stop_words="english",
+                decay=settings.ONLINE_TOPICS_DECAY,
+                delete_min_df=settings.ONLINE_TOPICS_DELETE_MIN_DF
+            ),
+            verbose=False
+        )
+
+        self._buffer: List[str] = []
+        self._buffer_lock = threading.Lock()
+        self._lock = asyncio.Lock()
+
+        # Published after each update so readers never see a half-updated model
+        self.topics: List[Dict[str, Any]] = []
+        self.updated_at: Optional[datetime] = None
+
+        # Statistics
+        self.documents_seen = 0
+        self.batches_fitted = 0
+
+    def _partial_fit(self, documents: List[str]) -> List[Dict[str, Any]]:
+        # Keep one dtype across updates; k-means partial_fit rejects a change
+        embeddings = np.asarray(self.embed(documents), dtype=np.float64)
+        self.model.partial_fit(documents, embeddings=embeddings)
+        # Coherence reflects the latest mini-batch
+        return self.describe(self.model, settings.MAX_TOPICS, documents)
+
+    async def push(self, documents: List[str], flush: bool = False) -> int:
+        """Buffer documents and fit every full mini-batch; returns how many batches were fitted
+
+        Raises OverloadedError if the buffer is full because updates are falling behind.
+        """
+        with self._buffer_lock:
+            # A push into an empty buffer always gets in, however large
+            if self._buffer and len(self._buffer) + len(documents) > self.max_buffered:
+                record_admission("online_topics", "rejected", "buffer_full", len(documents))
+                raise OverloadedError("buffer_full", max(1, settings.ADMISSION_RETRY_AFTER_SECONDS))
+            self._buffer.extend(documents)
+        fitted = 0
+
+        # One update at a time; concurrent pushes only append to the buffer
+        async with self._lock:
+            while True:
+                with self._buffer_lock:
+                    ready = len(self._buffer) >= self.batch_size or (flush and len(self._buffer) >= self.min_batch_size)
+                    if not ready:
+                        break
+                    batch = self._buffer[:self.batch_size]
+                    del self._buffer[:len(batch)]
+
+                start_time = time.time()
+                self.topics = await topic_executor.run(self._partial_fit, batch)
+                self.updated_at = datetime.utcnow()
+                self.documents_seen += len(batch)
+                self.batches_fitted += 1
+                fitted += 1
+
+                logger.info(
+                    f"Online topic update {self.batches_fitted}: {len(batch)} documents "
+                    f"in {time.time() - start_time:.2f}s, {len(self.topics)} topics"
+                )
+
+        return fitted
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "topics": self.topics,
+            "num_topics": len(self.topics),
+            "documents_seen": self.documents_seen,
+            "batches_fitted": self.batches_fitted,
+            "buffered": self.buffered,
+            "updated_at": self.updated_at
+        }
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.core.logging import logger
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis tier is optional
+    aioredis = None
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different copies share a cache entry"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+class ResultCache:
+    """Two-tier model result cache: bounded in-process LRU/TTL plus optional Redis"""
+
+    def __init__(
+        self,
+        max_items: Optional[int] = None,
+        ttl: Optional[int] = None,
+        redis_enabled: Optional[bool] = None
+    ):
+        self.enabled = settings.CACHE_ENABLED
+        self.max_items = max_items or settings.CACHE_MAX_ITEMS
+        self.ttl = ttl or settings.CACHE_TTL_SECONDS
+        self.redis_enabled = (
+            settings.CACHE_REDIS_ENABLED if redis_enabled is None else redis_enabled
+        ) and aioredis is not None
+        self.prefix = settings.CACHE_KEY_PREFIX
+
+        self._local: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._redis = None
+        self._redis_retry_at = 0.0
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.redis_errors = 0
+
+    def make_key(self, namespace: str, version: str, text: str) -> str:
+        """Build a cache key from model namespace, model version and normalized text"""
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{self.prefix}:{namespace}:{version}:{digest}"
+
+    # Local tier
+
+    def _local_get(self, key: str) -> Optional[Any]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._local[key]
+            self.expirations += 1
+            return None
+
+        self._local.move_to_end(key)
+        return value
+
+    def _local_set(self, key: str, value: Any):
+        self._local[key] = (time.time() + self.ttl, value)
+        self._local.move_to_end(key)
+
+        while len(self._local) > self.max_items:
+            self._local.popitem(last=False)
+            self.evictions += 1
+
+    # Redis tier
+
+    def _get_redis(self):
+        """Get the Redis client, backing off for a while after connection errors"""
+        if not self.redis_enabled or time.time() < self._redis_retry_at:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    def _redis_failed(self, e: Exception):
+        self.redis_errors += 1
+        self._redis_retry_at = time.time() + 30
+        logger.warning(f"Result cache Redis tier unavailable, using local tier only: {e}")
+
+    async def _redis_get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        client = self._get_redis()
+        if client is None or not keys:
+            return [None] * len(keys)
+
+        try:
+            raw_values = await client.mget(keys)
+        except Exception as e:
+            self._redis_failed(e)
+            return [None] * len(keys)
+
+        return [json.loads(raw) if raw is not None else None for raw in raw_values]
+
+    async def _redis_set_many(self, items: Dict[str, Any]):
+        client = self._get_redis()
+        if client is None or not items:
+            return
+
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key, json.dumps(value), ex=self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            self._redis_failed(e)
+
+    # Public API
+
+    async def get_many(
+        self,
+        namespace: str,
+        version: str,
+        texts: Sequence[str]
+    ) -> List[Optional[Any]]:
+        """Look up every text at once; returns None for each miss"""
+        if not self.enabled:
+            return [None] * len(texts)
+
+        keys = [self.make_key(namespace, version, text) for text in texts]
+        results = [self._local_get(key) for key in keys]
+        self.local_hits += sum(1 for value in results if value is not None)
+
+        # One round trip for everything the local tier did not have
+        missing = [i for i, value in enumerate(results) if value is None]
+        if missing and self.redis_enabled:
+            remote = await self._redis_get_many([keys[i] for i in missing])
+            for i, value in zip(missing, remote):
+                if value is not None:
+                    results[i] = value
+                    self.redis_hits += 1
+                    self._local_set(keys[i], value)
+
+        hits = sum(1 for value in results if value is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    async def set_many(
+        self,
+        namespace: str,
+        version: str,
+        texts: Sequence[str],
+        values: Sequence[Any]
+    ):
+        """Store results for a list of texts in both tiers"""
+        if not self.enabled:
+            return
+
+        items = {}
+        for text, value in zip(texts, values):
+            key = self.make_key(namespace, version, text)
+            self._local_set(key, value)
+            items[key] = value
+
+        await self._redis_set_many(items)
+
+    async def get(self, namespace: str, version: str, text: str) -> Optional[Any]:
+        return (await self.get_many(namespace, version, [text]))[0]
+
+    async def set(self, namespace: str, version: str, text: str, value: Any):
+        await self.set_many(namespace, version, [text], [value])
+
+    async def invalidate(self, namespace: str, keep_version: Optional[str] = None):
+        """Drop cached results for a model, optionally keeping its current version"""
+        namespace_prefix = f"{self.prefix}:{namespace}:"
+        keep_prefix = f"{namespace_prefix}{keep_version}:" if keep_version else None
+
+        stale = [
+            key for key in self._local
+            if key.startswith(namespace_prefix)
+            and not (keep_prefix and key.startswith(keep_prefix))
+        ]
+        for key in stale:
+            del self._local[key]
+        self.invalidations += len(stale)
+
+        client = self._get_redis()
+        if client is None:
+            return
+
+        try:
+            batch = []
+            async for key in client.scan_iter(match=f"{namespace_prefix}*", count=1000):
+                key = key.decode() if isinstance(key, bytes) else key
+                if keep_prefix and key.startswith(keep_prefix):
+                    continue
+                batch.append(key)
+                if len(batch) >= 1000:
+                    await client.delete(*batch)
+                    batch = []
+            if batch:
+                await client.delete(*batch)
+        except Exception as e:
+            self._redis_failed(e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "redis_enabled": self.redis_enabled,
+            "local_items": len(self._local),
+            "max_items": self.max_items,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "redis_errors": self.redis_errors
+        }
+
+    async def close(self):
+        if self._redis is not None:
+            try:
+                await self._redis.close()
+            except Exception:
+                pass
+            self._redis = None
+
+# Shared cache used by the sentiment and emotion services
+result_cache = ResultCache()
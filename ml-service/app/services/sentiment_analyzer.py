@@ -1,78 +1,200 @@
 import asyncio
 import time
 from typing import List, Dict, Any, Optional
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-import torch
 from datetime import datetime
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.metrics import observe_batch, record_fallback, stage_timer
+from app.services.admission import OverloadedError
+from app.services.batch_scheduler import MicroBatchScheduler
+from app.services.inference_executor import inference_executor
+from app.services.model_versions import ModelVersion, VersionedModel
+from app.services.result_cache import result_cache, normalize_text
+from app.services.vader_engine import vader_engine
+from app.services.emotion_analyzer import EmotionAnalyzer
 
-class SentimentAnalyzer:
-    def __init__(self):
-        self.model = None
-        self.tokenizer = None
-        self.pipeline = None
-        self.vader_analyzer = SentimentIntensityAnalyzer()
-        self.model_version = "1.0.0"
+SENTIMENT_LABEL_MAPPING = {
+    'LABEL_0': 'negative',
+    'LABEL_1': 'neutral',
+    'LABEL_2': 'positive',
+    'NEGATIVE': 'negative',
+    'NEUTRAL': 'neutral',
+    'POSITIVE': 'positive'
+}
+
+class SentimentAnalyzer(VersionedModel):
+    name = "sentiment_analyzer"
+    component = "sentiment"
+    
+    def __init__(self, emotion_analyzer: Optional[EmotionAnalyzer] = None):
+        super().__init__()
+        self.batcher = MicroBatchScheduler("sentiment", self._predict_items)
+        self.emotion_analyzer = emotion_analyzer or EmotionAnalyzer()
         
     async def load_model(self):
-        """Load the sentiment analysis model"""
+        """Load the sentiment analysis model off the event loop"""
+        if self.lexicon_only:
+            logger.info("SENTIMENT_MODE is lexicon, skipping the sentiment model")
+            return
+        
         try:
-            logger.info(f"Loading sentiment model: {settings.SENTIMENT_MODEL}")
-            
-            # Load tokenizer and model
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                settings.SENTIMENT_MODEL,
-                cache_dir=settings.MODEL_CACHE_DIR
-            )
-            
-            self.model = AutoModelForSequenceClassification.from_pretrained(
-                settings.SENTIMENT_MODEL,
-                cache_dir=settings.MODEL_CACHE_DIR
-            )
-            
-            # Create pipeline
-            self.pipeline = pipeline(
-                "sentiment-analysis",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=0 if torch.cuda.is_available() else -1,
-                batch_size=settings.BATCH_SIZE
-            )
-            
+            source, version = self.startup_version()
+            logger.info(f"Loading sentiment model: {source} (version {version})")
+            # Published in one assignment: requests switch from the fallback once it is set
+            self.swap(await asyncio.to_thread(self.build_version, source, version))
             logger.info("Sentiment model loaded successfully")
             
         except Exception as e:
             logger.error(f"Failed to load sentiment model: {e}")
             raise
     
+    @property
+    def configured_source(self) -> str:
+        return settings.SENTIMENT_MODEL
+    
+    def build_version(self, source: str, version: str) -> ModelVersion:
+        """Load a model into a new, not yet active version (blocking)"""
+        # Heavy imports are deferred until a model is actually loaded
+        import torch
+        from transformers import AutoTokenizer
+        from app.services.inference_backend import load_backend
+        from app.services.model_bundles import model_source
+        
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        tokenizer = AutoTokenizer.from_pretrained(
+            model_source(source),
+            cache_dir=settings.MODEL_CACHE_DIR
+        )
+        
+        # PyTorch or ONNX Runtime, per INFERENCE_BACKEND
+        backend = load_backend(source, tokenizer, device)
+        
+        # Resolve class index -> sentiment category once, not per prediction
+        id2label = backend.config.id2label
+        label_names = [
+            self._normalize_sentiment(id2label[label_id], 0.0)[0]
+            for label_id in range(backend.num_labels)
+        ]
+        
+        # Marks the negative class for the max-negative long-text reducer
+        negative_weights = torch.tensor([
+            1.0 if label == 'negative' else 0.0 for label in label_names
+        ])
+        
+        return ModelVersion(version, source, backend, tokenizer, label_names, negative_weights)
+    
+    async def warm_up(self, texts: List[str]):
+        """Run a few forward passes so the first real requests do not pay for lazy initialisation"""
+        await self._predict_batch(texts)
+    
     def _normalize_sentiment(self, label: str, score: float) -> tuple[str, float]:
         """Normalize sentiment labels and scores"""
-        label_mapping = {
-            'LABEL_0': 'negative',
-            'LABEL_1': 'neutral', 
-            'LABEL_2': 'positive',
-            'NEGATIVE': 'negative',
-            'NEUTRAL': 'neutral',
-            'POSITIVE': 'positive'
-        }
-        
-        normalized_label = label_mapping.get(label.upper(), label.lower())
+        normalized_label = SENTIMENT_LABEL_MAPPING.get(label.upper(), label.lower())
         return normalized_label, float(score)
     
+    @property
+    def lexicon_only(self) -> bool:
+        return settings.SENTIMENT_MODE == "lexicon"
+    
+    @property
+    def fallback_version(self) -> str:
+        suffix = "lexicon" if self.lexicon_only else "fallback"
+        return f"{self.model_version}-{suffix}"
+    
+    def _predict_batch_sync(self, version: ModelVersion, texts: List[str]) -> List[tuple[str, float]]:
+        """Classify texts in length-sorted, token-budgeted batches (blocking)"""
+        from app.services.long_text import predict_documents
+        
+        probabilities = predict_documents(
+            version.backend, version.tokenizer, texts, version.negative_weights, model_name="sentiment"
+        )
+        
+        with stage_timer("sentiment", "postprocess"):
+            scores, label_ids = probabilities.max(dim=-1)
+            labels = map(version.labels.__getitem__, label_ids.tolist())
+            return list(zip(labels, scores.tolist()))
+    
+    async def _predict_batch(
+        self, texts: List[str], version: Optional[ModelVersion] = None
+    ) -> List[tuple[str, float]]:
+        """Run one forward pass on the inference executor"""
+        return await inference_executor.run(self._predict_batch_sync, version or self.active, texts)
+    
+    def predict_labels(self, version: ModelVersion, texts: List[str]) -> List[str]:
+        """Sentiment label per text, for validating a candidate version (blocking)"""
+        return [label for label, _ in self._predict_batch_sync(version, texts)]
+    
+    def _cache_namespace(self, version: Optional[ModelVersion]) -> str:
+        backend_name = version.backend.name if version is not None else settings.INFERENCE_BACKEND
+        return f"sentiment:{settings.SENTIMENT_MODEL}:{backend_name}"
+    
+    @property
+    def cache_namespace(self) -> str:
+        return self._cache_namespace(self.active)
+    
+    async def _classify(self, texts: List[str], version: ModelVersion) -> List[tuple[str, float]]:
+        """Classify texts on a leased version, serving repeats from the result cache"""
+        observe_batch("sentiment", "request", len(texts))
+        namespace = self._cache_namespace(version)
+        predictions = await result_cache.get_many(namespace, version.version, texts)
+        
+        # Group misses by normalized text so duplicates run through the model once
+        pending: Dict[str, List[int]] = {}
+        with stage_timer("sentiment", "preprocess"):
+            for i, prediction in enumerate(predictions):
+                if prediction is None:
+                    pending.setdefault(normalize_text(texts[i]), []).append(i)
+        
+        if pending:
+            miss_texts = [texts[indices[0]] for indices in pending.values()]
+            if len(miss_texts) == 1 and settings.MICRO_BATCH_ENABLED:
+                # Coalesce single texts with concurrent requests into one forward pass
+                miss_results = [await self.batcher.submit((version, miss_texts[0]))]
+            else:
+                # The batching stage splits these under the token budget
+                miss_results = await self._predict_batch(miss_texts, version)
+            
+            await result_cache.set_many(
+                namespace,
+                version.version,
+                miss_texts,
+                [list(result) for result in miss_results]
+            )
+            for indices, result in zip(pending.values(), miss_results):
+                for i in indices:
+                    predictions[i] = result
+        
+        return [tuple(prediction) for prediction in predictions]
+    
     def _get_vader_sentiment(self, text: str) -> tuple[str, float]:
         """Get sentiment using VADER (fallback method)"""
-        scores = self.vader_analyzer.polarity_scores(text)
-        compound = scores['compound']
-        
-        if compound >= 0.05:
-            return 'positive', abs(compound)
-        elif compound <= -0.05:
-            return 'negative', abs(compound)
-        else:
-            return 'neutral', 1 - abs(compound)
+        return vader_engine.score(text)
+    
+    def _fallback_reason(self, reason: str) -> str:
+        """Metrics reason for a VADER-served request; lexicon mode is not an outage"""
+        return "lexicon" if self.lexicon_only and reason == "model_unavailable" else reason
+    
+    def _vader_results(
+        self,
+        texts: List[str],
+        predictions: List[tuple[str, float]],
+        start_time: float
+    ) -> List[Dict[str, Any]]:
+        """Build responses for texts scored by the VADER engine"""
+        processing_time = (time.time() - start_time) / len(texts)
+        return [
+            {
+                "text": text,
+                "sentiment": sentiment,
+                "confidence": confidence,
+                "processing_time": processing_time,
+                "model_version": self.fallback_version,
+                "degraded": not self.lexicon_only,
+                "timestamp": datetime.utcnow()
+            }
+            for text, (sentiment, confidence) in zip(texts, predictions)
+        ]
     
     async def analyze(
         self, 
@@ -84,36 +206,34 @@ class SentimentAnalyzer:
         start_time = time.time()
         
         try:
-            # Primary analysis with transformer model
-            if self.pipeline:
-                result = self.pipeline(text)[0]
-                sentiment, confidence = self._normalize_sentiment(
-                    result['label'], 
-                    result['score']
-                )
-            else:
+            # Primary analysis with transformer model, on the version active when the request arrived
+            with self.serving() as (version, reason):
+                if version is not None:
+                    sentiment, confidence = (await self._classify([text], version))[0]
+                    model_version = version.version
+            
+            if version is None:
                 # Fallback to VADER
+                reason = self._fallback_reason(reason)
+                record_fallback("sentiment", reason)
                 sentiment, confidence = self._get_vader_sentiment(text)
+                model_version = self.fallback_version
             
             response = {
                 "text": text,
                 "sentiment": sentiment,
                 "confidence": confidence,
                 "processing_time": time.time() - start_time,
-                "model_version": self.model_version,
+                "model_version": model_version,
+                "degraded": version is None and reason != "lexicon",
                 "timestamp": datetime.utcnow()
             }
             
-            # Add emotions if requested (placeholder for now)
+            # Add emotions if requested
             if include_emotions:
-                response["emotions"] = {
-                    "joy": 0.8 if sentiment == 'positive' else 0.2,
-                    "anger": 0.7 if sentiment == 'negative' else 0.1,
-                    "sadness": 0.6 if sentiment == 'negative' else 0.1,
-                    "surprise": 0.3,
-                    "fear": 0.2 if sentiment == 'negative' else 0.05,
-                    "disgust": 0.4 if sentiment == 'negative' else 0.05
-                }
+                emotions, _, emotions_degraded = await self.emotion_analyzer.get_emotions([text])
+                response["emotions"] = emotions[0]
+                response["degraded"] = response["degraded"] or emotions_degraded
             
             # Add topics if requested (placeholder for now)
             if include_topics:
@@ -123,9 +243,12 @@ class SentimentAnalyzer:
                 response["topics"] = topics
             
             return response
-            
+        
+        except OverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Sentiment analysis failed: {e}")
+            record_fallback("sentiment", "error")
             # Fallback to VADER
             sentiment, confidence = self._get_vader_sentiment(text)
             return {
@@ -133,7 +256,8 @@ class SentimentAnalyzer:
                 "sentiment": sentiment,
                 "confidence": confidence,
                 "processing_time": time.time() - start_time,
-                "model_version": f"{self.model_version}-fallback",
+                "model_version": self.fallback_version,
+                "degraded": True,
                 "timestamp": datetime.utcnow()
             }
     
@@ -147,75 +271,61 @@ class SentimentAnalyzer:
         start_time = time.time()
         
         try:
-            # Process in batches for efficiency
             results = []
-            batch_size = settings.BATCH_SIZE
             
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
+            # One bulk cache lookup; only the misses reach the model
+            with self.serving(len(texts)) as (version, reason):
+                if version is not None:
+                    predictions = await self._classify(texts, version)
+            
+            if version is not None:
+                # Emotions for the whole batch in one call, not one per text
+                emotions_degraded = False
+                if include_emotions:
+                    emotion_scores, _, emotions_degraded = await self.emotion_analyzer.get_emotions(texts)
                 
-                if self.pipeline:
-                    # Use transformer pipeline for batch processing
-                    batch_results = self.pipeline(batch)
+                for i, (text, (sentiment, confidence)) in enumerate(zip(texts, predictions)):
+                    response = {
+                        "text": text,
+                        "sentiment": sentiment,
+                        "confidence": confidence,
+                        "processing_time": (time.time() - start_time) / len(texts),
+                        "model_version": version.version,
+                        "degraded": emotions_degraded,
+                        "timestamp": datetime.utcnow()
+                    }
+                    
+                    if include_emotions:
+                        response["emotions"] = emotion_scores[i]
+                    
+                    if include_topics:
+                        words = text.lower().split()
+                        topics = [word for word in words if len(word) > 4][:5]
+                        response["topics"] = topics
                     
-                    for text, result in zip(batch, batch_results):
-                        sentiment, confidence = self._normalize_sentiment(
-                            result['label'], 
-                            result['score']
-                        )
-                        
-                        response = {
-                            "text": text,
-                            "sentiment": sentiment,
-                            "confidence": confidence,
-                            "processing_time": (time.time() - start_time) / len(texts),
-                            "model_version": self.model_version,
-                            "timestamp": datetime.utcnow()
-                        }
-                        
-                        if include_emotions:
-                            response["emotions"] = {
-                                "joy": 0.8 if sentiment == 'positive' else 0.2,
-                                "anger": 0.7 if sentiment == 'negative' else 0.1,
-                                "sadness": 0.6 if sentiment == 'negative' else 0.1,
-                                "surprise": 0.3,
-                                "fear": 0.2 if sentiment == 'negative' else 0.05,
-                                "disgust": 0.4 if sentiment == 'negative' else 0.05
-                            }
-                        
-                        if include_topics:
-                            words = text.lower().split()
-                            topics = [word for word in words if len(word) > 4][:5]
-                            response["topics"] = topics
-                        
-                        results.append(response)
-                else:
-                    # Fallback to VADER for each text
-                    for text in batch:
-                        sentiment, confidence = self._get_vader_sentiment(text)
-                        results.append({
-                            "text": text,
-                            "sentiment": sentiment,
-                            "confidence": confidence,
-                            "processing_time": (time.time() - start_time) / len(texts),
-                            "model_version": f"{self.model_version}-fallback",
-                            "timestamp": datetime.utcnow()
-                        })
+                    results.append(response)
+            else:
+                # VADER over the whole batch, spread across the process pool
+                record_fallback("sentiment", self._fallback_reason(reason), len(texts))
+                predictions = await vader_engine.score_batch(texts)
+                results = self._vader_results(texts, predictions, start_time)
+                
+                if include_emotions:
+                    emotion_scores, _, emotions_degraded = await self.emotion_analyzer.get_emotions(texts)
+                    for response, emotions in zip(results, emotion_scores):
+                        response["emotions"] = emotions
+                        response["degraded"] = response["degraded"] or emotions_degraded
             
             return results
-            
+        
+        except OverloadedError:
+            raise
         except Exception as e:
             logger.error(f"Batch sentiment analysis failed: {e}")
+            record_fallback("sentiment", "error", len(texts))
             # Fallback processing
-            results = []
-            for text in texts:
-                sentiment, confidence = self._get_vader_sentiment(text)
-                results.append({
-                    "text": text,
-                    "sentiment": sentiment,
-                    "confidence": confidence,
-                    "processing_time": (time.time() - start_time) / len(texts),
-                    "model_version": f"{self.model_version}-fallback",
-                    "timestamp": datetime.utcnow()
-                })
+            predictions = await vader_engine.score_batch(texts)
+            results = self._vader_results(texts, predictions, start_time)
+            for response in results:
+                response["degraded"] = True
             return results
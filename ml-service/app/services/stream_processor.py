@@ -0,0 +1,135 @@
+import asyncio
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.models.response_models import SentimentResponse
+from app.services.admission import OverloadedError
+
+# (line number, text or None, error message or None)
+StreamItem = Tuple[int, Optional[str], Optional[str]]
+
+MAX_TEXT_LENGTH = 10000
+
+def _parse_line(line: bytes) -> Tuple[Optional[str], Optional[str]]:
+    """Parse one NDJSON line into a text; accepts a JSON string or {"text": ...}"""
+    try:
+        value = json.loads(line)
+    except ValueError as e:
+        return None, f"Invalid JSON: {e}"
+
+    if isinstance(value, dict):
+        value = value.get("text")
+    if not isinstance(value, str):
+        return None, "Expected a JSON string or an object with a 'text' field"
+    if not value.strip():
+        return None, "Text must not be empty"
+    if len(value) > MAX_TEXT_LENGTH:
+        return None, f"Text exceeds {MAX_TEXT_LENGTH} characters"
+    return value, None
+
+async def iter_ndjson_texts(body: AsyncIterable[bytes]) -> AsyncIterator[StreamItem]:
+    """Yield texts from an NDJSON byte stream as it arrives, one line at a time"""
+    buffer = b""
+    line_number = 0
+
+    async for chunk in body:
+        buffer += chunk
+        if b"\n" not in buffer:
+            if len(buffer) > settings.STREAM_MAX_LINE_BYTES:
+                raise ValueError(f"NDJSON line exceeds {settings.STREAM_MAX_LINE_BYTES} bytes")
+            continue
+
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            text, error = _parse_line(line)
+            yield line_number, text, error
+            line_number += 1
+
+    if buffer.strip():
+        text, error = _parse_line(buffer)
+        yield line_number, text, error
+
+async def iter_chunks(items: AsyncIterable[StreamItem], size: int) -> AsyncIterator[List[StreamItem]]:
+    """Group a stream into lists of at most `size` items"""
+    chunk = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """Streaming response that can keep reading the request body while it responds
+
+    StreamingResponse listens for disconnects by consuming `receive`, which
+    would swallow the request body chunks the generator is still reading.
+    Here a disconnect surfaces through the request stream instead.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+        if self.background is not None:
+            await self.background()
+
+def _encode(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, default=str) + "\n").encode("utf-8")
+
+async def stream_sentiment_ndjson(
+    sentiment_analyzer,
+    body: AsyncIterable[bytes],
+    include_emotions: bool = False,
+    include_topics: bool = False,
+    chunk_size: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """Analyze an NDJSON stream chunk by chunk, emitting NDJSON results as each chunk completes
+
+    Only one chunk is held in memory at a time, and the request body is read
+    only as fast as the client consumes the response.
+    """
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE or settings.BATCH_SIZE
+    processed = 0
+
+    try:
+        async for chunk in iter_chunks(iter_ndjson_texts(body), chunk_size):
+            valid = [(index, text) for index, text, error in chunk if error is None]
+            results = {}
+            while valid:
+                try:
+                    analyzed = await sentiment_analyzer.analyze_batch(
+                        texts=[text for _, text in valid],
+                        include_emotions=include_emotions,
+                        include_topics=include_topics
+                    )
+                except OverloadedError as e:
+                    # Shed mid-stream: hold the chunk and stop reading the body until there is room
+                    await asyncio.sleep(e.retry_after)
+                    continue
+                results = {index: result for (index, _), result in zip(valid, analyzed)}
+                break
+
+            lines = []
+            for index, _, error in chunk:
+                if error is not None:
+                    lines.append(_encode({"index": index, "error": error}))
+                else:
+                    record = SentimentResponse(**results[index]).model_dump(mode="json")
+                    lines.append(_encode({"index": index, **record}))
+            processed += len(chunk)
+
+            yield b"".join(lines)
+
+    except Exception as e:
+        logger.error(f"Streaming analysis failed after {processed} items: {e}")
+        yield _encode({"index": processed, "error": f"Stream aborted: {str(e)}"})
@@ -0,0 +1,80 @@
+from typing import Dict, List, Optional, Sequence
+
+import time
+
+import torch
+
+from app.core.config import settings
+from app.core.metrics import observe_batch, observe_padded_tokens, observe_stage
+
+def tokenize(tokenizer, texts: Sequence[str], max_length: Optional[int] = None) -> List[List[int]]:
+    """Tokenize texts up front, truncated to the model's maximum length"""
+    max_length = min(max_length or settings.MAX_LENGTH, tokenizer.model_max_length)
+    encoded = tokenizer(list(texts), truncation=True, max_length=max_length)
+    return encoded["input_ids"]
+
+def plan_token_batches(
+    lengths: Sequence[int],
+    max_tokens: Optional[int] = None,
+    max_batch_size: Optional[int] = None
+) -> List[List[int]]:
+    """Group item indices into batches whose padded size fits a token budget
+
+    Items are sorted by length so each batch holds similarly sized inputs;
+    the padded cost of a batch is its row count times its longest row.
+    """
+    max_tokens = max_tokens or settings.MAX_TOKENS_PER_BATCH
+    max_batch_size = max_batch_size or settings.BATCH_SIZE
+
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    batches: List[List[int]] = []
+    current: List[int] = []
+
+    for index in order:
+        # Sorted ascending, so this item is the longest in the batch if added
+        padded_cost = lengths[index] * (len(current) + 1)
+        if current and (padded_cost > max_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(index)
+
+    if current:
+        batches.append(current)
+    return batches
+
+def pad_batch(rows: Sequence[List[int]], pad_token_id: int) -> Dict[str, torch.Tensor]:
+    """Right-pad token id lists to the longest row in the batch"""
+    longest = max(len(row) for row in rows)
+    ids = torch.full((len(rows), longest), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(rows), longest), dtype=torch.long)
+
+    for i, row in enumerate(rows):
+        ids[i, :len(row)] = torch.tensor(row, dtype=torch.long)
+        attention_mask[i, :len(row)] = 1
+
+    return {"input_ids": ids, "attention_mask": attention_mask}
+
+def predict_probabilities(
+    backend,
+    tokenizer,
+    input_ids: Sequence[List[int]],
+    model_name: str = "model"
+) -> torch.Tensor:
+    """Run the classifier over token-budgeted batches; rows come back in input order"""
+    probabilities = torch.empty((len(input_ids), backend.num_labels), dtype=torch.float32)
+    if not input_ids:
+        return probabilities
+
+    plan = plan_token_batches([len(ids) for ids in input_ids])
+
+    for batch_indices in plan:
+        batch = pad_batch([input_ids[i] for i in batch_indices], tokenizer.pad_token_id)
+        start = time.perf_counter()
+        logits = backend(batch)
+        probabilities[batch_indices] = torch.softmax(logits, dim=-1)
+
+        observe_stage(model_name, "forward", time.perf_counter() - start)
+        observe_batch(model_name, "forward", len(batch_indices))
+        observe_padded_tokens(model_name, batch["input_ids"].numel())
+
+    return probabilities
@@ -0,0 +1,64 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+
+def npmi_coherence(
+    texts: Sequence[str],
+    topic_keywords: Sequence[Sequence[str]],
+    top_n: int = 10,
+    stop_words: Optional[str] = None
+) -> List[float]:
+    """Mean pairwise NPMI of each topic's top keywords, from document co-occurrence
+
+    One binary document-term matrix restricted to the keywords of all topics
+    is built per call, and every keyword pair of every topic is scored in a
+    single vectorized pass over its co-occurrence counts. Scores range from
+    -1 (never co-occur) to 1 (always co-occur).
+    """
+    keyword_lists = [list(dict.fromkeys(keywords[:top_n])) for keywords in topic_keywords]
+    vocabulary = sorted({keyword for keywords in keyword_lists for keyword in keywords})
+    if not texts or not vocabulary:
+        return [0.0] * len(keyword_lists)
+
+    # Same tokenization as the topic vectorizers, so n-gram keywords match
+    vectorizer = CountVectorizer(
+        vocabulary=vocabulary,
+        ngram_range=(1, max(len(keyword.split()) for keyword in vocabulary)),
+        stop_words=stop_words,
+        binary=True
+    )
+    documents = vectorizer.transform(texts)
+    num_documents = documents.shape[0]
+
+    document_frequency = np.asarray(documents.sum(axis=0)).ravel()
+    cooccurrence = (documents.T @ documents).tocsr()
+
+    # Every keyword pair of every topic, tagged with its topic
+    index = vectorizer.vocabulary_
+    owners, left, right = [], [], []
+    for topic, keywords in enumerate(keyword_lists):
+        ids = np.array([index[keyword] for keyword in keywords], dtype=np.int64)
+        i, j = np.triu_indices(len(ids), k=1)
+        owners.append(np.full(len(i), topic))
+        left.append(ids[i])
+        right.append(ids[j])
+
+    owners = np.concatenate(owners)
+    left = np.concatenate(left)
+    right = np.concatenate(right)
+    if not len(owners):
+        return [0.0] * len(keyword_lists)
+
+    joint = np.asarray(cooccurrence[left, right]).ravel() / num_documents
+    marginal = document_frequency[left] * document_frequency[right] / num_documents**2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        npmi = np.log(joint / marginal) / -np.log(joint)
+    npmi[joint == 0] = -1.0
+    npmi[joint >= 1] = 1.0
+
+    totals = np.bincount(owners, weights=npmi, minlength=len(keyword_lists))
+    counts = np.bincount(owners, minlength=len(keyword_lists))
+    scores = np.divide(totals, counts, out=np.zeros(len(keyword_lists)), where=counts > 0)
+    return [float(score) for score in scores]
@@ -0,0 +1,273 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+from app.core.config import settings
+from app.core.logging import logger
+
+try:
+    import fcntl
+except ImportError:  # No cross-process locking on Windows
+    fcntl = None
+
+def _jobs_dir() -> Path:
+    return Path(settings.MODEL_CACHE_DIR) / "jobs"
+
+def _write_json(path: Path, value: Dict[str, Any]):
+    """Write JSON atomically so pollers never read a partial file"""
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(value, default=str))
+    os.replace(temporary, path)
+
+def _update_job(job_dir: Path, **fields) -> Dict[str, Any]:
+    job = json.loads((job_dir / "job.json").read_text())
+    job.update(fields)
+    _write_json(job_dir / "job.json", job)
+    return job
+
+def process_owner() -> Dict[str, Any]:
+    """This process as the owner of a job (or a topic model version it serves)
+
+    The start time tells a live owner from a later process that reused its pid.
+    """
+    return {"pid": os.getpid(), "started": psutil.Process().create_time()}
+
+def owner_alive(owner: Optional[Dict[str, Any]]) -> bool:
+    if not owner:
+        return False
+    try:
+        return psutil.Process(owner["pid"]).create_time() == owner["started"]
+    except psutil.Error:
+        return False
+
+@contextmanager
+def _jobs_lock():
+    """Serialize job recovery across the worker processes sharing the jobs directory"""
+    with open(_jobs_dir() / ".lock", "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def run_topic_job(job_dir: str):
+    """Run one topic extraction job in a worker process and persist its result"""
+    job_dir = Path(job_dir)
+    job = _update_job(job_dir, status="running", stage="loading_model", progress=0.1,
+                      started_at=datetime.utcnow().isoformat())
+
+    try:
+        # Imported here so the parent process never pays for it
+        from app.services.topic_modeler import TopicModeler
+
+        texts = json.loads((job_dir / "input.json").read_text())
+        topic_modeler = TopicModeler()
+
+        async def extract() -> Dict[str, Any]:
+            try:
+                await topic_modeler.load_model()
+            except Exception as e:
+                logger.error(f"Topic job {job['id']} continuing without BERTopic: {e}")
+            _update_job(job_dir, stage="fitting", progress=0.3)
+            return await topic_modeler.extract_topics(
+                texts,
+                num_topics=job["num_topics"],
+                min_topic_size=job["min_topic_size"]
+            )
+
+        result = asyncio.run(extract())
+        _write_json(job_dir / "result.json", result)
+        _update_job(job_dir, status="completed", stage="done", progress=1.0,
+                    finished_at=datetime.utcnow().isoformat())
+
+    except Exception as e:
+        logger.error(f"Topic job {job['id']} failed: {e}")
+        _update_job(job_dir, status="failed", stage="done", error=str(e),
+                    finished_at=datetime.utcnow().isoformat())
+
+def parse_corpus(data: bytes, filename: str = "") -> List[str]:
+    """Texts from an uploaded corpus: NDJSON (strings or {"text": ...}) or one text per line"""
+    lines = [line for line in data.decode("utf-8").splitlines() if line.strip()]
+    if not filename.endswith((".ndjson", ".jsonl")):
+        return [line.strip() for line in lines]
+
+    texts = []
+    for line_number, line in enumerate(lines, start=1):
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+        if isinstance(value, dict):
+            value = value.get("text")
+        if not isinstance(value, str):
+            raise ValueError(f"Line {line_number} must be a JSON string or an object with a 'text' field")
+        texts.append(value)
+    return texts
+
+class TopicJobManager:
+    """Runs large topic extraction jobs in a process pool, persisting state under MODEL_CACHE_DIR/jobs"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or settings.TOPIC_JOB_WORKERS
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+        self._stopping = False
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            logger.info(f"Starting topic job pool with {self.max_workers} workers")
+            # One job per process, so a large fit returns all its memory when done
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=1
+            )
+        return self._pool
+
+    def _job_dir(self, job_id: str) -> Path:
+        # Job ids are generated hex strings; reject anything that could escape the jobs directory
+        if not job_id.isalnum():
+            raise KeyError(job_id)
+        return _jobs_dir() / job_id
+
+    def _enqueue(self, job_id: str):
+        future = self._get_pool().submit(run_topic_job, str(self._job_dir(job_id)))
+        self._futures[job_id] = future
+        future.add_done_callback(lambda f, job_id=job_id: self._on_done(job_id, f))
+
+    def _on_done(self, job_id: str, future: Future):
+        self._futures.pop(job_id, None)
+        error = future.exception() if not future.cancelled() else None
+        if error is not None and not self._stopping:
+            # The worker died before it could record the failure itself
+            logger.error(f"Topic job {job_id} crashed: {error}")
+            if isinstance(error, BrokenProcessPool):
+                self._pool = None
+            _update_job(self._job_dir(job_id), status="failed", stage="done", error=str(error),
+                        finished_at=datetime.utcnow().isoformat())
+
+    def submit(self, texts: List[str], num_topics: int = 10, min_topic_size: int = 10) -> Dict[str, Any]:
+        """Persist a corpus and queue a job for it"""
+        job_id = uuid.uuid4().hex
+        job_dir = self._job_dir(job_id)
+        job_dir.mkdir(parents=True)
+
+        (job_dir / "input.json").write_text(json.dumps(texts))
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "stage": "queued",
+            "progress": 0.0,
+            "num_texts": len(texts),
+            "num_topics": num_topics,
+            "min_topic_size": min_topic_size,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "owner": process_owner()
+        }
+        _write_json(job_dir / "job.json", job)
+
+        self._enqueue(job_id)
+        logger.info(f"Queued topic job {job_id} for {len(texts)} texts")
+        return job
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        """Current state of a job; raises KeyError if it does not exist"""
+        path = self._job_dir(job_id) / "job.json"
+        if not path.exists():
+            raise KeyError(job_id)
+        return json.loads(path.read_text())
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Result of a completed job, or None if it has not completed"""
+        job = self.get(job_id)
+        if job["status"] != "completed":
+            return None
+        return json.loads((self._job_dir(job_id) / "result.json").read_text())
+
+    def recover(self):
+        """Requeue unfinished jobs whose owning process has exited, and prune expired ones
+
+        Jobs a live sibling worker is still running are left alone; a job is
+        claimed for this process under a lock, so only one worker requeues it.
+        """
+        if not _jobs_dir().exists():
+            return
+
+        cutoff = time.time() - settings.TOPIC_JOB_RETENTION_HOURS * 3600
+        with _jobs_lock():
+            for job_dir in _jobs_dir().iterdir():
+                if not job_dir.is_dir():
+                    continue
+                path = job_dir / "job.json"
+                if not path.exists():
+                    shutil.rmtree(job_dir, ignore_errors=True)
+                    continue
+
+                try:
+                    job = json.loads(path.read_text())
+                    if job["status"] in ("queued", "running"):
+                        if owner_alive(job.get("owner")):
+                            continue
+                        logger.info(f"Requeuing interrupted topic job {job['id']}")
+                        _update_job(job_dir, status="queued", stage="queued", progress=0.0, owner=process_owner())
+                        self._enqueue(job["id"])
+                    elif path.stat().st_mtime < cutoff:
+                        shutil.rmtree(job_dir, ignore_errors=True)
+                except Exception as e:
+                    # A job that cannot be recovered must not stop the service from starting
+                    logger.error(f"Failed to recover topic job {job_dir.name}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "active": sum(1 for future in self._futures.values() if future.running()),
+            "pending": len(self._futures)
+        }
+
+    async def shutdown(self):
+        """Stop the pool without waiting for running fits, leaving their jobs for recover()
+
+        A fit over a large corpus can outlast the server's graceful timeout, so
+        the children are terminated and every unfinished job is queued again
+        with no owner; the next worker to start requeues it.
+        """
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+
+        self._stopping = True
+        unfinished = list(self._futures)
+        processes = list((pool._processes or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        await asyncio.to_thread(lambda: [process.join(5) for process in processes])
+
+        for job_id in unfinished:
+            try:
+                if self.get(job_id)["status"] in ("queued", "running"):
+                    _update_job(self._job_dir(job_id), status="queued", stage="queued", progress=0.0, owner=None)
+            except Exception as e:
+                logger.error(f"Failed to release topic job {job_id}: {e}")
+        if unfinished:
+            logger.info(f"Released {len(unfinished)} unfinished topic jobs for recovery")
+
+# Shared job manager
+topic_job_manager = TopicJobManager()
@@ -1,30 +1,81 @@
+import asyncio
+import json
+import os
+import shutil
 import time
-from typing import List, Dict, Any
-from bertopic import BERTopic
-from sklearn.feature_extraction.text import TfidfVectorizer
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Set
 from datetime import datetime
 import re
 
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.metrics import record_fallback, stage_timer
+from app.services.inference_executor import topic_executor
+from app.services.embedding_store import EmbeddingStore
+from app.services.topic_jobs import owner_alive, process_owner
+
+# BERTopic (with UMAP/HDBSCAN) and scikit-learn are imported on first use, not at startup
+if TYPE_CHECKING:
+    from bertopic import BERTopic
+    from app.services.online_topics import OnlineTopicModel
+
+def _topics_dir() -> Path:
+    return Path(settings.MODEL_CACHE_DIR) / "topics"
+
+def _in_use_dir() -> Path:
+    """Per-process markers naming the version each worker serves, so pruning never removes it"""
+    return _topics_dir() / ".in_use"
+
+class FittedTopicModel:
+    """A fitted topic model and its metadata; never refit once published"""
+
+    def __init__(
+        self,
+        model: "BERTopic",
+        version: str,
+        topics: List[Dict[str, Any]],
+        total_documents: int,
+        fitted_at: str
+    ):
+        self.model = model
+        self.version = version
+        self.topics = topics
+        self.total_documents = total_documents
+        self.fitted_at = fitted_at
+        self.topic_names = {topic["id"]: topic["name"] for topic in topics}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "topics": self.topics,
+            "num_topics": len(self.topics),
+            "total_documents": self.total_documents,
+            "fitted_at": self.fitted_at
+        }
 
 class TopicModeler:
     def __init__(self):
-        self.model = None
+        self.embedding_model = None
+        self.embedding_store: Optional[EmbeddingStore] = None
+        self.current: Optional[FittedTopicModel] = None
+        self.online: Optional["OnlineTopicModel"] = None
         self.model_version = "1.0.0"
+        self._fit_lock = asyncio.Lock()
+        self._pointer_mtime: Optional[int] = None
         
     async def load_model(self):
-        """Load the topic modeling components"""
+        """Load the embedding model and the most recently fitted topic model off the event loop"""
+        if settings.TOPIC_ENGINE == "hashing":
+            logger.info("TOPIC_ENGINE is hashing, skipping the topic embedding model")
+            return
+        
         try:
-            logger.info("Initializing BERTopic model")
-            
-            # Initialize BERTopic with custom settings
-            self.model = BERTopic(
-                min_topic_size=settings.MIN_TOPIC_SIZE,
-                nr_topics=settings.MAX_TOPICS,
-                calculate_probabilities=True,
-                verbose=True
-            )
+            logger.info(f"Loading topic embedding model: {settings.TOPIC_EMBEDDING_MODEL}")
+            await asyncio.to_thread(self._load_sync)
+            if self.current is not None:
+                logger.info(f"Loaded fitted topic model {self.current.version}")
             
             logger.info("Topic modeling components loaded successfully")
             
@@ -32,17 +83,249 @@ class TopicModeler:
             logger.error(f"Failed to load topic modeling components: {e}")
             raise
     
+    def _load_sync(self):
+        try:
+            from sentence_transformers import SentenceTransformer
+            from app.services.online_topics import OnlineTopicModel
+        except ImportError:  # The hashing engine works without BERTopic
+            logger.warning("BERTopic is not installed, using the hashing topic engine")
+            return
+        
+        # Shared by every fit and transform; BERTopic would otherwise reload it per instance
+        self.embedding_model = SentenceTransformer(
+            settings.TOPIC_EMBEDDING_MODEL,
+            cache_folder=settings.MODEL_CACHE_DIR
+        )
+        
+        if settings.EMBEDDING_CACHE_ENABLED:
+            self.embedding_store = EmbeddingStore.for_model(settings.TOPIC_EMBEDDING_MODEL)
+        
+        self.online = OnlineTopicModel(self.embedding_model, self._embed, self._describe_topics)
+        self._serve(self._load_saved())
+    
+    async def warm_up(self, texts: List[str]):
+        """Encode a few texts so the first real request does not pay for lazy initialisation"""
+        if self.embedding_model is not None:
+            # Straight to the encoder, so warm-up texts never land in the embedding cache
+            await topic_executor.run(self.embedding_model.encode, texts, show_progress_bar=False)
+    
+    @property
+    def is_loaded(self) -> bool:
+        return self.embedding_model is not None
+    
+    def _embed(self, texts: List[str]):
+        """Sentence embeddings, reusing stored ones so only unseen texts are encoded (blocking)"""
+        if self.embedding_store is not None:
+            return self.embedding_store.embed(texts, self.embedding_model)
+        return self.embedding_model.encode(texts, show_progress_bar=False)
+    
+    def _new_model(self, min_topic_size: Optional[int] = None) -> "BERTopic":
+        """A fresh, unfitted BERTopic instance"""
+        from bertopic import BERTopic
+        
+        return BERTopic(
+            embedding_model=self.embedding_model,
+            min_topic_size=min_topic_size or settings.MIN_TOPIC_SIZE,
+            nr_topics=settings.MAX_TOPICS,
+            calculate_probabilities=True,
+            verbose=False
+        )
+    
+    def _fit_sync(self, model: "BERTopic", texts: List[str]):
+        model.fit(texts, embeddings=self._embed(texts))
+    
+    def _load_version(self, version: str) -> FittedTopicModel:
+        from bertopic import BERTopic
+        
+        path = _topics_dir() / version
+        metadata = json.loads((path / "metadata.json").read_text())
+        model = BERTopic.load(str(path), embedding_model=self.embedding_model)
+        return FittedTopicModel(
+            model,
+            version,
+            metadata["topics"],
+            metadata["total_documents"],
+            metadata["fitted_at"]
+        )
+    
+    def _pointer_mtime_ns(self) -> Optional[int]:
+        try:
+            return (_topics_dir() / "current").stat().st_mtime_ns
+        except OSError:
+            return None
+    
+    def _load_saved(self) -> Optional[FittedTopicModel]:
+        """Load the version named by the `current` pointer, if any"""
+        pointer = _topics_dir() / "current"
+        self._pointer_mtime = self._pointer_mtime_ns()
+        if not pointer.exists():
+            return None
+        return self._load_version(pointer.read_text().strip())
+    
+    def _serve(self, fitted: Optional[FittedTopicModel]):
+        """Swap in a fitted model and record that this process serves its version"""
+        self.current = fitted
+        if fitted is None:
+            return
+        marker = _in_use_dir() / f"{os.getpid()}.json"
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        temporary = marker.with_suffix(".tmp")
+        temporary.write_text(json.dumps({**process_owner(), "version": fitted.version}))
+        os.replace(temporary, marker)
+    
+    def _versions_in_use(self) -> Set[str]:
+        """Versions served by live processes; markers of exited ones are removed"""
+        in_use = set()
+        if not _in_use_dir().exists():
+            return in_use
+        for marker in _in_use_dir().glob("*.json"):
+            try:
+                owner = json.loads(marker.read_text())
+            except (OSError, ValueError):
+                continue
+            if owner_alive(owner):
+                in_use.add(owner["version"])
+            else:
+                marker.unlink(missing_ok=True)
+        return in_use
+    
+    async def sync_current(self):
+        """Serve the version another worker fitted since this one last read the `current` pointer"""
+        if not self.is_loaded or self._pointer_mtime_ns() == self._pointer_mtime:
+            return
+        async with self._fit_lock:
+            if self._pointer_mtime_ns() == self._pointer_mtime:
+                return
+            fitted = await asyncio.to_thread(self._load_saved)
+            if fitted is not None and (self.current is None or fitted.version != self.current.version):
+                logger.info(f"Loading topic model {fitted.version}, fitted by another worker")
+                self._serve(fitted)
+    
+    def _fit_and_save(self, texts: List[str], min_topic_size: int, version: str) -> FittedTopicModel:
+        """Fit a new model, persist it and load it back as the serving copy (blocking)"""
+        model = self._new_model(min_topic_size)
+        self._fit_sync(model, texts)
+        topics = self._describe_topics(model, settings.MAX_TOPICS, texts)
+        
+        path = _topics_dir() / version
+        model.save(
+            str(path),
+            serialization="safetensors",
+            save_ctfidf=True,
+            save_embedding_model=settings.TOPIC_EMBEDDING_MODEL
+        )
+        (path / "metadata.json").write_text(json.dumps({
+            "version": version,
+            "topics": topics,
+            "total_documents": len(texts),
+            "fitted_at": datetime.utcnow().isoformat()
+        }, indent=2))
+        
+        # Serve the saved copy, so a fresh fit behaves exactly like one loaded after a restart
+        fitted = self._load_version(version)
+        
+        pointer = _topics_dir() / "current"
+        temporary = pointer.with_suffix(".tmp")
+        temporary.write_text(version)
+        os.replace(temporary, pointer)
+        self._pointer_mtime = self._pointer_mtime_ns()
+        return fitted
+    
+    def _prune_versions(self):
+        """Remove all but the newest TOPIC_MODEL_KEEP_VERSIONS saved models
+
+        The version the `current` pointer names and any version a live worker
+        still serves are kept regardless.
+        """
+        keep = self._versions_in_use()
+        pointer = _topics_dir() / "current"
+        if pointer.exists():
+            keep.add(pointer.read_text().strip())
+        if self.current is not None:
+            keep.add(self.current.version)
+        
+        versions = sorted(p for p in _topics_dir().iterdir() if p.is_dir() and not p.name.startswith("."))
+        for path in versions[:-settings.TOPIC_MODEL_KEEP_VERSIONS]:
+            if path.name not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+    
+    async def fit(self, texts: List[str], min_topic_size: Optional[int] = None) -> Dict[str, Any]:
+        """Fit a new topic model on a corpus, save it and swap it in for assignment"""
+        start_time = time.time()
+        
+        if not self.is_loaded:
+            raise RuntimeError("Topic embedding model is not loaded")
+        
+        processed_texts = self._preprocess_texts(texts)
+        min_topic_size = min_topic_size or settings.MIN_TOPIC_SIZE
+        if len(processed_texts) < min_topic_size:
+            raise ValueError(f"Need at least {min_topic_size} valid texts for topic modeling")
+        
+        # One fit at a time; assignment keeps using the current model meanwhile
+        async with self._fit_lock:
+            version = f"{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+            logger.info(f"Fitting topic model {version} on {len(processed_texts)} texts")
+            
+            fitted = await topic_executor.run(
+                self._fit_and_save, processed_texts, min_topic_size, version
+            )
+            self._serve(fitted)
+            self._prune_versions()
+        
+        logger.info(f"Topic model {version} fitted with {len(fitted.topics)} topics")
+        return {**fitted.to_dict(), "processing_time": time.time() - start_time}
+    
+    def _assign_sync(self, fitted: FittedTopicModel, texts: List[str]) -> List[Dict[str, Any]]:
+        documents = [self._clean_text(text) for text in texts]
+        topics, probabilities = fitted.model.transform(documents, embeddings=self._embed(documents))
+        
+        assignments = []
+        for i, (text, topic_id) in enumerate(zip(texts, topics)):
+            topic_id = int(topic_id)
+            probability = 0.0
+            if probabilities is not None:
+                row = probabilities[i]
+                probability = float(row.max()) if getattr(row, "ndim", 0) else float(row)
+            
+            assignments.append({
+                "text": text,
+                "topic_id": topic_id,
+                "topic_name": fitted.topic_names.get(topic_id, "Outliers" if topic_id == -1 else f"Topic {topic_id}"),
+                "probability": min(max(probability, 0.0), 1.0)
+            })
+        return assignments
+    
+    async def assign(self, texts: List[str]) -> Dict[str, Any]:
+        """Assign texts to the topics of the current fitted model without refitting"""
+        start_time = time.time()
+        
+        await self.sync_current()
+        # Hold one model for the whole request, even if a fit swaps in a new one
+        fitted = self.current
+        if fitted is None:
+            raise LookupError("No fitted topic model is available")
+        
+        assignments = await topic_executor.run(self._assign_sync, fitted, texts)
+        
+        return {
+            "assignments": assignments,
+            "model_version": fitted.version,
+            "processing_time": time.time() - start_time,
+            "timestamp": datetime.utcnow()
+        }
+    
+    def _clean_text(self, text: str) -> str:
+        """Strip URLs, mentions, hashtags and extra whitespace"""
+        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+        text = re.sub(r'@\w+|#\w+', '', text)
+        return ' '.join(text.split())
+    
     def _preprocess_texts(self, texts: List[str]) -> List[str]:
         """Preprocess texts for topic modeling"""
         processed_texts = []
         
         for text in texts:
-            # Remove URLs, mentions, hashtags
-            text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
-            text = re.sub(r'@\w+|#\w+', '', text)
-            
-            # Remove extra whitespace
-            text = ' '.join(text.split())
+            text = self._clean_text(text)
             
             # Filter out very short texts
             if len(text.split()) >= 3:
@@ -54,10 +337,52 @@ class TopicModeler:
         """Extract keywords from topic word tuples"""
         return [word for word, _ in topic_words[:10]]  # Top 10 keywords
     
-    def _calculate_coherence_score(self, topic_id: int) -> float:
-        """Calculate a simple coherence score for a topic"""
-        # Placeholder implementation - in production, use proper coherence metrics
-        return 0.5 + (topic_id % 5) * 0.1  # Mock coherence between 0.5-0.9
+    def _add_coherence_scores(
+        self,
+        topics: List[Dict[str, Any]],
+        texts: List[str],
+        stop_words: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Score each topic's keywords by NPMI over the documents it was fitted on"""
+        from app.services.topic_coherence import npmi_coherence
+        
+        scores = npmi_coherence(texts, [topic["keywords"] for topic in topics], stop_words=stop_words)
+        for topic, score in zip(topics, scores):
+            topic["coherence_score"] = score
+        return topics
+    
+    async def push_online(self, texts: List[str], flush: bool = False) -> Dict[str, Any]:
+        """Add arriving documents to the online topic model"""
+        if self.online is None:
+            raise RuntimeError("Topic embedding model is not loaded")
+        
+        documents = [text for text in (self._clean_text(text) for text in texts) if text]
+        await self.online.push(documents, flush=flush)
+        return {**self.online.to_dict(), "accepted": len(documents)}
+    
+    def _describe_topics(self, model: "BERTopic", num_topics: int, texts: List[str]) -> List[Dict[str, Any]]:
+        """Largest topics of a fitted model, excluding outliers"""
+        topic_info = model.get_topic_info()
+        
+        # Extract topic details
+        extracted_topics = []
+        for idx, row in topic_info.iterrows():
+            if row['Topic'] != -1:  # Skip outlier topic
+                topic_words = model.get_topic(row['Topic'])
+                keywords = self._extract_topic_keywords(topic_words)
+                
+                extracted_topics.append({
+                    "id": int(row['Topic']),
+                    "name": f"Topic {row['Topic']}: {keywords[0] if keywords else 'Unknown'}",
+                    "keywords": keywords,
+                    "size": int(row['Count'])
+                })
+        
+        # Sort by size (most common topics first)
+        extracted_topics.sort(key=lambda x: x['size'], reverse=True)
+        
+        # Limit to requested number of topics
+        return self._add_coherence_scores(extracted_topics[:num_topics], texts)
     
     async def extract_topics(
         self, 
@@ -70,55 +395,47 @@ class TopicModeler:
         
         try:
             # Preprocess texts
-            processed_texts = self._preprocess_texts(texts)
+            with stage_timer("topics", "preprocess"):
+                processed_texts = self._preprocess_texts(texts)
             
             if len(processed_texts) < min_topic_size:
                 raise ValueError(f"Need at least {min_topic_size} valid texts for topic modeling")
             
-            if self.model:
-                # Use BERTopic for topic extraction
-                topics, probabilities = self.model.fit_transform(processed_texts)
-                topic_info = self.model.get_topic_info()
-                
-                # Extract topic details
-                extracted_topics = []
-                for idx, row in topic_info.iterrows():
-                    if row['Topic'] != -1:  # Skip outlier topic
-                        topic_words = self.model.get_topic(row['Topic'])
-                        keywords = self._extract_topic_keywords(topic_words)
-                        
-                        extracted_topics.append({
-                            "id": int(row['Topic']),
-                            "name": f"Topic {row['Topic']}: {keywords[0] if keywords else 'Unknown'}",
-                            "keywords": keywords,
-                            "size": int(row['Count']),
-                            "coherence_score": self._calculate_coherence_score(row['Topic'])
-                        })
-                
-                # Sort by size (most common topics first)
-                extracted_topics.sort(key=lambda x: x['size'], reverse=True)
-                
-                # Limit to requested number of topics
-                extracted_topics = extracted_topics[:num_topics]
+            if self.is_loaded:
+                # Fit a throwaway instance; the shared fitted model is never refit per request
+                model = self._new_model(min_topic_size)
+                await topic_executor.run(self._fit_sync, model, processed_texts)
+                extracted_topics = await topic_executor.run(
+                    self._describe_topics, model, num_topics, processed_texts
+                )
+                model_version = self.model_version
                 
             else:
-                # Fallback: simple TF-IDF based topic extraction
-                extracted_topics = self._simple_topic_extraction(processed_texts, num_topics)
+                # Hashing + NMF engine: CPU-only, no embedding model needed
+                if settings.TOPIC_ENGINE != "hashing":
+                    record_fallback("topics", "model_unavailable")
+                extracted_topics = await topic_executor.run(
+                    self._simple_topic_extraction, processed_texts, num_topics
+                )
+                model_version = f"{self.model_version}-hashing"
             
             return {
                 "topics": extracted_topics,
                 "num_topics": len(extracted_topics),
                 "total_documents": len(processed_texts),
                 "processing_time": time.time() - start_time,
-                "model_version": self.model_version,
+                "model_version": model_version,
                 "timestamp": datetime.utcnow()
             }
             
         except Exception as e:
             logger.error(f"Topic modeling failed: {e}")
+            record_fallback("topics", "error")
             # Fallback to simple extraction
             processed_texts = self._preprocess_texts(texts)
-            extracted_topics = self._simple_topic_extraction(processed_texts, num_topics)
+            extracted_topics = await topic_executor.run(
+                self._simple_topic_extraction, processed_texts, num_topics
+            )
             
             return {
                 "topics": extracted_topics,
@@ -130,44 +447,17 @@ class TopicModeler:
             }
     
     def _simple_topic_extraction(self, texts: List[str], num_topics: int) -> List[Dict[str, Any]]:
-        """Simple TF-IDF based topic extraction as fallback"""
+        """Hashing + mini-batch NMF topic extraction as fallback (blocking)"""
+        from app.services.hashing_topics import HashingTopicEngine
+        
         try:
-            # Use TF-IDF to find important terms
-            vectorizer = TfidfVectorizer(
-                max_features=100,
-                stop_words='english',
-                ngram_range=(1, 2),
-                min_df=2
-            )
-            
-            tfidf_matrix = vectorizer.fit_transform(texts)
-            feature_names = vectorizer.get_feature_names_out()
-            
-            # Get top terms
-            scores = tfidf_matrix.sum(axis=0).A1
-            term_scores = list(zip(feature_names, scores))
-            term_scores.sort(key=lambda x: x[1], reverse=True)
-            
-            # Create simple topics based on top terms
-            topics = []
-            terms_per_topic = len(term_scores) // num_topics if len(term_scores) >= num_topics else len(term_scores)
+            if not texts:
+                return []
             
-            for i in range(min(num_topics, len(term_scores) // 5)):
-                start_idx = i * terms_per_topic
-                end_idx = start_idx + terms_per_topic
-                topic_terms = term_scores[start_idx:end_idx]
-                
-                keywords = [term for term, _ in topic_terms[:10]]
-                
-                topics.append({
-                    "id": i,
-                    "name": f"Topic {i}: {keywords[0] if keywords else 'Unknown'}",
-                    "keywords": keywords,
-                    "size": len(texts) // num_topics,  # Rough estimate
-                    "coherence_score": 0.6  # Default coherence
-                })
+            engine = HashingTopicEngine(num_topics).fit(texts)
+            topics = engine.topics(texts)[:num_topics]
             
-            return topics
+            return self._add_coherence_scores(topics, texts, stop_words='english')
             
         except Exception as e:
             logger.error(f"Simple topic extraction failed: {e}")
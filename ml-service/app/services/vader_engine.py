@@ -0,0 +1,117 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+from app.core.config import settings
+from app.core.logging import logger
+
+# One analyzer per worker process, built by the pool initializer
+_worker_analyzer: Optional[SentimentIntensityAnalyzer] = None
+
+def _initialize_worker():
+    global _worker_analyzer
+    _worker_analyzer = SentimentIntensityAnalyzer()
+
+def vader_label(compound: float) -> tuple[str, float]:
+    """Map a VADER compound score to a sentiment label and confidence"""
+    if compound >= 0.05:
+        return 'positive', abs(compound)
+    elif compound <= -0.05:
+        return 'negative', abs(compound)
+    else:
+        return 'neutral', 1 - abs(compound)
+
+def score_texts(texts: Sequence[str], analyzer: SentimentIntensityAnalyzer) -> List[tuple[str, float]]:
+    """Score a list of texts with a single analyzer"""
+    polarity_scores = analyzer.polarity_scores
+    return [vader_label(polarity_scores(text)['compound']) for text in texts]
+
+def _score_chunk(texts: List[str]) -> List[tuple[str, float]]:
+    return score_texts(texts, _worker_analyzer)
+
+class VaderEngine:
+    """Bulk VADER scoring spread across a process pool"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        inline_threshold: Optional[int] = None
+    ):
+        self.max_workers = max_workers or settings.VADER_WORKERS or os.cpu_count() or 1
+        self.chunk_size = chunk_size or settings.VADER_CHUNK_SIZE
+        self.inline_threshold = (
+            inline_threshold if inline_threshold is not None else settings.VADER_INLINE_THRESHOLD
+        )
+        self.analyzer = SentimentIntensityAnalyzer()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        # Statistics
+        self.texts_scored = 0
+        self.pool_batches = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            logger.info(f"Starting VADER process pool with {self.max_workers} workers")
+            # Spawned workers don't inherit torch thread pools or model weights
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialize_worker
+            )
+        return self._pool
+
+    def score(self, text: str) -> tuple[str, float]:
+        """Score a single text in-process"""
+        self.texts_scored += 1
+        return vader_label(self.analyzer.polarity_scores(text)['compound'])
+
+    async def score_batch(self, texts: Sequence[str]) -> List[tuple[str, float]]:
+        """Score a list of texts, fanning large lists out across the pool in chunks"""
+        texts = list(texts)
+        self.texts_scored += len(texts)
+
+        if len(texts) <= self.inline_threshold or self.max_workers <= 1:
+            return score_texts(texts, self.analyzer)
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        # Spread work over every worker, but keep chunks small enough to balance
+        chunk_size = min(self.chunk_size, -(-len(texts) // self.max_workers))
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        self.pool_batches += 1
+
+        try:
+            chunk_results = await asyncio.gather(*[
+                loop.run_in_executor(pool, _score_chunk, chunk) for chunk in chunks
+            ])
+        except Exception as e:
+            # A broken pool should not take the fallback path down with it
+            logger.error(f"VADER process pool failed, scoring in-process: {e}")
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            return score_texts(texts, self.analyzer)
+
+        return [result for chunk in chunk_results for result in chunk]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "chunk_size": self.chunk_size,
+            "inline_threshold": self.inline_threshold,
+            "pool_running": self._pool is not None,
+            "texts_scored": self.texts_scored,
+            "pool_batches": self.pool_batches
+        }
+
+    async def shutdown(self):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+# Shared engine for the VADER fallback and lexicon-only mode
+vader_engine = VaderEngine()
@@ -0,0 +1,140 @@
+"""Benchmark runner
+
+    python -m benchmarks micro --output reports/micro.json
+    python -m benchmarks load --serve --duration 30 --output reports/load.json
+    python -m benchmarks compare reports/base.json reports/micro.json
+
+Everything runs offline against tiny randomly initialized stand-in models,
+so absolute numbers are not production numbers; compare reports from the
+same machine to see whether a change helps or hurts.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict
+
+from benchmarks.corpus import ReviewCorpus
+from benchmarks.environment import apply_env, benchmark_env
+from benchmarks.report import build_report, compare_reports, write_report
+
+DEFAULT_SCENARIOS = "/analyze=20,/analyze/batch=5,/emotions=20,/topics=1"
+
+def _parse_scenarios(value: str) -> Dict[str, float]:
+    scenarios = {}
+    for item in value.split(","):
+        endpoint, _, rps = item.partition("=")
+        scenarios[endpoint.strip()] = float(rps)
+    return scenarios
+
+def _emit(report, output: str):
+    if output:
+        write_report(report, output)
+        print(f"Report written to {output}")
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True, default=str))
+
+def run_micro(args):
+    apply_env(benchmark_env(args.work_dir, cache=args.cache, topic_engine=args.topic_engine))
+    from benchmarks.micro import run_micro_benchmarks
+
+    texts = ReviewCorpus(seed=args.seed).generate(args.corpus_size)
+    results = asyncio.run(run_micro_benchmarks(
+        texts,
+        batch_size=args.batch_size,
+        single_count=args.single_count,
+        topic_count=args.topic_count,
+        repeats=args.repeats,
+        only=args.only
+    ))
+    _emit(build_report("micro", vars(args), results), args.output)
+
+def run_load(args):
+    from benchmarks.load import LocalServer, run_load as drive
+
+    texts = ReviewCorpus(seed=args.seed).generate(args.corpus_size)
+    scenarios = _parse_scenarios(args.scenarios)
+
+    def load(base_url: str):
+        return asyncio.run(drive(
+            base_url,
+            texts,
+            scenarios,
+            duration=args.duration,
+            batch_size=args.batch_size,
+            topic_size=args.topic_size
+        ))
+
+    if args.serve:
+        env = benchmark_env(args.work_dir, cache=args.cache, topic_engine=args.topic_engine)
+        with LocalServer(env, port=args.port) as server:
+            results = load(server.base_url)
+    else:
+        results = load(args.url)
+
+    _emit(build_report("load", vars(args), results), args.output)
+
+def run_compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows = compare_reports(baseline, candidate)
+    for row in rows:
+        if abs(row["change"]) <= args.tolerance:
+            marker = "="
+        else:
+            marker = "+" if row["improved"] else "-"
+        print(
+            f"{marker} {row['benchmark']:<36} {row['metric']:<18} "
+            f"{row['baseline']:>12.3f} -> {row['candidate']:>12.3f} ({row['change']:+.1%})"
+        )
+
+    regressions = [row for row in rows if not row["improved"] and abs(row["change"]) > args.tolerance]
+    return 1 if regressions and args.fail_on_regression else 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--work-dir", default=".benchmarks", help="Where stand-in models and caches are kept")
+    common.add_argument("--seed", type=int, default=13, help="Corpus seed")
+    common.add_argument("--corpus-size", type=int, default=1000)
+    common.add_argument("--batch-size", type=int, default=32)
+    common.add_argument("--topic-engine", default="bertopic", choices=["bertopic", "hashing"])
+    common.add_argument("--cache", action="store_true", help="Keep the result and embedding caches enabled")
+    common.add_argument("--output", default="", help="Report path; printed to stdout if omitted")
+
+    micro = commands.add_parser("micro", parents=[common], help="Time service methods directly")
+    micro.add_argument("--repeats", type=int, default=3)
+    micro.add_argument("--single-count", type=int, default=200)
+    micro.add_argument("--topic-count", type=int, default=500)
+    micro.add_argument("--only", nargs="*", default=[], help="Benchmark name prefixes, e.g. sentiment topics.fit")
+    micro.set_defaults(handler=run_micro)
+
+    load = commands.add_parser("load", parents=[common], help="Drive the HTTP endpoints at target RPS")
+    load.add_argument("--url", default="http://127.0.0.1:8000")
+    load.add_argument("--serve", action="store_true", help="Start the service with the stand-in models")
+    load.add_argument("--port", type=int, default=8765)
+    load.add_argument("--scenarios", default=DEFAULT_SCENARIOS, help="endpoint=rps pairs, comma separated")
+    load.add_argument("--duration", type=float, default=30.0, help="Seconds per endpoint")
+    load.add_argument("--topic-size", type=int, default=50)
+    load.set_defaults(handler=run_load)
+
+    compare = commands.add_parser("compare", help="Show metric changes between two reports")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+    compare.add_argument("--tolerance", type=float, default=0.1, help="Relative change treated as noise")
+    compare.add_argument("--fail-on-regression", action="store_true")
+    compare.set_defaults(handler=run_compare)
+
+    args = parser.parse_args(argv)
+    handler = args.handler
+    del args.handler
+    return handler(args) or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import random
+from typing import List, Optional
+
+# Review fragments grouped by aspect and polarity; reviews are stitched from these
+PRODUCTS = ["phone", "laptop", "headphones", "camera", "charger", "app", "subscription", "blender", "jacket", "router"]
+
+ASPECTS = {
+    "delivery": {
+        "positive": ["arrived two days early", "shipping was fast", "the package was well protected"],
+        "negative": ["delivery took three weeks", "the box arrived crushed", "tracking never updated"]
+    },
+    "quality": {
+        "positive": ["build quality is excellent", "feels solid and premium", "works exactly as described"],
+        "negative": ["stopped working after a week", "the plastic feels cheap", "the screen cracked on day one"]
+    },
+    "battery": {
+        "positive": ["battery lasts all day", "charges really quickly", "battery life is amazing"],
+        "negative": ["battery drains in a few hours", "it will not hold a charge", "charging is painfully slow"]
+    },
+    "support": {
+        "positive": ["customer support was helpful", "they replaced it without questions", "the agent solved it quickly"],
+        "negative": ["support never answered my emails", "the refund was refused", "I waited an hour on hold"]
+    },
+    "price": {
+        "positive": ["great value for the money", "cheaper than the competition", "worth every penny"],
+        "negative": ["way too expensive", "not worth the price", "hidden fees at checkout"]
+    }
+}
+
+OPENERS = {
+    "positive": ["I love this {product}.", "Really happy with my new {product}.", "Best {product} I have owned."],
+    "neutral": ["Bought this {product} last month.", "The {product} is okay.", "Nothing special about this {product}."],
+    "negative": ["I hate this {product}.", "Very disappointed with the {product}.", "Worst {product} I have bought."]
+}
+
+FILLER = [
+    "I use it every day.", "My partner uses it too.", "I compared a few models first.",
+    "It replaced my old one.", "I would mention a few details.", "Overall it does the job."
+]
+
+class ReviewCorpus:
+    """Deterministic synthetic product reviews with a skewed, review-like length distribution
+
+    Most reviews are one or two sentences; a long tail runs to several
+    paragraphs, so long-text windowing and token-budget batching are
+    exercised as they are by real traffic.
+    """
+
+    def __init__(self, seed: int = 13, mean_sentences: float = 1.2, sigma: float = 0.9, max_sentences: int = 80):
+        self.seed = seed
+        self.mean_sentences = mean_sentences
+        self.sigma = sigma
+        self.max_sentences = max_sentences
+
+    def _review(self, rng: random.Random) -> str:
+        product = rng.choice(PRODUCTS)
+        polarity = rng.choices(["positive", "neutral", "negative"], weights=[5, 2, 3])[0]
+        # Log-normal sentence counts: many short reviews, a few very long ones
+        sentences = min(self.max_sentences, max(1, int(rng.lognormvariate(self.mean_sentences, self.sigma))))
+
+        parts = [rng.choice(OPENERS[polarity]).format(product=product)]
+        for _ in range(sentences - 1):
+            if rng.random() < 0.25:
+                parts.append(rng.choice(FILLER))
+                continue
+            aspect = ASPECTS[rng.choice(list(ASPECTS))]
+            # Mixed reviews: mostly on-polarity details with some of the opposite
+            tone = polarity if polarity != "neutral" else rng.choice(["positive", "negative"])
+            if rng.random() < 0.2:
+                tone = "negative" if tone == "positive" else "positive"
+            parts.append(rng.choice(aspect[tone]).capitalize() + ".")
+        return " ".join(parts)
+
+    def generate(self, count: int, seed: Optional[int] = None) -> List[str]:
+        """Reviews for a given seed; the same arguments always produce the same corpus"""
+        rng = random.Random(self.seed if seed is None else seed)
+        return [self._review(rng) for _ in range(count)]
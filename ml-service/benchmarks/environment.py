@@ -0,0 +1,37 @@
+import os
+from pathlib import Path
+from typing import Dict
+
+from benchmarks.corpus import ReviewCorpus
+from benchmarks.tiny_models import build_tiny_models
+
+def benchmark_env(work_dir: str, cache: bool = False, topic_engine: str = "bertopic") -> Dict[str, str]:
+    """Service settings that point every model at a local tiny stand-in
+
+    Must be applied before anything under app/ is imported, since settings
+    are read once at import time.
+    """
+    work = Path(work_dir).resolve()
+    # The tokenizer is trained on a different seed's corpus than the benchmarks use
+    paths = build_tiny_models(str(work / "models"), ReviewCorpus(seed=1).generate(2000))
+
+    return {
+        "SENTIMENT_MODEL": paths["sentiment"],
+        "EMOTION_MODEL": paths["emotion"],
+        "TOPIC_EMBEDDING_MODEL": paths["embedding"],
+        "TOPIC_ENGINE": topic_engine,
+        "MODEL_CACHE_DIR": str(work / "cache"),
+        "INFERENCE_BACKEND": "pytorch",
+        # Repeated benchmark texts would otherwise be served from the result and embedding caches
+        "CACHE_ENABLED": str(cache).lower(),
+        "EMBEDDING_CACHE_ENABLED": str(cache).lower(),
+        "CACHE_REDIS_ENABLED": "false",
+        "ENABLE_METRICS": "false",
+        # All benchmark traffic comes from one client; admission control still sheds as configured
+        "RATE_LIMIT_REQUESTS": "0",
+        "HF_HUB_OFFLINE": "1",
+        "TRANSFORMERS_OFFLINE": "1"
+    }
+
+def apply_env(env: Dict[str, str]):
+    os.environ.update(env)
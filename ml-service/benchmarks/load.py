@@ -0,0 +1,160 @@
+import asyncio
+import itertools
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import httpx
+
+from benchmarks.report import summarize
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+
+def _payloads(endpoint: str, texts: Sequence[str], batch_size: int, topic_size: int) -> Callable[[int], Dict[str, Any]]:
+    """Request body for the n-th request to an endpoint, cycling through the corpus"""
+    if endpoint in ("/analyze", "/emotions"):
+        return lambda n: {"text": texts[n % len(texts)]}
+    if endpoint == "/analyze/batch":
+        size = min(batch_size, 100)
+        return lambda n: {"texts": [texts[(n * size + i) % len(texts)] for i in range(size)]}
+    if endpoint == "/topics":
+        # Kept under TOPIC_JOB_THRESHOLD so the request is answered inline
+        return lambda n: {
+            "texts": [texts[(n * topic_size + i) % len(texts)] for i in range(topic_size)],
+            "num_topics": 5,
+            "min_topic_size": 5
+        }
+    raise ValueError(f"No payload defined for {endpoint}")
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    payload: Callable[[int], Dict[str, Any]],
+    rps: float,
+    duration: float,
+    max_in_flight: int = 256
+) -> Dict[str, Any]:
+    """Open-loop load: requests start on a fixed schedule whether or not earlier ones finished
+
+    A closed loop would slow down with the server and hide queueing delay;
+    here a slow server shows up as growing latency and missed starts.
+    """
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    in_flight = asyncio.Semaphore(max_in_flight)
+    skipped = 0
+    degraded = 0
+
+    async def send(n: int):
+        nonlocal degraded
+        try:
+            start = time.perf_counter()
+            response = await client.post(endpoint, json=payload(n))
+            latencies.append(time.perf_counter() - start)
+            status = str(response.status_code)
+            if response.status_code == 200:
+                # Served by a fallback because admission control shed it
+                body = response.json()
+                degraded += any(result.get("degraded") for result in body.get("results", [body]))
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finally:
+            in_flight.release()
+        statuses[status] = statuses.get(status, 0) + 1
+
+    loop = asyncio.get_running_loop()
+    tasks = []
+    started = loop.time()
+    total = max(1, int(rps * duration))
+
+    for n in range(total):
+        delay = started + n / rps - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if in_flight.locked():
+            # The client is saturated; count the miss instead of queueing behind it
+            skipped += 1
+            continue
+        await in_flight.acquire()
+        tasks.append(asyncio.create_task(send(n)))
+
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - started
+
+    result = summarize(latencies, len(latencies), elapsed)
+    result.update({
+        "target_rps": rps,
+        "achieved_rps": round(len(latencies) / elapsed, 3) if elapsed else None,
+        "statuses": statuses,
+        "errors": sum(count for status, count in statuses.items() if not status.startswith("2")),
+        "degraded": degraded,
+        "skipped": skipped
+    })
+    return result
+
+async def run_load(
+    base_url: str,
+    texts: Sequence[str],
+    scenarios: Dict[str, float],
+    duration: float = 30.0,
+    batch_size: int = 32,
+    topic_size: int = 50,
+    timeout: float = 60.0
+) -> Dict[str, Any]:
+    """Drive each endpoint in turn at its target RPS and summarize the responses"""
+    results = {}
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        for endpoint, rps in scenarios.items():
+            payload = _payloads(endpoint, texts, batch_size, topic_size)
+            # One request first so lazy initialisation is not measured
+            await client.post(endpoint, json=payload(0))
+            results[f"load:{endpoint}"] = await run_scenario(client, endpoint, payload, rps, duration)
+    return results
+
+class LocalServer:
+    """Run the service under uvicorn in a subprocess with the given environment"""
+
+    def __init__(self, env: Dict[str, str], port: int = 8765, startup_timeout: float = 300.0):
+        self.env = env
+        self.port = port
+        self.startup_timeout = startup_timeout
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "LocalServer":
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(self.port)],
+            cwd=SERVICE_DIR,
+            env={**os.environ, **self.env},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+
+        deadline = time.time() + self.startup_timeout
+        for delay in itertools.chain([0.2, 0.5, 1.0], itertools.repeat(2.0)):
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Service exited during startup with code {self.process.returncode}")
+            try:
+                if httpx.get(f"{self.base_url}/health", timeout=5).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            if time.time() > deadline:
+                self.__exit__(None, None, None)
+                raise RuntimeError(f"Service did not become healthy within {self.startup_timeout}s")
+            time.sleep(delay)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
@@ -0,0 +1,124 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+from benchmarks.report import summarize
+
+def _chunks(texts: Sequence[str], size: int) -> List[Sequence[str]]:
+    return [texts[start:start + size] for start in range(0, len(texts), size)]
+
+async def _measure(
+    calls: Sequence[Callable[[], Awaitable[Any]]],
+    items_per_call: Sequence[int],
+    repeats: int,
+    warmup: int = 1
+) -> Dict[str, Any]:
+    """Run each call `repeats` times after `warmup` untimed passes, timing every call"""
+    for _ in range(warmup):
+        for call in calls:
+            await call()
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for call in calls:
+            call_start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+
+    return summarize(latencies, sum(items_per_call) * repeats, elapsed)
+
+async def run_micro_benchmarks(
+    texts: List[str],
+    batch_size: int = 100,
+    single_count: int = 200,
+    topic_count: int = 500,
+    repeats: int = 3,
+    only: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """Time each service method directly, without HTTP in the way
+
+    Services are imported here, after the benchmark environment is applied.
+    """
+    from app.services.emotion_analyzer import EmotionAnalyzer
+    from app.services.inference_executor import inference_executor
+    from app.services.sentiment_analyzer import SentimentAnalyzer
+    from app.services.topic_modeler import TopicModeler
+
+    emotion_analyzer = EmotionAnalyzer()
+    sentiment_analyzer = SentimentAnalyzer(emotion_analyzer=emotion_analyzer)
+    topic_modeler = TopicModeler()
+
+    def selected(name: str) -> bool:
+        return not only or any(name.startswith(prefix) for prefix in only)
+
+    results: Dict[str, Any] = {}
+
+    classifier_benchmarks = ("sentiment.single", "sentiment.batch", "sentiment.batch_with_emotions", "emotion.batch")
+    if any(selected(name) for name in classifier_benchmarks):
+        await sentiment_analyzer.load_model()
+        await emotion_analyzer.load_model()
+
+    batches = _chunks(texts, batch_size)
+    singles = texts[:single_count]
+
+    if selected("sentiment.single"):
+        results["sentiment.single"] = await _measure(
+            [lambda text=text: sentiment_analyzer.analyze(text) for text in singles],
+            [1] * len(singles),
+            repeats
+        )
+
+    if selected("sentiment.batch"):
+        results["sentiment.batch"] = await _measure(
+            [lambda batch=batch: sentiment_analyzer.analyze_batch(list(batch)) for batch in batches],
+            [len(batch) for batch in batches],
+            repeats
+        )
+
+    if selected("sentiment.batch_with_emotions"):
+        results["sentiment.batch_with_emotions"] = await _measure(
+            [
+                lambda batch=batch: sentiment_analyzer.analyze_batch(list(batch), include_emotions=True)
+                for batch in batches
+            ],
+            [len(batch) for batch in batches],
+            repeats
+        )
+
+    if selected("emotion.batch"):
+        results["emotion.batch"] = await _measure(
+            [lambda batch=batch: emotion_analyzer.analyze_batch(list(batch)) for batch in batches],
+            [len(batch) for batch in batches],
+            repeats
+        )
+
+    if any(selected(name) for name in ("topics.fit", "topics.transform", "topics.extract")):
+        await topic_modeler.load_model()
+        corpus = texts[:topic_count]
+
+        # Fit and transform need the embedding model; the hashing engine only extracts
+        if topic_modeler.is_loaded and selected("topics.fit"):
+            results["topics.fit"] = await _measure(
+                [lambda: topic_modeler.fit(list(corpus))], [len(corpus)], repeats
+            )
+        if topic_modeler.is_loaded and selected("topics.transform"):
+            if topic_modeler.current is None:
+                await topic_modeler.fit(list(corpus))
+            results["topics.transform"] = await _measure(
+                [lambda batch=batch: topic_modeler.assign(list(batch)) for batch in batches],
+                [len(batch) for batch in batches],
+                repeats
+            )
+
+        if selected("topics.extract"):
+            results["topics.extract"] = await _measure(
+                [lambda: topic_modeler.extract_topics(list(corpus), num_topics=10, min_topic_size=5)],
+                [len(corpus)],
+                repeats
+            )
+
+    await sentiment_analyzer.batcher.close()
+    await emotion_analyzer.batcher.close()
+    await inference_executor.shutdown()
+    return results
@@ -0,0 +1,95 @@
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+def summarize(latencies: Sequence[float], items: int, elapsed: float) -> Dict[str, Any]:
+    """Latency percentiles (ms) and throughput for one benchmark"""
+    if not latencies:
+        return {"calls": 0, "items": items, "elapsed_s": elapsed}
+
+    values = np.asarray(latencies) * 1000
+    return {
+        "calls": len(values),
+        "items": items,
+        "elapsed_s": round(elapsed, 4),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+        "calls_per_second": round(len(values) / elapsed, 3) if elapsed else None,
+        "items_per_second": round(items / elapsed, 3) if elapsed else None
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment() -> Dict[str, Any]:
+    """What the numbers were measured on, so reports from different machines are not mixed up"""
+    import torch
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch_threads": torch.get_num_threads()
+    }
+
+def build_report(kind: str, config: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "kind": kind,
+        "created_at": datetime.utcnow().isoformat(),
+        "environment": environment(),
+        "config": config,
+        "results": results
+    }
+
+def write_report(report: Dict[str, Any], path: str):
+    """Write a report as stable, key-sorted JSON so two runs diff cleanly"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(json.dumps(report, indent=2, sort_keys=True, default=str) + "\n")
+
+# Metrics compared between reports, and whether a larger value is better
+COMPARED_METRICS = {
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "items_per_second": True
+}
+
+def compare_reports(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Relative change of each benchmark metric from a baseline report to a candidate"""
+    rows = []
+    for name, result in sorted(candidate["results"].items()):
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            rows.append({
+                "benchmark": name,
+                "metric": metric,
+                "baseline": old,
+                "candidate": new,
+                "change": round(change, 4),
+                "improved": change > 0 if higher_is_better else change < 0
+            })
+    return rows
@@ -0,0 +1,84 @@
+import json
+from pathlib import Path
+from typing import Dict, List
+
+import torch
+from tokenizers import ByteLevelBPETokenizer
+from transformers import RobertaConfig, RobertaForSequenceClassification, RobertaModel, RobertaTokenizerFast
+
+# Label sets of the default SENTIMENT_MODEL and EMOTION_MODEL
+SENTIMENT_LABELS = ["negative", "neutral", "positive"]
+EMOTION_LABELS = ["anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise"]
+
+# Bump when the architecture changes so stale stand-ins are rebuilt
+TINY_MODELS_VERSION = 1
+
+def _config(vocab_size: int, labels: List[str]) -> RobertaConfig:
+    return RobertaConfig(
+        vocab_size=vocab_size,
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=128,
+        max_position_embeddings=514,
+        num_labels=len(labels),
+        id2label=dict(enumerate(labels)),
+        label2id={label: i for i, label in enumerate(labels)},
+        pad_token_id=1,
+        bos_token_id=0,
+        eos_token_id=2
+    )
+
+def _train_tokenizer(texts: List[str], path: Path) -> RobertaTokenizerFast:
+    """Byte-level BPE trained on the benchmark corpus, loadable as a RoBERTa tokenizer"""
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(
+        texts,
+        vocab_size=2000,
+        min_frequency=1,
+        special_tokens=["<s>", "<pad>", "</s>", "<unk>", "<mask>"],
+        show_progress=False
+    )
+    path.mkdir(parents=True, exist_ok=True)
+    bpe.save_model(str(path))
+    return RobertaTokenizerFast(
+        vocab_file=str(path / "vocab.json"),
+        merges_file=str(path / "merges.txt"),
+        model_max_length=512
+    )
+
+def build_tiny_models(directory: str, texts: List[str], seed: int = 0) -> Dict[str, str]:
+    """Randomly initialized stand-ins for the sentiment, emotion and topic embedding models
+
+    They share the real models' architecture family and tokenizer type, so
+    every code path (tokenization, windowing, batching, forward passes) runs
+    as in production, only with far fewer weights and no download.
+    """
+    root = Path(directory)
+    paths = {name: root / name for name in ("sentiment", "emotion", "embedding")}
+    marker = root / "tiny_models.json"
+
+    if marker.exists() and json.loads(marker.read_text()).get("version") == TINY_MODELS_VERSION:
+        return {name: str(path) for name, path in paths.items()}
+
+    torch.manual_seed(seed)
+    tokenizer = _train_tokenizer(texts, root / "tokenizer")
+
+    for name, labels in (("sentiment", SENTIMENT_LABELS), ("emotion", EMOTION_LABELS)):
+        model = RobertaForSequenceClassification(_config(len(tokenizer), labels))
+        model.save_pretrained(paths[name])
+        tokenizer.save_pretrained(paths[name])
+
+    # Imported here: only the topic stand-in needs sentence-transformers
+    from sentence_transformers import SentenceTransformer, models
+
+    encoder_path = root / "encoder"
+    RobertaModel(_config(len(tokenizer), SENTIMENT_LABELS)).save_pretrained(encoder_path)
+    tokenizer.save_pretrained(encoder_path)
+
+    transformer = models.Transformer(str(encoder_path), max_seq_length=256)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), pooling_mode="mean")
+    SentenceTransformer(modules=[transformer, pooling]).save(str(paths["embedding"]))
+
+    marker.write_text(json.dumps({"version": TINY_MODELS_VERSION, "seed": seed}))
+    return {name: str(path) for name, path in paths.items()}
@@ -1,30 +1,59 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Request, UploadFile, File, Form
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
 import os
+import time
+from typing import Optional
 from dotenv import load_dotenv
 
 from app.models.request_models import (
     SentimentRequest,
     BatchSentimentRequest,
     TopicModelingRequest,
-    EmotionAnalysisRequest
+    TopicFitRequest,
+    TopicAssignRequest,
+    OnlineTopicsRequest,
+    TopicJobRequest,
+    RetrainRequest,
+    EmotionAnalysisRequest,
+    BatchEmotionAnalysisRequest
 )
 from app.models.response_models import (
     SentimentResponse,
     BatchSentimentResponse,
     TopicModelingResponse,
+    TopicModelInfoResponse,
+    TopicAssignResponse,
+    OnlineTopicsResponse,
+    TopicJobResponse,
     EmotionAnalysisResponse,
-    HealthResponse
+    BatchEmotionAnalysisResponse,
+    HealthResponse,
+    LivenessResponse,
+    ReadinessResponse
 )
 from app.services.sentiment_analyzer import SentimentAnalyzer
 from app.services.emotion_analyzer import EmotionAnalyzer
 from app.services.topic_modeler import TopicModeler
 from app.services.model_manager import ModelManager
+from app.services.admission import OverloadedError
+from app.services.model_lifecycle import RolloutConflictError, model_lifecycle
+from app.services.model_registry import (
+    ModelNotReadyError,
+    get_sentiment_analyzer,
+    get_emotion_analyzer,
+    get_topic_modeler,
+    get_loaded_topic_modeler
+)
+from app.services.topic_jobs import topic_job_manager, parse_corpus
+from app.services.stream_processor import stream_sentiment_ndjson, NDJSONStreamingResponse
 from app.core.config import settings
 from app.core.logging import logger
+from app.core.metrics import MetricsMiddleware, render_metrics, start_metrics_server
+from app.core.rate_limit import RateLimitMiddleware
 
 # Load environment variables
 load_dotenv()
@@ -37,8 +66,9 @@ async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
     logger.info("Starting ML Service...")
-    await model_manager.load_models()
-    logger.info("Models loaded successfully")
+    start_metrics_server()
+    await model_manager.start()
+    logger.info("ML Service accepting requests")
     
     yield
     
@@ -57,6 +87,9 @@ app = FastAPI(
 )
 
 # Add middleware
+# Inside CORS, so clients can read rate-limited responses
+app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Configure based on environment
@@ -67,10 +100,26 @@ app.add_middleware(
 
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
-# Initialize services
-sentiment_analyzer = SentimentAnalyzer()
-emotion_analyzer = EmotionAnalyzer()
-topic_modeler = TopicModeler()
+# Outermost, so latency covers compression and the full streamed body
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(ModelNotReadyError)
+async def model_not_ready_handler(request: Request, exc: ModelNotReadyError):
+    """Fail fast while a model loads instead of holding the request"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "model": exc.name, "state": exc.state},
+        headers={"Retry-After": str(settings.LOADING_RETRY_AFTER_SECONDS)}
+    )
+
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError):
+    """Shed load with a fast 429 instead of queueing past the latency budget"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 @app.get("/", response_model=dict)
 async def root():
@@ -97,8 +146,30 @@ async def health_check():
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=503, detail="Service unhealthy")
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+@app.get("/live", response_model=LivenessResponse)
+async def liveness():
+    """Liveness probe: the process is up, whether or not models have loaded"""
+    return LivenessResponse(status="alive", uptime=time.time() - model_manager.start_time)
+
+@app.get("/ready", response_model=ReadinessResponse)
+async def readiness():
+    """Readiness probe with per-model state; 503 until the READINESS_MODELS have settled"""
+    response = ReadinessResponse(**model_manager.readiness())
+    if not response.ready:
+        return JSONResponse(status_code=503, content=response.model_dump(mode="json"))
+    return response
+
 @app.post("/analyze", response_model=SentimentResponse)
-async def analyze_sentiment(request: SentimentRequest):
+async def analyze_sentiment(
+    request: SentimentRequest,
+    sentiment_analyzer: SentimentAnalyzer = Depends(get_sentiment_analyzer)
+):
     """Analyze sentiment of a single text"""
     try:
         logger.info(f"Analyzing sentiment for text: {request.text[:50]}...")
@@ -111,13 +182,19 @@ async def analyze_sentiment(request: SentimentRequest):
         
         return SentimentResponse(**result)
     
+    except OverloadedError:
+        raise
     except Exception as e:
         logger.error(f"Sentiment analysis failed: {e}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @app.post("/analyze/batch", response_model=BatchSentimentResponse)
-async def analyze_batch_sentiment(request: BatchSentimentRequest):
+async def analyze_batch_sentiment(
+    request: BatchSentimentRequest,
+    sentiment_analyzer: SentimentAnalyzer = Depends(get_sentiment_analyzer)
+):
     """Analyze sentiment of multiple texts"""
+    start_time = time.time()
     try:
         logger.info(f"Analyzing batch sentiment for {len(request.texts)} texts")
         
@@ -127,14 +204,45 @@ async def analyze_batch_sentiment(request: BatchSentimentRequest):
             include_topics=request.include_topics
         )
         
-        return BatchSentimentResponse(results=results)
+        return BatchSentimentResponse(
+            results=results,
+            total_processed=len(results),
+            average_confidence=(
+                sum(result["confidence"] for result in results) / len(results) if results else 0.0
+            ),
+            processing_time=time.time() - start_time
+        )
     
+    except OverloadedError:
+        raise
     except Exception as e:
         logger.error(f"Batch sentiment analysis failed: {e}")
         raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
 
+@app.post("/analyze/stream")
+async def analyze_stream_sentiment(
+    request: Request,
+    include_emotions: bool = False,
+    include_topics: bool = False,
+    sentiment_analyzer: SentimentAnalyzer = Depends(get_sentiment_analyzer)
+):
+    """Analyze an NDJSON stream of texts, streaming NDJSON results back per chunk"""
+    logger.info("Starting streaming sentiment analysis")
+    
+    return NDJSONStreamingResponse(
+        stream_sentiment_ndjson(
+            sentiment_analyzer,
+            request.stream(),
+            include_emotions=include_emotions,
+            include_topics=include_topics
+        )
+    )
+
 @app.post("/emotions", response_model=EmotionAnalysisResponse)
-async def analyze_emotions(request: EmotionAnalysisRequest):
+async def analyze_emotions(
+    request: EmotionAnalysisRequest,
+    emotion_analyzer: EmotionAnalyzer = Depends(get_emotion_analyzer)
+):
     """Analyze emotions in text"""
     try:
         logger.info(f"Analyzing emotions for text: {request.text[:50]}...")
@@ -143,13 +251,45 @@ async def analyze_emotions(request: EmotionAnalysisRequest):
         
         return EmotionAnalysisResponse(**result)
     
+    except OverloadedError:
+        raise
     except Exception as e:
         logger.error(f"Emotion analysis failed: {e}")
         raise HTTPException(status_code=500, detail=f"Emotion analysis failed: {str(e)}")
 
+@app.post("/emotions/batch", response_model=BatchEmotionAnalysisResponse)
+async def analyze_batch_emotions(
+    request: BatchEmotionAnalysisRequest,
+    emotion_analyzer: EmotionAnalyzer = Depends(get_emotion_analyzer)
+):
+    """Analyze emotions in multiple texts"""
+    start_time = time.time()
+    try:
+        logger.info(f"Analyzing batch emotions for {len(request.texts)} texts")
+        
+        results = await emotion_analyzer.analyze_batch(request.texts)
+        
+        return BatchEmotionAnalysisResponse(
+            results=results,
+            total_processed=len(results),
+            processing_time=time.time() - start_time
+        )
+    
+    except OverloadedError:
+        raise
+    except Exception as e:
+        logger.error(f"Batch emotion analysis failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch emotion analysis failed: {str(e)}")
+
 @app.post("/topics", response_model=TopicModelingResponse)
-async def extract_topics(request: TopicModelingRequest):
-    """Extract topics from texts"""
+async def extract_topics(
+    request: TopicModelingRequest,
+    topic_modeler: TopicModeler = Depends(get_topic_modeler)
+):
+    """Extract topics from texts; large corpora are queued as a job (202)"""
+    if len(request.texts) > settings.TOPIC_JOB_THRESHOLD:
+        return _submit_topic_job(request.texts, request.num_topics, request.min_topic_size)
+    
     try:
         logger.info(f"Extracting topics from {len(request.texts)} texts")
         
@@ -165,16 +305,190 @@ async def extract_topics(request: TopicModelingRequest):
         logger.error(f"Topic modeling failed: {e}")
         raise HTTPException(status_code=500, detail=f"Topic modeling failed: {str(e)}")
 
-@app.post("/retrain")
-async def retrain_models(background_tasks: BackgroundTasks):
-    """Trigger model retraining (admin only)"""
+def _submit_topic_job(texts, num_topics: int, min_topic_size: int) -> JSONResponse:
+    job = topic_job_manager.submit(texts, num_topics=num_topics, min_topic_size=min_topic_size)
+    return JSONResponse(
+        status_code=202,
+        content=TopicJobResponse(**job).model_dump(mode="json"),
+        headers={"Location": f"/topics/jobs/{job['id']}"}
+    )
+
+@app.post("/topics/jobs", response_model=TopicJobResponse, status_code=202)
+async def submit_topic_job(request: TopicJobRequest):
+    """Queue topic extraction over a large corpus"""
+    try:
+        return _submit_topic_job(request.texts, request.num_topics, request.min_topic_size)
+    
+    except Exception as e:
+        logger.error(f"Topic job submission failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Topic job submission failed: {str(e)}")
+
+@app.post("/topics/jobs/upload", response_model=TopicJobResponse, status_code=202)
+async def upload_topic_job(
+    file: UploadFile = File(..., description="Corpus as .ndjson/.jsonl or plain text, one text per line"),
+    num_topics: int = Form(default=10, ge=2, le=50),
+    min_topic_size: int = Form(default=10, ge=5, le=100)
+):
+    """Queue topic extraction over an uploaded corpus file"""
+    try:
+        texts = parse_corpus(await file.read(), file.filename or "")
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid corpus file: {str(e)}")
+    
+    if not 5 <= len(texts) <= settings.TOPIC_JOB_MAX_TEXTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Corpus must contain between 5 and {settings.TOPIC_JOB_MAX_TEXTS} texts"
+        )
+    
+    return _submit_topic_job(texts, num_topics, min_topic_size)
+
+@app.get("/topics/jobs/{job_id}", response_model=TopicJobResponse)
+async def get_topic_job(job_id: str):
+    """Get the status and progress of a topic job"""
+    try:
+        return TopicJobResponse(**topic_job_manager.get(job_id))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Topic job {job_id} not found")
+
+@app.get("/topics/jobs/{job_id}/result", response_model=TopicModelingResponse)
+async def get_topic_job_result(job_id: str):
+    """Get the result of a completed topic job"""
+    try:
+        result = topic_job_manager.result(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Topic job {job_id} not found")
+    
+    if result is None:
+        job = topic_job_manager.get(job_id)
+        raise HTTPException(status_code=409, detail=f"Topic job {job_id} is {job['status']}")
+    
+    return TopicModelingResponse(**result)
+
+@app.post("/topics/fit", response_model=TopicModelInfoResponse)
+async def fit_topic_model(
+    request: TopicFitRequest,
+    topic_modeler: TopicModeler = Depends(get_loaded_topic_modeler)
+):
+    """Fit, save and activate a new topic model"""
+    try:
+        logger.info(f"Fitting topic model on {len(request.texts)} texts")
+        
+        result = await topic_modeler.fit(
+            texts=request.texts,
+            min_topic_size=request.min_topic_size
+        )
+        
+        return TopicModelInfoResponse(**result)
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Topic model fit failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Topic model fit failed: {str(e)}")
+
+@app.get("/topics/model", response_model=TopicModelInfoResponse)
+async def get_topic_model(topic_modeler: TopicModeler = Depends(get_loaded_topic_modeler)):
+    """Get the currently active fitted topic model"""
+    await topic_modeler.sync_current()
+    fitted = topic_modeler.current
+    if fitted is None:
+        raise HTTPException(status_code=404, detail="No fitted topic model; call /topics/fit first")
+    
+    return TopicModelInfoResponse(**fitted.to_dict())
+
+@app.post("/topics/assign", response_model=TopicAssignResponse)
+async def assign_topics(
+    request: TopicAssignRequest,
+    topic_modeler: TopicModeler = Depends(get_loaded_topic_modeler)
+):
+    """Assign texts to the topics of the fitted model"""
+    try:
+        result = await topic_modeler.assign(request.texts)
+        
+        return TopicAssignResponse(**result)
+    
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=f"{str(e)}; call /topics/fit first")
+    except Exception as e:
+        logger.error(f"Topic assignment failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Topic assignment failed: {str(e)}")
+
+@app.post("/topics/online", response_model=OnlineTopicsResponse)
+async def push_online_topics(
+    request: OnlineTopicsRequest,
+    topic_modeler: TopicModeler = Depends(get_loaded_topic_modeler)
+):
+    """Push newly arrived texts into the online topic model"""
     try:
-        background_tasks.add_task(model_manager.retrain_models)
-        return {"message": "Model retraining started in background"}
+        result = await topic_modeler.push_online(request.texts, flush=request.flush)
+        
+        return OnlineTopicsResponse(**result)
     
+    except OverloadedError:
+        raise
+    except Exception as e:
+        logger.error(f"Online topic update failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Online topic update failed: {str(e)}")
+
+@app.get("/topics/online", response_model=OnlineTopicsResponse)
+async def get_online_topics(topic_modeler: TopicModeler = Depends(get_loaded_topic_modeler)):
+    """Get the current online topics"""
+    if topic_modeler.online is None:
+        raise HTTPException(status_code=503, detail="Online topic model is not loaded")
+    
+    return OnlineTopicsResponse(**topic_modeler.online.to_dict())
+
+@app.post("/retrain", status_code=202)
+async def retrain_models(request: Optional[RetrainRequest] = None):
+    """Roll out a new classifier version: load, validate on the holdout set, then hot-swap (admin only)"""
+    request = request or RetrainRequest()
+    if not request.model and (request.source or request.version):
+        raise HTTPException(status_code=400, detail="source and version need a single model")
+    
+    try:
+        rollouts = model_manager.retrain_models(
+            model=request.model,
+            source=request.source,
+            version=request.version,
+            force=request.force
+        )
+        return {
+            "message": "Model rollout started in background",
+            "rollouts": [rollout.to_dict() for rollout in rollouts]
+        }
+    
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RolloutConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.get("/models/{name}/versions")
+async def get_model_versions(name: str):
+    """Active and draining versions, rollout history and the latest rollout of a classifier"""
+    try:
+        return model_lifecycle.describe(name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/models/{name}/rollback")
+async def rollback_model(name: str):
+    """Swap the previously active version of a classifier back in (admin only)"""
+    try:
+        return await model_lifecycle.rollback(name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ModelNotReadyError:
+        raise
     except Exception as e:
-        logger.error(f"Model retraining failed: {e}")
-        raise HTTPException(status_code=500, detail=f"Retraining failed: {str(e)}")
+        logger.error(f"Rollback of {name} failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Rollback failed: {str(e)}")
 
 @app.get("/models/status")
 async def get_model_status():
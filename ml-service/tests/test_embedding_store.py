@@ -0,0 +1,35 @@
+import multiprocessing
+
+import numpy as np
+
+from app.services.embedding_store import EmbeddingStore
+
+class FakeEncoder:
+    """Deterministic 8-dimensional embeddings, so no model is needed"""
+
+    def encode(self, texts, show_progress_bar=False):
+        return np.array([[len(text) + i for i in range(8)] for text in texts], dtype=np.float32)
+
+def _append_from_other_process(directory: str, texts):
+    EmbeddingStore(directory, "fake-model").embed(texts, FakeEncoder())
+
+def test_store_opened_before_meta_sees_rows_appended_by_another_process(tmp_path):
+    # Opened on an empty directory, like a pre-fork master or a topic-job child
+    store = EmbeddingStore(tmp_path, "fake-model")
+    assert store.dimension is None
+
+    process = multiprocessing.get_context("spawn").Process(
+        target=_append_from_other_process, args=(str(tmp_path), ["first", "second"])
+    )
+    process.start()
+    process.join(60)
+    assert process.exitcode == 0
+
+    embeddings = store.embed(["first", "second", "third"], FakeEncoder())
+    assert store.dimension == 8
+    assert store.hits == 2 and store.misses == 1
+    np.testing.assert_array_equal(embeddings, FakeEncoder().encode(["first", "second", "third"]))
+
+    # Later calls keep working and find the row this process appended
+    assert store.embed(["third"], FakeEncoder()).shape == (1, 8)
+    assert store.hits == 3
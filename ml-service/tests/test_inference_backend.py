@@ -0,0 +1,50 @@
+import pytest
+import torch
+from transformers import BertConfig, BertForSequenceClassification
+
+from app.core.config import settings
+from app.services import inference_backend
+
+pytest.importorskip("onnxruntime")
+
+HUB_MODEL = "example-org/tiny-classifier"
+
+class FakeTokenizer:
+    """Maps each word to a fixed id, so no vocabulary download is needed"""
+
+    model_max_length = 32
+    pad_token_id = 0
+
+    def __call__(self, texts, truncation=True, max_length=None):
+        return {"input_ids": [[1] + [2 + len(word) % 40 for word in text.split()][:max_length - 2] + [3] for text in texts]}
+
+def _tiny_model():
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=50, hidden_size=16, num_hidden_layers=1, num_attention_heads=2,
+                        intermediate_size=32, max_position_embeddings=64, num_labels=3)
+    return BertForSequenceClassification(config).eval()
+
+def test_onnx_export_on_cold_hub_cache_is_served_on_first_load(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PARITY_SAMPLE_PATH", "")
+    model = _tiny_model()
+
+    def download(model_name):
+        # Like from_pretrained on a cold cache: the snapshot ref appears only once the weights are fetched
+        ref = tmp_path / ("models--" + model_name.replace("/", "--")) / "refs" / "main"
+        ref.parent.mkdir(parents=True, exist_ok=True)
+        ref.write_text("0123456789abcdef")
+        return model
+
+    monkeypatch.setattr(inference_backend, "_load_torch_model", download)
+    monkeypatch.setattr(inference_backend.AutoConfig, "from_pretrained", lambda *args, **kwargs: model.config)
+
+    cold_path = inference_backend.onnx_model_path(HUB_MODEL)
+    backend = inference_backend._load_onnx_backend(HUB_MODEL, FakeTokenizer(), quantized=False)
+
+    assert isinstance(backend, inference_backend.OnnxBackend)
+    warm_path = inference_backend.onnx_model_path(HUB_MODEL)
+    assert warm_path != cold_path
+    assert backend.model_path == warm_path and warm_path.exists()
+    # Only the export for the downloaded weights is kept
+    assert [path.name for path in warm_path.parent.parent.iterdir()] == [warm_path.parent.name]